@@ -1,27 +1,258 @@
+import contextvars
+import math
+import os
+import uuid
+
 import streamlit as st
 import pandas as pd
 
-from modules.data_processor import process_spreadsheet
-from modules.calculations import calcular_pagamento_semanal, calcular_pagamento_individual
-from modules.config import FORMAS_PAGAMENTO_VALIDAS, INVALID_CLIENTS
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+
+from modules.data_processor import load_spreadsheets, load_spreadsheet_urls, read_workbook_bytes
+from modules.cache import WorkbookCache, SharedDatasetStore
+from modules.fetcher import get_fetcher
+from modules.history import HistoryStore
+from modules.exports import ArtifactCache, artifact_key, write_csv, write_parquet, write_payroll_xlsx
+from modules.config import (
+    INGEST_WORKERS, JOB_POLL_SECONDS, PDF_WORKERS, PROFILE_ENABLED, PROFILE_MEMORY, REGRAS_PAGAMENTO,
+    RECONCILIATION_SKIP_METHODS, SIMULATION_MAX_SCENARIOS
+)
 from modules.pdf_generator import (
     create_pdf,
     create_employee_payment_receipt,
-    create_employee_of_the_week_receipt
+    create_employee_of_the_week_receipt,
+    receipt_jobs,
+    create_receipts_zip
 )
 from modules.visualization import (
     plot_weekly_evolution,
     plot_weekly_payments,
     plot_payment_methods_total,
-    plot_payment_methods_usage
+    plot_payment_methods_usage,
+    plot_rank_trend
 )
 from modules.utils import format_currency
+from modules.schema import concat_appointments, memory_report
+from modules.utils import frame_fingerprint
+from modules.cube import build_cube
+from modules.ranking import weekly_ranking, week_winners, leaderboard
+from modules.pipeline import clean_appointments, filter_appointments, compute_payroll, allocate_appointments
+from modules.jobs import JobRunner
+from modules.incremental import IncrementalParser
+from modules.profiling import Profiler, stage
+from modules.reconciliation import load_statements, reconcile_payments
+from modules.simulation import (
+    CAMPOS_SIMULAVEIS, parameter_count, parameter_range, build_scenarios, simulate_payroll, scenario_summary
+)
 
 def local_css(file_name):
     with open(file_name) as f:
         st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
 
-def main():
+@st.cache_resource
+def get_workbook_cache():
+    return WorkbookCache()
+
+@st.cache_resource
+def get_artifact_cache():
+    return ArtifactCache()
+
+@st.cache_resource
+def get_history_store():
+    return HistoryStore()
+
+@st.cache_resource
+def get_dataset_store():
+    """Planilhas, cubos e folhas em memória, compartilhados por todas as sessões"""
+    return SharedDatasetStore(backing=get_workbook_cache())
+
+def prepare_dataset(frames, store):
+    """Junta e limpa os DataFrames lidos; o dataset fica no store com a chave do seu conteúdo"""
+    with stage('concat') as record:
+        data = concat_appointments(frames)
+        record['rows'] = len(data)
+    data = clean_appointments(data)
+
+    with stage('fingerprint'):
+        dataset_key = frame_fingerprint(data)
+    # Sessões com o mesmo conteúdo passam a usar o mesmo DataFrame
+    return store.share(('dataset', dataset_key), data), dataset_key
+
+def load_history(history, weeks):
+    """
+    (dataset, chave) das semanas do histórico, ou (None, None) sem atendimentos. Só o intervalo de semanas
+    vai para o SQLite: funcionários e categorias são filtrados no cubo, que fica o mesmo para qualquer
+    filtro. A consulta, o preparo e o fingerprint só se repetem quando o que está gravado nessas semanas muda.
+    """
+    store = get_dataset_store()
+    memo_key = ('history', tuple(weeks), history.fingerprint(weeks))
+    dataset_key = store.lookup(memo_key)
+    data = store.lookup(('dataset', dataset_key)) if dataset_key is not None else None
+    if data is None:
+        df = history.query(weeks=weeks)
+        if df.empty:
+            return None, None
+        data, dataset_key = prepare_dataset([df], store)
+        store.share(memo_key, dataset_key)
+    return data, dataset_key
+
+def get_cube(data, key):
+    """Cubo de métricas do dataset, construído uma vez e reaproveitado nas mudanças de filtro e entre sessões"""
+    return get_dataset_store().get_or_build(('cube', key), lambda: build_cube(data))
+
+@st.cache_resource
+def get_ingest_pool():
+    if INGEST_WORKERS <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=INGEST_WORKERS)
+
+@st.cache_resource
+def get_receipt_pool():
+    if PDF_WORKERS <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=PDF_WORKERS)
+
+@st.cache_resource
+def get_job_runner():
+    """Exportações em segundo plano, compartilhadas por todas as sessões"""
+    return JobRunner()
+
+@st.cache_resource
+def get_load_runner():
+    """Leitura das planilhas em threads próprias, para não esperar atrás de exportações demoradas"""
+    return JobRunner()
+
+@st.cache_resource
+def get_incremental_parser():
+    """Última versão de cada planilha (envio da sessão, caminho ou URL), para reler só o que mudou quando ela volta editada"""
+    return IncrementalParser()
+
+def session_scope():
+    """Identifica a sessão do navegador (envios da sessão, jobs que ela está usando)"""
+    return st.session_state.setdefault('session_scope', uuid.uuid4().hex)
+
+def track_job_group(slot, group, runner):
+    """
+    Grupo de jobs atual da sessão. Quando muda (outra planilha, outros filtros) a sessão deixa o anterior,
+    cujos jobs não terminados são cancelados se nenhuma outra sessão estiver usando o mesmo grupo
+    """
+    owner = session_scope()
+    previous = st.session_state.get(slot)
+    if previous is not None and previous != group:
+        runner.release(previous, owner)
+    if group is not None:
+        runner.hold(group, owner)
+    st.session_state[slot] = group
+
+def precompute_payroll(data, dataset_key, store):
+    """
+    Cubo e folha dos filtros iniciais da página (todas as semanas, funcionários e categorias), calculados
+    ainda no job de leitura: as métricas aparecem assim que ele termina
+    """
+    filter_state = {
+        'weeks': [],
+        'employees': sorted(map(str, data['Nome'].unique())),
+        'categories': sorted(map(str, data['Categoria'].unique()))
+    }
+    cube = store.get_or_build(('cube', dataset_key), lambda: build_cube(data))
+    store.get_or_build(('payroll', artifact_key('payroll', dataset_key, filter_state)), lambda: compute_payroll(cube))
+
+STATUS_ICONS = {'downloading': '⏳', 'parsing': '⚙️', 'done': '✅', 'failed': '❌'}
+
+def load_sources(job, uploads, paths, urls, cache, executor, parser=None):
+    """
+    Job de leitura: planilhas enviadas (nome, fonte para o parser incremental, bytes), caminhos locais e
+    URLs. job.progress guarda o andamento de cada fonte (e, com o parser incremental, o resumo das
+    mudanças). O dataset, o cubo e a folha dos filtros iniciais vão para o cache (dentro do seu limite de
+    memória) e o resultado do job é só a chave do dataset, ou None sem dados.
+    """
+    files = list(uploads) + [(path, path, read_workbook_bytes(path)) for path in paths]
+    sources = {name: source for name, source, _ in files}
+    for name, _, content in files:
+        job.progress[name] = {'source': name, 'status': 'parsing', 'bytes': len(content), 'rows': None, 'error': None}
+    for url in urls:
+        job.progress[url] = {'source': url, 'status': 'downloading', 'bytes': 0, 'rows': None, 'error': None}
+
+    def show(result):
+        rows = len(result['data']) if result['status'] == 'done' else None
+        job.progress[result['source']].update(
+            status=result['status'], bytes=result['bytes'], rows=rows, error=result['error']
+        )
+
+    frames = []
+    # Os downloads começam junto com a leitura dos envios, numa thread com o mesmo contexto (profiler) do job
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix='jobtrack-urls') as downloads:
+        url_results = None
+        if urls:
+            url_results = downloads.submit(
+                contextvars.copy_context().run, load_spreadsheet_urls, urls, cache, executor, progress=show,
+                parser=parser
+            )
+        if files:
+            names = [name for name, _, _ in files]
+            loaded = load_spreadsheets(
+                [content for _, _, content in files], cache, executor, sources=[source for _, source, _ in files],
+                parser=parser
+            )
+            for name, df in zip(names, loaded):
+                job.progress[name].update(status='done', rows=len(df))
+                frames.append(df)
+
+        if url_results is not None:
+            for result in url_results.result():
+                if result['status'] == 'done':
+                    frames.append(result['data'])
+
+    if parser is not None:
+        for name, result in job.progress.items():
+            if result['status'] == 'done':
+                result['changes'] = parser.changes(sources.get(name, name))
+
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        return None
+    data, dataset_key = prepare_dataset(frames, cache)
+    job.raise_if_cancelled()
+    precompute_payroll(data, dataset_key, cache)
+    return dataset_key
+
+def show_source_status(container, progress):
+    for result in progress.values():
+        text = f"{STATUS_ICONS[result['status']]} {result['source']}"
+        if result['status'] == 'failed':
+            container.error(f"{text}: {result['error']}")
+            continue
+        if result['status'] == 'done':
+            text += f" ({result['bytes'] / 1024:,.0f} KB, {result['rows']} rows)"
+        changes = result.get('changes')
+        if changes is not None and not changes['first_load']:
+            text += (
+                f" — {changes['sheets_reused']} sheets and {changes['blocks_reused']} blocks reused, "
+                f"+{changes['added']} / ~{changes['changed']} / -{changes['removed']} appointments"
+            )
+        container.caption(text)
+
+def show_source_changes(progress):
+    """Atendimentos incluídos, alterados e removidos por employee/semana nas planilhas que voltaram editadas"""
+    details = [
+        result['changes']['details'].assign(Source=source)
+        for source, result in progress.items()
+        if result.get('changes') is not None and not result['changes']['details'].empty
+    ]
+    if details:
+        with st.expander("Changes in re-uploaded spreadsheets"):
+            st.dataframe(pd.concat(details, ignore_index=True)[['Source', 'Semana', 'Nome', 'Added', 'Changed', 'Removed']])
+
+def build_artifact(job, cache, key, builder):
+    """
+    Job de exportação: gera o arquivo no ArtifactCache e devolve o tamanho em bytes. builder(job) pode
+    chamar job.raise_if_cancelled() para parar no meio; o arquivo incompleto não vai para o cache.
+    """
+    job.raise_if_cancelled()
+    return len(cache.get_or_build(key, lambda: builder(job)))
+
+def render_dashboard():
     st.set_page_config(page_title="Employee Financial Dashboard", layout="wide")
     local_css("styles.css")
 
@@ -33,24 +264,117 @@ def main():
         accept_multiple_files=True
     )
 
-    url_input = st.sidebar.text_input("Or paste the URL of an online spreadsheet")
+    url_input = st.sidebar.text_area("Or paste the URLs of online spreadsheets (one per line)")
+    sources = list(dict.fromkeys(line.strip() for line in url_input.splitlines() if line.strip()))
+    urls = [source for source in sources if source.startswith('http')]
 
-    st.title("Employee Financial Dashboard")
-
-    all_dataframes = []
-
-    if uploaded_files or url_input:
-        files_to_process = uploaded_files if uploaded_files else [url_input]
-        for file in files_to_process:
-            df = process_spreadsheet(file)
-            if not df.empty:
-                all_dataframes.append(df)
+    use_history = st.sidebar.checkbox("Load weeks from the history store")
+    save_history = st.sidebar.checkbox("Save loaded weeks to the history store")
 
-    if all_dataframes:
-        data = pd.concat(all_dataframes, ignore_index=True)
+    st.title("Employee Financial Dashboard")
 
-        data = data[data['Nome'].notna() & (data['Nome'].astype(str).str.strip() != '')]
-        data = data[~data['Cliente'].astype(str).str.strip().str.upper().isin([c.upper() for c in INVALID_CLIENTS])]
+    data = None
+
+    if use_history:
+        store = get_history_store()
+        history_weeks = store.weeks()
+        if history_weeks:
+            first_week, last_week = st.sidebar.select_slider(
+                "History range",
+                options=history_weeks,
+                value=(history_weeks[0], history_weeks[-1])
+            )
+            range_weeks = history_weeks[history_weeks.index(first_week):history_weeks.index(last_week) + 1]
+            data, dataset_key = load_history(store, range_weeks)
+        else:
+            st.sidebar.info("The history store is empty.")
+
+    load_group = None
+    if not use_history and (uploaded_files or sources):
+        paths = [source for source in sources if source not in urls]
+        load_group = (
+            'load',
+            tuple(uploaded.file_id for uploaded in uploaded_files or []),
+            tuple((path, os.path.getmtime(path)) if os.path.exists(path) else (path, None) for path in paths),
+            tuple(urls)
+        )
+    track_job_group('load_jobs', load_group, get_load_runner())
+
+    if load_group is not None:
+        runner = get_load_runner()
+        if st.sidebar.button("Reload spreadsheets"):
+            runner.forget(load_group, 'load', session_scope())
+
+        # Um envio é a mesma planilha só na mesma sessão (e na mesma posição entre os arquivos de mesmo nome):
+        # arquivos de mesmo nome em outras sessões não se misturam
+        uploads = []
+        for uploaded in uploaded_files or []:
+            occurrence = sum(name == uploaded.name for name, _, _ in uploads)
+            uploads.append((uploaded.name, ('upload', session_scope(), uploaded.name, occurrence), uploaded.getvalue()))
+
+        def submit_load():
+            return runner.submit(
+                load_group, 'load', load_sources, uploads, paths, urls, get_dataset_store(), get_ingest_pool(),
+                parser=get_incremental_parser()
+            )
+
+        # Planilhas já vistas terminam quase na hora; as demais são acompanhadas sem travar a página.
+        # Uma leitura com falha só é repetida pelo botão Reload spreadsheets
+        load_job = runner.get(load_group, 'load')
+        if load_job is None or load_job.status == 'cancelled':
+            load_job = submit_load()
+        if not load_job.wait(JOB_POLL_SECONDS) or load_job.status == 'cancelled':
+            @st.fragment(run_every=JOB_POLL_SECONDS)
+            def show_loading():
+                job = runner.get(load_group, 'load')
+                if job is None or job.done():
+                    st.rerun()
+                st.info("Loading spreadsheets…")
+                show_source_status(st, job.progress)
+
+            track_job_group('export_jobs', None, get_job_runner())
+            show_loading()
+            return
+
+        st.sidebar.markdown("**Spreadsheets**")
+        show_source_status(st.sidebar, load_job.progress)
+        if load_job.status == 'failed':
+            st.error(f"Could not load the spreadsheets: {load_job.error}")
+        elif load_job.status == 'done' and load_job.result is not None:
+            dataset_key = load_job.result
+            data = get_dataset_store().lookup(('dataset', dataset_key))
+            if data is None:
+                # Descartado pelo limite de memória do store: lê de novo (as planilhas vêm do cache)
+                runner.forget(load_group, 'load', session_scope())
+                st.rerun()
+            show_source_changes(load_job.progress)
+
+        cache_stats = get_workbook_cache().stats()
+        st.sidebar.caption(
+            f"Workbook cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+            f"{cache_stats['evictions']} evictions"
+        )
+        parser_stats = get_incremental_parser().stats()
+        st.sidebar.caption(
+            f"Incremental parser: {parser_stats['sources']} spreadsheets, {parser_stats['blocks']} blocks, "
+            f"{parser_stats['bytes'] / 1024 ** 2:,.1f} of {parser_stats['max_bytes'] / 1024 ** 2:,.0f} MB"
+        )
+        if urls:
+            fetch_stats = get_fetcher().stats()
+            st.sidebar.caption(
+                f"Downloads: {fetch_stats['downloads']} full, {fetch_stats['not_modified']} not modified"
+            )
+
+    if data is not None:
+        cube = get_cube(data, dataset_key)
+
+        if save_history and not use_history and st.session_state.get('history_saved_key') != dataset_key:
+            saved = get_history_store().ingest(data)
+            st.session_state['history_saved_key'] = dataset_key
+            st.sidebar.caption(
+                f"History: {saved['new_days']} new and {saved['changed_days']} changed employee-days saved, "
+                f"{saved['unchanged_days']} unchanged"
+            )
 
         weeks = data['Semana'].unique()
         employees = data['Nome'].unique()
@@ -59,15 +383,24 @@ def main():
         st.sidebar.header("Filter by:")
 
         selected_weeks = st.sidebar.multiselect("Select weeks for analysis", options=weeks)
-        selected_employees = st.sidebar.multiselect("Select employees:", options=employees, default=list(employees))
-        selected_categories = st.sidebar.multiselect("Select categories:", options=categories, default=list(categories))
+        selected_employees = st.sidebar.multiselect(
+            "Select employees:", options=employees, default=list(employees), key='filter_employees'
+        )
+        selected_categories = st.sidebar.multiselect(
+            "Select categories:", options=categories, default=list(categories), key='filter_categories'
+        )
+
+        with stage('filter') as record:
+            data = filter_appointments(data, selected_weeks, selected_employees, selected_categories)
+            record['rows'] = len(data)
 
-        if selected_weeks:
-            data = data[data['Semana'].isin(selected_weeks)]
-        if selected_employees:
-            data = data[data['Nome'].isin(selected_employees)]
-        if selected_categories:
-            data = data[data['Categoria'].isin(selected_categories)]
+        filter_state = {
+            'weeks': sorted(map(str, selected_weeks)),
+            'employees': sorted(map(str, selected_employees)),
+            'categories': sorted(map(str, selected_categories))
+        }
+        export_group = artifact_key('exports', dataset_key, filter_state) if not data.empty else None
+        track_job_group('export_jobs', export_group, get_job_runner())
 
         if data.empty:
             st.warning("No data found with the selected filters.")
@@ -78,75 +411,117 @@ def main():
         if st.checkbox("Show raw data"):
             st.dataframe(data)
 
-        completed_services = data[data['Realizado']]
-        not_completed = data[(data['Realizado'] == False) & (data['Cliente'].notna())]
+        if st.checkbox("Show memory report"):
+            st.dataframe(memory_report(data))
 
-        dias_trabalhados = completed_services.groupby(['Nome', 'Semana', 'Data']).size().reset_index()
-        dias_trabalhados = dias_trabalhados.groupby(['Nome', 'Semana']).size().reset_index(name='Dias Trabalhados')
+        payroll_key = artifact_key('payroll', dataset_key, filter_state)
+        payroll = get_dataset_store().get_or_build(
+            ('payroll', payroll_key),
+            lambda: compute_payroll(cube, selected_weeks, selected_employees, selected_categories)
+        )
 
-        weekly_totals = completed_services.groupby(['Nome', 'Semana', 'Categoria']).agg({
-            'Services': 'sum',
-            'Gorjeta': 'sum',
-            'Dia': 'count'
-        }).reset_index()
+        store_stats = get_dataset_store().stats()
+        st.sidebar.caption(
+            f"Shared datasets: {store_stats['items']} items, {store_stats['bytes'] / 1024 ** 2:,.1f} of "
+            f"{store_stats['max_bytes'] / 1024 ** 2:,.0f} MB, {store_stats['hits']} hits, "
+            f"{store_stats['misses']} misses, {store_stats['evictions']} evictions"
+        )
+        weekly_totals = payroll['weekly_totals']
+        allocated = payroll['allocated']
+        metrics = payroll['metrics']
 
-        weekly_totals = pd.merge(weekly_totals, dias_trabalhados, on=['Nome', 'Semana'], how='left')
+        dataset_store = get_dataset_store()
+        receipt_pool = get_receipt_pool()
 
-        weekly_totals[['Pagamento Employee', 'Lucro Empresa']] = weekly_totals.apply(
-            calcular_pagamento_semanal, axis=1, result_type='expand'
-        )
+        def get_completed_services():
+            # Rateio por atendimento só é calculado quando alguma exportação precisa dele
+            return dataset_store.get_or_build(
+                ('allocation', payroll_key), lambda: allocate_appointments(data, weekly_totals)
+            )
 
-        completed_services[['Pagamento Employee', 'Lucro Empresa']] = completed_services.apply(
-            lambda x: calcular_pagamento_individual(x, weekly_totals), axis=1, result_type='expand'
-        )
+        def build_employee_pdf(create):
+            emp_name = selected_employees[0]
+            week = selected_weeks[0]
+            services = get_completed_services()
+            emp_data = services[(services['Nome'] == emp_name) & (services['Semana'] == week)]
+            return create(emp_data, emp_name, week).output(dest='S').encode('latin-1')
+
+        def build_receipts_zip(job):
+            archive, receipt_stats = create_receipts_zip(
+                receipt_jobs(get_completed_services()), receipt_pool, cancelled=lambda: job.cancelled
+            )
+            job.raise_if_cancelled()
+            job.progress.update(receipt_stats)
+            return archive.read()
+
+        def build_winner_certificates_zip(job):
+            winners = week_winners(ranking)
+            pairs = set(zip(winners['Nome'].astype(str), winners['Semana'].astype(str)))
+            jobs = receipt_jobs(get_completed_services(), kind='employee_of_the_week', pairs=pairs)
+            archive, _ = create_receipts_zip(jobs, receipt_pool, cancelled=lambda: job.cancelled)
+            job.raise_if_cancelled()
+            return archive.read()
+
+        # Cada exportação só é gerada (em segundo plano) quando o usuário pede, e fica no ArtifactCache
+        export_builders = {
+            'csv': lambda job: write_csv(data).read(),
+            'pdf_report': lambda job: create_pdf(get_completed_services()).output(dest='S').encode('latin-1'),
+            'parquet': lambda job: write_parquet(data).read(),
+            'payroll_xlsx': lambda job: write_payroll_xlsx(weekly_totals).read(),
+            'receipts_zip': build_receipts_zip,
+            'winner_certificates': build_winner_certificates_zip
+        }
+        if len(selected_employees) == 1 and len(selected_weeks) == 1:
+            export_builders['receipt'] = lambda job: build_employee_pdf(create_employee_payment_receipt)
+            export_builders['employee_of_the_week'] = (
+                lambda job: build_employee_pdf(create_employee_of_the_week_receipt)
+            )
+
+        runner = get_job_runner()
+        artifact_cache = get_artifact_cache()
+
+        def submit_export(kind):
+            return runner.submit(
+                export_group, kind, build_artifact, artifact_cache, artifact_key(kind, dataset_key, filter_state),
+                export_builders[kind]
+            )
 
-        total_lucro = completed_services['Lucro Empresa'].sum()
+        not_completed = data[(data['Realizado'] == False) & (data['Cliente'].notna())]
 
         col1, col2, col3, col4, col5 = st.columns(5)
-        col1.metric("Completed", len(completed_services))
-        col2.metric("Not Completed", len(not_completed))
-        col3.metric("Total Services", format_currency(completed_services['Services'].sum()))
-        col4.metric("Total Tips", format_currency(completed_services['Gorjeta'].sum()))
-        col5.metric("Company Profit", format_currency(total_lucro))
+        col1.metric("Completed", metrics['Completed'])
+        col2.metric("Not Completed", metrics['Not Completed'])
+        col3.metric("Total Services", format_currency(metrics['Total Services']))
+        col4.metric("Total Tips", format_currency(metrics['Total Tips']))
+        col5.metric("Company Profit", format_currency(metrics['Company Profit']))
 
-        st.subheader("Weekly Service Evolution")
-        st.plotly_chart(plot_weekly_evolution(weekly_totals), use_container_width=True)
+        with stage('charts_weekly', rows=len(weekly_totals)):
+            st.subheader("Weekly Service Evolution")
+            st.plotly_chart(plot_weekly_evolution(weekly_totals), use_container_width=True)
 
-        st.subheader("Weekly Payment per Employee")
-        st.plotly_chart(plot_weekly_payments(weekly_totals), use_container_width=True)
+            st.subheader("Weekly Payment per Employee")
+            st.plotly_chart(plot_weekly_payments(weekly_totals), use_container_width=True)
 
         st.subheader("Summary per Employee")
 
-        emp_summary = weekly_totals.groupby(['Nome', 'Categoria']).agg({
-            'Services': 'sum',
-            'Gorjeta': 'sum',
-            'Pagamento Employee': 'sum',
-            'Lucro Empresa': 'sum',
-            'Dia': 'sum',
-            'Dias Trabalhados': 'sum'
-        }).reset_index()
-
-        emp_summary.columns = ['Employee', 'Category', 'Total Services', 'Total Tips', 'Total Payment', 'Company Profit', 'Appointments', 'Worked Days']
-
-        emp_summary['Average Service'] = emp_summary['Total Services'] / emp_summary['Appointments']
-        emp_summary['Average Tip'] = emp_summary['Total Tips'] / emp_summary['Appointments']
+        emp_summary = payroll['employee_summary'].copy()
 
         for col in ['Total Services', 'Total Tips', 'Total Payment', 'Company Profit', 'Average Service', 'Average Tip']:
             emp_summary[col] = emp_summary[col].apply(format_currency)
 
         st.dataframe(emp_summary.sort_values('Appointments', ascending=False))
 
+        ranking = weekly_ranking(allocated)
+
         if len(selected_weeks) == 1:
             week = selected_weeks[0]
-            week_data = completed_services[completed_services['Semana'] == week]
-
-            if not week_data.empty:
-                summary = week_data.groupby('Nome').agg({'Cliente': 'count'}).reset_index().rename(columns={'Cliente': 'Appointments'})
+            summary = ranking[ranking['Semana'] == week]
 
-                avg_appointments = summary['Appointments'].mean()
+            if not summary.empty:
+                avg_appointments = summary['Week Average'].iloc[0]
 
-                top_emp = summary.sort_values('Appointments', ascending=False).iloc[0]
-                low_emp = summary.sort_values('Appointments', ascending=True).iloc[0]
+                top_emp = summary[summary['Best']].iloc[0]
+                low_emp = summary[summary['Lowest']].iloc[0]
 
                 col1, col2 = st.columns(2)
 
@@ -156,7 +531,7 @@ def main():
                     st.markdown(f"""
                         - **Appointments:** {top_emp['Appointments']}  
                         - **Employee Average:** {avg_appointments:.2f}  
-                        - **Productivity:** {((top_emp['Appointments'] / avg_appointments) - 1) * 100:+.1f}%
+                        - **Productivity:** {top_emp['Productivity']:+.1f}%
                     """)
 
                 with col2:
@@ -165,12 +540,27 @@ def main():
                     st.markdown(f"""
                         - **Appointments:** {low_emp['Appointments']}  
                         - **Employee Average:** {avg_appointments:.2f}  
-                        - **Productivity:** {((low_emp['Appointments'] / avg_appointments) - 1) * 100:+.1f}%
+                        - **Productivity:** {low_emp['Productivity']:+.1f}%
                     """)
 
         else:
             st.info("Select exactly **one week** to view the employee productivity cards.")
 
+        if ranking['Semana'].nunique() > 1:
+            st.subheader("Leaderboard")
+            st.dataframe(leaderboard(ranking), hide_index=True)
+
+            with stage('charts_ranking', rows=len(ranking)):
+                st.plotly_chart(plot_rank_trend(ranking), use_container_width=True)
+
+            winners = week_winners(ranking)
+            st.dataframe(
+                winners[['Semana', 'Nome', 'Appointments', 'Week Average', 'Productivity']].rename(
+                    columns={'Semana': 'Week', 'Nome': 'Employee of the Week'}
+                ),
+                hide_index=True
+            )
+
         st.subheader("Appointments Not Completed")
         if not not_completed.empty:
             st.warning(f"{len(not_completed)} appointments not completed.")
@@ -180,65 +570,227 @@ def main():
 
         st.subheader("Payment Method Summary")
 
-        valid_payments = completed_services[completed_services['Pagamento'].isin(FORMAS_PAGAMENTO_VALIDAS)]
-
-        if not valid_payments.empty:
-            payment_summary = valid_payments.groupby('Pagamento').agg({
-                'Services': 'sum',
-                'Gorjeta': 'sum',
-                'Cliente': 'count'
-            }).reset_index().rename(columns={'Cliente': 'Usage Count'})
-
-            payment_summary['Total'] = payment_summary['Services'] + payment_summary['Gorjeta']
-            payment_summary['Usage Percentage'] = (payment_summary['Usage Count'] / payment_summary['Usage Count'].sum() * 100).round(2)
+        payment_summary = payroll['payment_summary']
 
+        if not payment_summary.empty:
             st.dataframe(payment_summary)
 
-            st.plotly_chart(plot_payment_methods_total(payment_summary), use_container_width=True)
-            st.plotly_chart(plot_payment_methods_usage(payment_summary), use_container_width=True)
+            with stage('charts_payment', rows=len(payment_summary)):
+                st.plotly_chart(plot_payment_methods_total(payment_summary), use_container_width=True)
+                st.plotly_chart(plot_payment_methods_usage(payment_summary), use_container_width=True)
+
+        st.subheader("Payment Reconciliation")
+
+        with st.expander("Reconcile payments against bank or processor statements"):
+            statements = st.file_uploader(
+                "Upload statement CSVs", type=['csv'], accept_multiple_files=True, key='statements'
+            )
+            if statements:
+                reconciliation_key = artifact_key(
+                    'reconciliation', dataset_key, {**filter_state, 'statements': [f.file_id for f in statements]}
+                )
+                try:
+                    reconciliation = get_dataset_store().get_or_build(
+                        ('reconciliation', reconciliation_key),
+                        lambda: reconcile_payments(
+                            data, load_statements([f.getvalue() for f in statements], [f.name for f in statements])
+                        )
+                    )
+                except ValueError as error:
+                    st.error(f"Could not read the statements: {error}")
+                else:
+                    summary = reconciliation['summary']
+                    col1, col2, col3, col4, col5 = st.columns(5)
+                    matched = summary['matched_by_id'] + summary['matched_by_amount_date']
+                    col1.metric("Matched", f"{matched} / {summary['appointments']}")
+                    col2.metric("Duplicates", summary['duplicate_transactions'])
+                    col3.metric("Amount Mismatches", summary['amount_mismatches'])
+                    col4.metric("Missing Payments", summary['missing_payments'])
+                    col5.metric("Unmatched Transactions", summary['unmatched_transactions'])
+                    st.caption(
+                        f"{summary['matched_by_id']} matched by payment ID and {summary['matched_by_amount_date']} by "
+                        f"amount and date; {summary['missing_verified']} missing payments are marked as verified; "
+                        f"{summary['unknown_methods']} completed appointments have a blank or unknown payment method "
+                        f"({summary['unknown_methods_missing']} of them with no matching transaction); "
+                        f"{summary['skipped_appointments']} {'/'.join(RECONCILIATION_SKIP_METHODS)} appointments and "
+                        f"{summary['outside_period']} transactions outside the selected weeks were skipped."
+                    )
+
+                    exceptions = reconciliation['exceptions']
+                    if exceptions.empty:
+                        st.success("Every payment matched the statements.")
+                    else:
+                        st.dataframe(exceptions, hide_index=True)
+                        st.download_button(
+                            "Download Exception Report (CSV)",
+                            data=write_csv(exceptions).read(),
+                            file_name="reconciliation_exceptions.csv",
+                            mime="text/csv",
+                            key='download_reconciliation'
+                        )
+
+        st.subheader("What-if Simulator")
+
+        with st.expander("Simulate commission and minimum changes"):
+            axes = {}
+            duplicated = False
+            for i, (default_category, default_rule) in enumerate([('Employee', 'comissao'), ('Started', 'minimo_diario')]):
+                col1, col2, col3, col4, col5 = st.columns(5)
+                category = col1.selectbox(
+                    "Category", list(REGRAS_PAGAMENTO), index=list(REGRAS_PAGAMENTO).index(default_category),
+                    key=f'sim_category_{i}'
+                )
+                rule = col2.selectbox(
+                    "Rule", CAMPOS_SIMULAVEIS, index=CAMPOS_SIMULAVEIS.index(default_rule), key=f'sim_rule_{i}'
+                )
+                current = float(REGRAS_PAGAMENTO[category][rule])
+                default_step = 0.01 if rule == 'comissao' else 5.0
+                start = col3.number_input("From", value=current, step=default_step, key=f'sim_start_{i}_{category}_{rule}')
+                stop = col4.number_input(
+                    "To", value=current + 10 * default_step, step=default_step, key=f'sim_stop_{i}_{category}_{rule}'
+                )
+                step = col5.number_input(
+                    "Step", value=default_step, min_value=default_step / 10, step=default_step,
+                    key=f'sim_step_{i}_{category}_{rule}'
+                )
+                duplicated = duplicated or (category, rule) in axes
+                axes[(category, rule)] = (start, stop, step)
+
+            # Só (início, fim, passo) de cada eixo: os valores são gerados depois de conferir o limite de cenários
+            total = math.prod(parameter_count(*axis) for axis in axes.values())
+            if duplicated:
+                st.error("Both rows simulate the same category and rule; choose a different rule or category.")
+            elif total > SIMULATION_MAX_SCENARIOS:
+                st.error(
+                    f"{total:,} scenarios exceed the limit of {SIMULATION_MAX_SCENARIOS:,}; "
+                    "use larger steps or narrower ranges."
+                )
+
+            simulation_key = artifact_key('simulation', dataset_key, {**filter_state, 'grid': repr(axes)})
+            if st.button("Run simulation", disabled=duplicated or total > SIMULATION_MAX_SCENARIOS):
+                scenarios = build_scenarios({key: parameter_range(*axis) for key, axis in axes.items()})
+                results = simulate_payroll(weekly_totals, scenarios)
+                st.session_state['simulation'] = (simulation_key, results, scenario_summary(scenarios, results, weekly_totals))
+
+            simulation = st.session_state.get('simulation')
+            if simulation and simulation[0] == simulation_key:
+                _, results, summary = simulation
+                st.caption(f"{len(summary)} scenarios x {results['Nome'].nunique()} employees")
+                st.dataframe(summary.sort_values('Lucro Empresa', ascending=False), hide_index=True)
+
+                scenario = st.selectbox("Scenario details", summary['Scenario'], key='sim_scenario')
+                st.dataframe(results[results['Scenario'] == scenario].drop(columns='Scenario'), hide_index=True)
 
         st.subheader("Export Data")
 
-        col1, col2, col3, col4 = st.columns(4)
-
-        with col1:
-            csv = data.to_csv(index=False).encode('utf-8')
-            st.download_button("Download CSV", data=csv, file_name="employee_services.csv", mime="text/csv")
-
-        with col2:
-            pdf = create_pdf(completed_services)
-            pdf_output = pdf.output(dest='S').encode('latin-1')
-
-            st.download_button("Download PDF Report", data=pdf_output, file_name="general_report.pdf", mime="application/pdf")
-
-        with col3:
-            if len(selected_employees) == 1 and len(selected_weeks) == 1:
-                emp_name = selected_employees[0]
-                week = selected_weeks[0]
-                emp_data = completed_services[(completed_services['Nome'] == emp_name) & (completed_services['Semana'] == week)]
-
-                pdf = create_employee_payment_receipt(emp_data, emp_name, week)
-                pdf_output = pdf.output(dest='S').encode('latin-1')
-
-                st.download_button(f"Receipt {emp_name}", data=pdf_output, file_name=f"receipt_{emp_name}_{week}.pdf", mime="application/pdf")
-            else:
-                st.info("Select exactly 1 employee and 1 week to generate the receipt.")
-
-        with col4:
-            if len(selected_employees) == 1 and len(selected_weeks) == 1:
-                emp_name = selected_employees[0]
-                week = selected_weeks[0]
-                emp_data = completed_services[(completed_services['Nome'] == emp_name) & (completed_services['Semana'] == week)]
-
-                pdf = create_employee_of_the_week_receipt(emp_data, emp_name, week)
-                pdf_output = pdf.output(dest='S').encode('latin-1')
-
-                st.download_button(f"Employee of the Week {emp_name}", data=pdf_output, file_name=f"employee_of_the_week_{emp_name}_{week}.pdf", mime="application/pdf")
-            else:
-                st.info("Select exactly 1 employee and 1 week to generate the certificate.")
+        def export_button(kind, label, file_name, mime):
+            content = artifact_cache.get(artifact_key(kind, dataset_key, filter_state))
+            if content is not None:
+                st.download_button(
+                    f"Download {label}", data=content, file_name=file_name, mime=mime, key=f'download_{kind}'
+                )
+                return
+
+            job = runner.get(export_group, kind)
+            if job is not None and not job.done():
+                st.button(f"Preparing {label}…", disabled=True, key=f'prepare_{kind}')
+                return
+            if job is not None and job.status == 'failed':
+                st.error(f"Could not build {label}: {job.error}")
+            # Sem job, com falha, cancelado ou com o arquivo já descartado pelo limite do ArtifactCache
+            if st.button(f"Prepare {label}", key=f'prepare_{kind}'):
+                runner.forget(export_group, kind, session_scope())
+                submit_export(kind)
+                st.rerun()
+
+        def export_section(polling):
+            col1, col2, col3, col4 = st.columns(4)
+
+            with col1:
+                export_button('csv', "CSV", "employee_services.csv", "text/csv")
+
+            with col2:
+                export_button('pdf_report', "PDF Report", "general_report.pdf", "application/pdf")
+
+            with col3:
+                if len(selected_employees) == 1 and len(selected_weeks) == 1:
+                    emp_name = selected_employees[0]
+                    week = selected_weeks[0]
+                    export_button('receipt', f"Receipt {emp_name}", f"receipt_{emp_name}_{week}.pdf", "application/pdf")
+                else:
+                    st.info("Select exactly 1 employee and 1 week to generate the receipt.")
+
+            with col4:
+                if len(selected_employees) == 1 and len(selected_weeks) == 1:
+                    emp_name = selected_employees[0]
+                    week = selected_weeks[0]
+                    export_button(
+                        'employee_of_the_week', f"Employee of the Week {emp_name}",
+                        f"employee_of_the_week_{emp_name}_{week}.pdf", "application/pdf"
+                    )
+                else:
+                    st.info("Select exactly 1 employee and 1 week to generate the certificate.")
+
+            col5, col6 = st.columns(2)
+
+            with col5:
+                export_button('parquet', "Parquet", "employee_services.parquet", "application/octet-stream")
+
+            with col6:
+                export_button(
+                    'payroll_xlsx', "Payroll (XLSX)", "payroll.xlsx",
+                    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                )
+
+            st.subheader("Bulk Payroll Receipts")
+
+            export_button('receipts_zip', "Receipts (ZIP)", "payroll_receipts.zip", "application/zip")
+            receipts_job = runner.get(export_group, 'receipts_zip')
+            if receipts_job is not None and receipts_job.status == 'done' and receipts_job.progress:
+                receipt_stats = receipts_job.progress
+                st.caption(
+                    f"{receipt_stats['receipts']} receipts in {receipt_stats['seconds']:.2f}s "
+                    f"({receipt_stats['receipts_per_second']:.1f} receipts/s)"
+                )
+
+            export_button(
+                'winner_certificates', "Employee of the Week Certificates (ZIP)",
+                "employee_of_the_week_certificates.zip", "application/zip"
+            )
+
+            export_jobs = runner.jobs(export_group)
+            with st.expander("Background jobs"):
+                st.dataframe(pd.DataFrame([job.info() for job in export_jobs]), hide_index=True)
+
+            # Com tudo pronto, uma execução completa desliga a atualização automática da seção
+            if polling and all(job.done() for job in export_jobs):
+                st.rerun()
+
+        polling = any(not job.done() for job in runner.jobs(export_group))
+        st.fragment(export_section, run_every=JOB_POLL_SECONDS if polling else None)(polling)
 
     else:
+        track_job_group('export_jobs', None, get_job_runner())
         st.warning("No spreadsheet loaded. Please upload a spreadsheet to start.")
 
+def render_performance_panel(profiler):
+    with st.sidebar.expander("Performance", expanded=profiler is not None):
+        st.checkbox("Measure pipeline stages", value=PROFILE_ENABLED, key='profile_enabled')
+        st.checkbox("Track peak memory (slower)", value=PROFILE_MEMORY, key='profile_memory')
+        if profiler is not None and profiler.records:
+            st.dataframe(profiler.report(), hide_index=True)
+            st.caption(f"Run {profiler.run_id}: {sum(profiler.timings().values()):.3f}s measured")
+
+def main():
+    profiler = None
+    if st.session_state.get('profile_enabled', PROFILE_ENABLED):
+        profiler = Profiler(memory=st.session_state.get('profile_memory', PROFILE_MEMORY))
+
+    with profiler.activate() if profiler is not None else nullcontext():
+        try:
+            render_dashboard()
+        finally:
+            render_performance_panel(profiler)
+
 if __name__ == "__main__":
     main()
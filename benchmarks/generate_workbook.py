@@ -0,0 +1,116 @@
+import argparse
+import io
+import random
+from datetime import datetime, timedelta
+
+from openpyxl import Workbook
+
+from modules.config import FORMAS_PAGAMENTO_VALIDAS, REGRAS_PAGAMENTO
+
+CATEGORIAS = list(REGRAS_PAGAMENTO)
+COLUNAS_DIA = ['CLIENT', 'DATE', 'SERVICE', 'TIP', 'PRODUCTS', 'PAYMENT', 'ID', 'VERIFIED', 'NOTES']
+ORIGENS = ['Google', 'Referral', 'Instagram', 'Walk-in']
+
+
+def _day_cells(rnd, date):
+    """As 9 células de um dia: vazio, agendado sem serviço, serviço inválido ou atendimento concluído"""
+    sorteio = rnd.random()
+    cliente = f'Client {rnd.randint(1, 500)}'
+    if sorteio < 0.15:
+        return [None] * len(COLUNAS_DIA)
+    if sorteio < 0.25:
+        return [cliente, date] + [None] * 7
+    if sorteio < 0.27:
+        return [cliente, date, 'canceled'] + [None] * 6
+    return [
+        cliente,
+        date,
+        round(rnd.uniform(50, 400), 2),
+        rnd.choice([None, 0, 10, 15, 20.5]),
+        rnd.choice([None, None, 5, 12]),
+        rnd.choice(FORMAS_PAGAMENTO_VALIDAS + ['Venmo', None]),
+        rnd.choice([None, rnd.randint(10000, 99999), f'TX{rnd.randint(1, 9999)}']),
+        rnd.choice([None, True, 'x']),
+        None
+    ]
+
+
+def build_workbook(employees=10, weeks=4, appointments_per_day=4, seed=0, first_day=datetime(2024, 1, 7)):
+    """Planilha no layout das abas WEEK: bloco NAME:/From:, cabeçalho Schedule e 7 dias de 9 colunas"""
+    rnd = random.Random(seed)
+    wb = Workbook()
+    wb.active.title = 'Summary'
+    wb.active.append(['Generated workbook', employees, weeks, appointments_per_day])
+
+    for week in range(weeks):
+        ws = wb.create_sheet(f'WEEK {week + 1}')
+        ws.append(['Weekly schedule'])
+        ws.append([])
+        for emp in range(employees):
+            ws.append([None, 'NAME:', f'Employee {emp + 1:03d}', 'CATEGORY:', CATEGORIAS[emp % len(CATEGORIAS)],
+                       'From:', rnd.choice(ORIGENS)])
+            ws.append(['Schedule'] + COLUNAS_DIA * 7)
+            for slot in range(appointments_per_day):
+                row = [slot + 1]
+                for day in range(7):
+                    row += _day_cells(rnd, first_day + timedelta(days=7 * week + day))
+                ws.append(row)
+            ws.append([None, 'TOTAL:'] + [None] * 8 + ['SERVICES IN:'])
+    return wb
+
+
+def workbook_bytes(**kwargs):
+    buffer = io.BytesIO()
+    build_workbook(**kwargs).save(buffer)
+    return buffer.getvalue()
+
+
+def build_statement(appointments, seed=0, missing=0.02, duplicates=0.005, mismatches=0.01, extra=0.01):
+    """
+    Extrato da processadora (CSV) para os atendimentos concluídos, com uma fração de pagamentos faltando,
+    lançados em dobro, com valor diferente e lançamentos sem atendimento, para testar a conciliação
+    """
+    import numpy as np
+    import pandas as pd
+
+    rnd = np.random.default_rng(seed)
+    paid = appointments[appointments['Realizado'] & appointments['Pagamento'].notna()]
+    paid = paid[paid['Pagamento'].astype(object) != 'Cash']
+    amount = (paid['Services'].fillna(0) + paid['Gorjeta'].fillna(0)).round(2).to_numpy()
+    dates = pd.to_datetime(paid['Data']).to_numpy() + rnd.integers(0, 3, len(paid)).astype('timedelta64[D]')
+    statement = pd.DataFrame({
+        'Transaction ID': paid['ID Pagamento'].astype(object).to_numpy(),
+        'Date': pd.to_datetime(dates).strftime('%m/%d/%Y'),
+        'Amount': amount,
+        'Payment Method': paid['Pagamento'].astype(object).to_numpy()
+    })
+
+    statement = statement[rnd.random(len(statement)) >= missing]
+    changed = rnd.random(len(statement)) < mismatches
+    statement.loc[changed, 'Amount'] = (statement.loc[changed, 'Amount'] + rnd.choice([-10, 5, 20], changed.sum())).round(2)
+    doubled = statement[rnd.random(len(statement)) < duplicates]
+    extras = statement.sample(frac=extra, random_state=seed).assign(
+        **{'Transaction ID': None, 'Amount': lambda df: (df['Amount'] + 0.37).round(2)}
+    )
+    statement = pd.concat([statement, doubled, extras]).sample(frac=1, random_state=seed)
+    statement['Amount'] = statement['Amount'].map('${:,.2f}'.format)
+    return statement.reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic WEEK workbook for benchmarks.")
+    parser.add_argument('output', help="Destination .xlsx file")
+    parser.add_argument('--employees', type=int, default=10)
+    parser.add_argument('--weeks', type=int, default=4)
+    parser.add_argument('--appointments-per-day', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--statement', help="Also write a processor statement CSV for the workbook's payments")
+    args = parser.parse_args()
+    build_workbook(args.employees, args.weeks, args.appointments_per_day, args.seed).save(args.output)
+    if args.statement:
+        from modules.data_processor import process_spreadsheet
+        build_statement(process_spreadsheet(args.output), args.seed).to_csv(args.statement, index=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+from benchmarks.generate_workbook import build_statement, workbook_bytes
+from modules.calculations import calcular_pagamento_semanal, calcular_pagamento_individual
+from modules.cube import build_cube
+from modules.data_processor import process_spreadsheet
+from modules.pdf_generator import create_pdf, receipt_jobs, create_receipts_zip
+from modules.pipeline import clean_appointments, compute_payroll, allocate_appointments
+from modules.reconciliation import load_statement, reconcile_payments
+from modules.simulation import build_scenarios, parameter_range, simulate_payroll
+from modules.visualization import (
+    plot_weekly_evolution,
+    plot_weekly_payments,
+    plot_payment_methods_total,
+    plot_payment_methods_usage,
+    clear_figure_cache
+)
+
+# (employees, weeks, appointments_per_day)
+ESCALAS = {
+    'small': (6, 2, 3),
+    'medium': (25, 8, 5),
+    'large': (60, 26, 6),
+}
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+# As versões linha a linha (apply) ficam de fora acima deste número de linhas
+ROWWISE_MAX_ROWS = 3000
+
+
+def measure(func, repeat=1):
+    """Melhor tempo entre as repetições e pico de memória alocada (tracemalloc, numa execução à parte)"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    # tracemalloc deixa o código bem mais lento, por isso não entra na medição de tempo
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, {'seconds': round(best, 6), 'peak_mb': round(peak / 1024 ** 2, 3)}
+
+
+def run_scale(name, employees, weeks, appointments_per_day, repeat=1):
+    content = workbook_bytes(employees=employees, weeks=weeks, appointments_per_day=appointments_per_day)
+    stages = {}
+
+    def stage(stage_name, func, rows=None):
+        result, stats = measure(func, repeat)
+        if rows is not None:
+            stats['rows'] = rows
+        stages[stage_name] = stats
+        print(f"  {stage_name:<28} {stats['seconds']:9.4f}s {stats['peak_mb']:9.2f} MB", file=sys.stderr)
+        return result
+
+    print(f"{name}: {employees} employees x {weeks} weeks x {appointments_per_day}/day", file=sys.stderr)
+    data = stage('parse', lambda: process_spreadsheet(io.BytesIO(content)))
+    data = clean_appointments(data)
+    cube = stage('cube', lambda: build_cube(data), rows=len(data))
+    payroll = stage('payroll', lambda: compute_payroll(cube), rows=len(cube))
+    weekly_totals = payroll['weekly_totals']
+    completed_services = stage('allocation', lambda: allocate_appointments(data, weekly_totals), rows=len(data))
+
+    statement_csv = build_statement(data).to_csv(index=False).encode()
+    statement = stage('statement_load', lambda: load_statement(statement_csv, 'statement.csv'))
+    stage('reconciliation', lambda: reconcile_payments(data, statement), rows=len(statement))
+
+    if len(weekly_totals) <= ROWWISE_MAX_ROWS:
+        stage('payroll_weekly_rowwise', lambda: weekly_totals.apply(calcular_pagamento_semanal, axis=1),
+              rows=len(weekly_totals))
+    if len(completed_services) <= ROWWISE_MAX_ROWS:
+        stage('payroll_individual_rowwise',
+              lambda: completed_services.apply(lambda row: calcular_pagamento_individual(row, weekly_totals), axis=1),
+              rows=len(completed_services))
+
+    scenarios = build_scenarios({
+        ('Employee', 'comissao'): parameter_range(0.15, 0.2745, 0.0025),
+        ('Started', 'minimo_diario'): parameter_range(100, 222.5, 2.5)
+    })
+    stage('simulation', lambda: simulate_payroll(weekly_totals, scenarios), rows=len(scenarios) * len(weekly_totals))
+
+    def charts():
+        # As figuras são memorizadas por fingerprint; sem limpar, as repetições medem só o cache
+        clear_figure_cache()
+        return [
+            plot_weekly_evolution(weekly_totals),
+            plot_weekly_payments(weekly_totals),
+            plot_payment_methods_total(payroll['payment_summary']),
+            plot_payment_methods_usage(payroll['payment_summary'])
+        ]
+
+    stage('charts', charts, rows=len(weekly_totals))
+    stage('pdf_report', lambda: create_pdf(completed_services).output(dest='S'), rows=len(completed_services))
+    jobs = receipt_jobs(completed_services)
+    stage('pdf_receipts', lambda: create_receipts_zip(jobs), rows=len(jobs))
+
+    return {
+        'employees': employees,
+        'weeks': weeks,
+        'appointments_per_day': appointments_per_day,
+        'workbook_bytes': len(content),
+        'appointments': len(data),
+        'stages': stages
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline):
+    """Razão tempo atual / tempo de referência por escala e etapa (> 1 = mais lento)"""
+    linhas = []
+    for scale, result in current['scales'].items():
+        base_stages = baseline.get('scales', {}).get(scale, {}).get('stages', {})
+        for stage_name, stats in result['stages'].items():
+            base = base_stages.get(stage_name)
+            if base and base['seconds']:
+                linhas.append({
+                    'Scale': scale,
+                    'Stage': stage_name,
+                    'Baseline (s)': base['seconds'],
+                    'Current (s)': stats['seconds'],
+                    'Ratio': round(stats['seconds'] / base['seconds'], 3)
+                })
+    return pd.DataFrame(linhas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time and memory-profile the payroll pipeline at several scales.")
+    parser.add_argument('--scales', nargs='+', default=['small', 'medium'], choices=list(ESCALAS))
+    parser.add_argument('--repeat', type=int, default=1, help="Runs per stage; the best time is kept")
+    parser.add_argument('-o', '--output', help="Result JSON (default: benchmarks/results/<commit>.json)")
+    parser.add_argument('--compare', help="Previous result JSON to compare against")
+    args = parser.parse_args()
+
+    commit = _git_commit()
+    results = {
+        'commit': commit,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'scales': {}
+    }
+    for scale in args.scales:
+        results['scales'][scale] = run_scale(scale, *ESCALAS[scale], repeat=args.repeat)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit or 'results'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            print(compare(results, json.load(f)).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
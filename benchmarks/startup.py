@@ -0,0 +1,219 @@
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime
+
+import pandas as pd
+
+from benchmarks.run_benchmarks import RESULTS_DIR, _git_commit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Dependências que os módulos só carregam quando a seção é usada (gráficos, PDF, HTTP, leitura de planilhas)
+LAZY_MODULES = ['plotly.express', 'fpdf', 'requests', 'openpyxl']
+STARTUP_TIMEOUT = 120
+
+
+def parse_importtime(stderr):
+    """Linhas de `python -X importtime` -> uma entrada por módulo (tempo próprio, acumulado e profundidade)"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        entries.append({
+            'module': name.strip(),
+            'depth': (len(name) - len(name.lstrip()) - 1) // 2,
+            'self_ms': int(self_us) / 1000,
+            'cumulative_ms': int(cumulative_us) / 1000
+        })
+    return entries
+
+
+def _importtime(code):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return parse_importtime(result.stderr)
+
+
+def import_report(target='app', top=15):
+    """Tempo de `import target` num interpretador novo: total, pacotes e módulos mais caros"""
+    entries = _importtime(f'import {target}')
+    frame = pd.DataFrame(entries)
+    frame['package'] = frame['module'].str.split('.').str[0]
+    packages = frame.groupby('package')['self_ms'].sum().sort_values(ascending=False)
+    modules = frame.sort_values('cumulative_ms', ascending=False)
+    loaded = set(frame['module'])
+    return {
+        'total_ms': round(frame.loc[frame['module'] == target, 'cumulative_ms'].max(), 3),
+        'packages': [{'package': name, 'self_ms': round(ms, 3)} for name, ms in packages.head(top).items()],
+        'modules': modules.head(top)[['module', 'self_ms', 'cumulative_ms']].round(3).to_dict('records'),
+        'lazy_loaded_at_startup': [name for name in LAZY_MODULES if name in loaded]
+    }
+
+
+def lazy_import_costs(target='app'):
+    """Quanto cada dependência adiada custa no primeiro uso, com o app já importado"""
+    costs = {}
+    for name in LAZY_MODULES:
+        entries = _importtime(f'import {target}; import {name}')
+        own = [entry for entry in entries if entry['module'] == name]
+        costs[name] = round(min(own, key=lambda entry: entry['depth'])['cumulative_ms'], 3) if own else 0.0
+    return costs
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def first_render(command, cwd, timeout=STARTUP_TIMEOUT):
+    """
+    Sobe o servidor (streamlit run ou o executável) e abre uma sessão pelo websocket, como o navegador.
+    Devolve os segundos desde o início do processo até o servidor responder, o primeiro elemento
+    chegar (first_delta) e o script terminar a primeira execução (script_finished).
+    """
+    try:
+        from websockets.sync.client import connect
+    except ImportError:
+        raise SystemExit("The first-render benchmark needs the 'websockets' package (pip install websockets)")
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+    port = _free_port()
+    env = dict(
+        os.environ,
+        STREAMLIT_SERVER_PORT=str(port),
+        STREAMLIT_SERVER_HEADLESS='true',
+        STREAMLIT_BROWSER_GATHER_USAGE_STATS='false'
+    )
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = start + timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"{command[0]} exited with code {process.returncode} before serving")
+            try:
+                urllib.request.urlopen(f'http://127.0.0.1:{port}/_stcore/health', timeout=1).read()
+                break
+            except OSError:
+                if time.perf_counter() > deadline:
+                    raise TimeoutError(f"server did not answer within {timeout}s")
+                time.sleep(0.05)
+        timings = {'server_ready_s': time.perf_counter() - start, 'first_delta_s': None}
+
+        with connect(f'ws://127.0.0.1:{port}/_stcore/stream', max_size=None) as conn:
+            rerun = BackMsg()
+            rerun.rerun_script.query_string = ''
+            conn.send(rerun.SerializeToString())
+            while True:
+                message = ForwardMsg()
+                message.ParseFromString(conn.recv(timeout=max(deadline - time.perf_counter(), 1)))
+                kind = message.WhichOneof('type')
+                if kind == 'delta' and timings['first_delta_s'] is None:
+                    timings['first_delta_s'] = time.perf_counter() - start
+                if kind == 'script_finished':
+                    timings['script_finished_s'] = time.perf_counter() - start
+                    break
+        return {name: round(seconds, 4) for name, seconds in timings.items()}
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def measure_startup(command, cwd, runs):
+    """Várias partidas a frio; a melhor de cada medida vai em 'best'"""
+    samples = [first_render(command, cwd) for _ in range(runs)]
+    best = {name: min(sample[name] for sample in samples) for name in samples[0]}
+    return {'command': command, 'runs': samples, 'best': best}
+
+
+def compare(current, baseline):
+    """Razão atual / referência para o import do app e para cada medida de partida (> 1 = mais lento)"""
+    linhas = []
+    base_import = baseline.get('imports', {}).get('total_ms')
+    if base_import:
+        linhas.append({
+            'Target': 'import app',
+            'Measure': 'total_ms',
+            'Baseline': base_import,
+            'Current': current['imports']['total_ms'],
+            'Ratio': round(current['imports']['total_ms'] / base_import, 3)
+        })
+    for target, result in current['startup'].items():
+        base = baseline.get('startup', {}).get(target, {}).get('best', {})
+        for measure, seconds in result['best'].items():
+            if base.get(measure):
+                linhas.append({
+                    'Target': target,
+                    'Measure': measure,
+                    'Baseline': base[measure],
+                    'Current': seconds,
+                    'Ratio': round(seconds / base[measure], 3)
+                })
+    return pd.DataFrame(linhas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time and time-to-first-render of the dashboard.")
+    parser.add_argument('--runs', type=int, default=3, help="Cold starts per target; the best time is kept")
+    parser.add_argument('--frozen', help="Path of the PyInstaller executable (dist/run_app/run_app) to measure too")
+    parser.add_argument('--top', type=int, default=15, help="Modules and packages listed in the import report")
+    parser.add_argument('--imports-only', action='store_true', help="Skip the server start-up measurements")
+    parser.add_argument('-o', '--output', help="Result JSON (default: benchmarks/results/startup-<commit>.json)")
+    parser.add_argument('--compare', help="Previous result JSON to compare against")
+    args = parser.parse_args()
+
+    commit = _git_commit()
+    results = {
+        'commit': commit,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'imports': import_report(top=args.top),
+        'lazy_imports_ms': lazy_import_costs(),
+        'startup': {}
+    }
+
+    imports = results['imports']
+    print(f"import app: {imports['total_ms']:.1f} ms")
+    print(pd.DataFrame(imports['packages']).to_string(index=False))
+    print(pd.DataFrame(imports['modules']).to_string(index=False))
+    print(f"Loaded on first use (ms): {results['lazy_imports_ms']}")
+    if imports['lazy_loaded_at_startup']:
+        print(f"Warning: imported at startup: {imports['lazy_loaded_at_startup']}")
+
+    if not args.imports_only:
+        results['startup']['streamlit_run'] = measure_startup(
+            [sys.executable, '-m', 'streamlit', 'run', 'app.py'], ROOT, args.runs
+        )
+        if args.frozen:
+            frozen = os.path.abspath(args.frozen)
+            results['startup']['frozen'] = measure_startup([frozen], os.path.dirname(frozen), args.runs)
+        for target, result in results['startup'].items():
+            print(f"{target}: {result['best']}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"startup-{commit or 'results'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            print(compare(results, json.load(f)).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
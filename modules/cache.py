@@ -0,0 +1,224 @@
+import hashlib
+import os
+import sys
+import threading
+import uuid
+from collections import OrderedDict
+
+import pandas as pd
+
+from .config import CACHE_DIR, CACHE_MAX_BYTES, DATASET_STORE_MAX_BYTES
+
+
+def workbook_key(content, parser_version):
+    """Chave do cache: hash do conteúdo da planilha + versão do parser"""
+    digest = hashlib.sha256(content)
+    digest.update(f'parser-{parser_version}'.encode())
+    return digest.hexdigest()
+
+
+def _storable(df):
+    """Colunas object com tipos misturados (ex.: ID Pagamento) viram texto para caber no Parquet"""
+    mixed = [col for col in df.columns[df.dtypes == object] if df[col].dropna().map(type).nunique() > 1]
+    if not mixed:
+        return df
+    df = df.copy()
+    for col in mixed:
+        df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+
+class WorkbookCache:
+    """
+    Planilhas processadas guardadas em Parquet no disco, com limite de tamanho e descarte LRU. O limite
+    vale para tudo o que está dentro do diretório, inclusive as cópias baixadas pelo SpreadsheetFetcher
+    (FETCH_CACHE_DIR, um subdiretório): cada arquivo sai junto com os outros de mesma chave (ex.: .xlsx e .json).
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.parquet')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            df = pd.read_parquet(path)
+            os.utime(path)
+        except (FileNotFoundError, OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return df
+
+    def put(self, key, df):
+        """
+        Grava o DataFrame e o devolve. Os atendimentos já chegam no APPOINTMENT_SCHEMA, que o Parquet
+        preserva: um get futuro retorna o mesmo conteúdo, sem precisar reler o arquivo agora.
+        """
+        path = self._path(key)
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        try:
+            _storable(df).to_parquet(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._evict()
+        return df
+
+    def _entries(self):
+        """Arquivos do diretório (e subdiretórios) agrupados pela chave: [(último uso, bytes, [caminhos])]"""
+        groups = {}
+        for dirpath, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith('.tmp'):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                group = groups.setdefault(os.path.join(dirpath, name.split('.', 1)[0]), [0, 0, []])
+                group[0] = max(group[0], stat.st_mtime)
+                group[1] += stat.st_size
+                group[2].append(path)
+        return [tuple(group) for group in groups.values()]
+
+    def _evict(self):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, paths in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            for path in paths:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total -= size
+            self.evictions += 1
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+
+def _nbytes(value):
+    """Memória ocupada por um DataFrame/Series ou por um dicionário/lista deles"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, dict):
+        return sum(_nbytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_nbytes(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class SharedDatasetStore:
+    """
+    Datasets em memória compartilhados entre as sessões do processo, um objeto por chave de conteúdo,
+    com limite total de memória e descarte LRU. Os objetos devolvidos são compartilhados: quem precisar
+    alterá-los deve trabalhar numa cópia.
+
+    get/put seguem a interface do WorkbookCache (e podem usar um como segunda camada, no disco);
+    get_or_build guarda resultados derivados (cubo, folha) e garante um único cálculo por chave.
+    """
+
+    def __init__(self, max_bytes=DATASET_STORE_MAX_BYTES, backing=None):
+        self.max_bytes = max_bytes
+        self.backing = backing
+        self._items = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._building = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _lookup(self, key):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            return None
+
+    def _store(self, key, value):
+        """Guarda value (ou devolve o objeto já guardado com a mesma chave)"""
+        size = _nbytes(value)
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+            self._items[key] = value
+            self._sizes[key] = size
+            self._bytes += size
+            self._evict()
+            return value
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and len(self._items) > 1:
+            key, _ = self._items.popitem(last=False)
+            self._bytes -= self._sizes.pop(key)
+            self.evictions += 1
+
+    def lookup(self, key):
+        """Só a memória: None se a chave nunca foi guardada ou já foi descartada pelo limite"""
+        return self._lookup(key)
+
+    def get(self, key):
+        value = self._lookup(key)
+        if value is None and self.backing is not None:
+            value = self.backing.get(key)
+            if value is not None:
+                value = self._store(key, value)
+        return value
+
+    def put(self, key, value):
+        if self.backing is not None:
+            value = self.backing.put(key, value)
+        return self._store(key, value)
+
+    def share(self, key, value):
+        """Troca value pelo objeto já compartilhado com a mesma chave, se houver (deduplicação)"""
+        return self._store(key, value)
+
+    def get_or_build(self, key, builder):
+        value = self._lookup(key)
+        if value is not None:
+            return value
+        # Sessões pedindo a mesma chave ao mesmo tempo esperam um único builder()
+        with self._lock:
+            key_lock = self._building.setdefault(key, threading.Lock())
+        try:
+            with key_lock:
+                value = self._lookup(key)
+                if value is None:
+                    value = self._store(key, builder())
+        finally:
+            # Também quando builder() falha: a próxima chamada tenta de novo com um lock novo
+            with self._lock:
+                self._building.pop(key, None)
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {
+                'items': len(self._items),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
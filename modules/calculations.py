@@ -1,5 +1,8 @@
+import numpy as np
 import pandas as pd
 
+from .config import REGRAS_PAGAMENTO, REGRA_PADRAO
+
 
 def calcular_pagamento_individual(row, weekly_data):
     emp_week_data = weekly_data[
@@ -27,31 +30,81 @@ def calcular_pagamento_individual(row, weekly_data):
     return pd.Series([pagamento, lucro])
 
 
-def calcular_pagamento_semanal(row):
-    categoria = row['Categoria']
-    servico = row['Services']
-    gorjeta = row['Gorjeta']
-    dias_trabalhados = row['Dias Trabalhados']
-
-    if categoria == 'Registering':
-        pagamento = 0.00
-        lucro = servico + gorjeta
-    elif categoria == 'Employee':
-        pagamento = servico * 0.20 + gorjeta
-        lucro = servico * 0.80
-    elif categoria == 'Training':
-        pagamento = 80 * dias_trabalhados
-        lucro = servico + gorjeta - pagamento
-    elif categoria == 'Coordinator':
-        pagamento = servico * 0.25 + gorjeta
-        lucro = servico * 0.75
-    elif categoria == 'Started':
-        valor_comissao = servico * 0.20 + gorjeta
-        valor_minimo = 150 * dias_trabalhados
-        pagamento = max(valor_minimo, valor_comissao)
-        lucro = servico + gorjeta - pagamento
+def calcular_pagamentos_individuais(services, weekly_data):
+    """Versão em lote de calcular_pagamento_individual para todas as linhas de uma vez"""
+    resultado = pd.DataFrame(index=services.index, columns=['Pagamento Employee', 'Lucro Empresa'], dtype=float)
+    if services.empty:
+        return resultado
+
+    chaves = ['Nome', 'Semana']
+    totais = weekly_data.groupby(chaves, sort=False, observed=True)['Services'].sum().rename('_total_servico')
+    if 'Pagamento Employee' in weekly_data.columns:
+        # iloc[0] da função original: o pagamento da primeira linha de cada Nome/Semana
+        primeiros = weekly_data.drop_duplicates(chaves, keep='first').set_index(chaves)['Pagamento Employee']
     else:
-        pagamento = 0
-        lucro = servico + gorjeta
+        primeiros = pd.Series(0, index=totais.index)
+    totais = totais.to_frame().join(primeiros.rename('_total_pagamento'))
 
-    return pd.Series([pagamento, lucro])
+    combinado = services[chaves].join(totais, on=chaves)
+    total_servico = combinado['_total_servico'].to_numpy(dtype=float)
+    total_pagamento = combinado['_total_pagamento'].to_numpy(dtype=float)
+    servico = services['Services'].to_numpy(dtype=float)
+    gorjeta = services['Gorjeta'].to_numpy(dtype=float)
+
+    # Sem Nome/Semana correspondente ou total zero: nada é pago e tudo vira lucro
+    sem_rateio = np.isnan(total_servico) | (total_servico == 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pagamento = np.where(sem_rateio, 0.0, (servico / total_servico) * total_pagamento)
+        lucro = np.where(sem_rateio, servico + gorjeta, servico + gorjeta - pagamento)
+
+    resultado['Pagamento Employee'] = pagamento
+    resultado['Lucro Empresa'] = lucro
+    return resultado
+
+
+def _calcular_pagamento(servico, gorjeta, dias_trabalhados, comissao, repasse_gorjeta, minimo_diario, diaria):
+    # Funciona tanto com escalares quanto com arrays (uma posição por employee/semana)
+    valor_comissao = servico * comissao + gorjeta * repasse_gorjeta
+    pagamento = np.maximum(minimo_diario * dias_trabalhados, valor_comissao) + diaria * dias_trabalhados
+
+    # Categorias só de comissão dividem serviço e gorjeta direto entre employee e empresa
+    comissao_pura = (minimo_diario == 0) & (diaria == 0)
+    lucro = np.where(
+        comissao_pura,
+        servico * (1 - comissao) + gorjeta * (1 - repasse_gorjeta),
+        servico + gorjeta - pagamento
+    )
+    return pagamento, lucro
+
+
+def _regras_por_categoria(categorias):
+    """Monta um array por campo de REGRAS_PAGAMENTO, alinhado com as categorias informadas"""
+    categorias = pd.Series(categorias, dtype=object)
+    return {
+        campo: categorias.map({cat: float(regra[campo]) for cat, regra in REGRAS_PAGAMENTO.items()})
+        .fillna(float(REGRA_PADRAO[campo])).to_numpy(dtype=float)
+        for campo in REGRA_PADRAO
+    }
+
+
+def calcular_pagamento_semanal(row):
+    regra = REGRAS_PAGAMENTO.get(row['Categoria'], REGRA_PADRAO)
+    pagamento, lucro = _calcular_pagamento(
+        row['Services'], row['Gorjeta'], row['Dias Trabalhados'],
+        **{campo: float(valor) for campo, valor in regra.items()}
+    )
+    return pd.Series([float(pagamento), float(lucro)])
+
+
+def calcular_pagamentos_semanais(weekly_data):
+    """Versão em lote de calcular_pagamento_semanal: aplica REGRAS_PAGAMENTO a todas as linhas de uma vez"""
+    pagamento, lucro = _calcular_pagamento(
+        weekly_data['Services'].to_numpy(dtype=float),
+        weekly_data['Gorjeta'].to_numpy(dtype=float),
+        weekly_data['Dias Trabalhados'].to_numpy(dtype=float),
+        **_regras_por_categoria(weekly_data['Categoria'])
+    )
+    return pd.DataFrame(
+        {'Pagamento Employee': pagamento, 'Lucro Empresa': lucro},
+        index=weekly_data.index
+    )
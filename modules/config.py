@@ -1,5 +1,99 @@
+import os
+
 FORMAS_PAGAMENTO_VALIDAS = [
     'Check', 'American Express', 'Apple Pay', 'Discover',
     'Master Card', 'Visa', 'Zelle', 'Cash', 'Invoice'
 ]
 INVALID_CLIENTS = ['SERVICES IN:', 'TOTAL:', 'SUMMARY:']
+
+# Regras de pagamento semanal por categoria:
+#   comissao        -> percentual sobre o valor dos serviços
+#   repasse_gorjeta -> se a gorjeta vai integralmente para o employee
+#   minimo_diario   -> valor mínimo garantido por dia trabalhado
+#   diaria          -> valor fixo pago por dia trabalhado
+REGRAS_PAGAMENTO = {
+    'Registering': {'comissao': 0.00, 'repasse_gorjeta': False, 'minimo_diario': 0, 'diaria': 0},
+    'Employee': {'comissao': 0.20, 'repasse_gorjeta': True, 'minimo_diario': 0, 'diaria': 0},
+    'Training': {'comissao': 0.00, 'repasse_gorjeta': False, 'minimo_diario': 0, 'diaria': 80},
+    'Coordinator': {'comissao': 0.25, 'repasse_gorjeta': True, 'minimo_diario': 0, 'diaria': 0},
+    'Started': {'comissao': 0.20, 'repasse_gorjeta': True, 'minimo_diario': 150, 'diaria': 0},
+}
+# Categorias fora da tabela não recebem nada
+REGRA_PADRAO = {'comissao': 0.00, 'repasse_gorjeta': False, 'minimo_diario': 0, 'diaria': 0}
+
+# Cache em disco das planilhas já processadas (chave = hash do arquivo + versão do parser); o limite
+# vale para o diretório inteiro, inclusive os downloads de FETCH_CACHE_DIR
+CACHE_DIR = os.environ.get('JOBTRACK_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.jobtrack_cache'))
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Datasets em memória compartilhados por todas as sessões do processo (planilhas, cubo e folhas já calculadas)
+DATASET_STORE_MAX_BYTES = int(os.environ.get('JOBTRACK_DATASET_STORE_MB', 512)) * 1024 * 1024
+
+# Processos usados para ler as abas WEEK em paralelo (1 = tudo no processo do app)
+INGEST_WORKERS = int(os.environ.get('JOBTRACK_INGEST_WORKERS', os.cpu_count() or 1))
+
+# Planilhas a partir deste tamanho são lidas linha a linha (modo read-only), um bloco de employee por vez
+STREAMING_MIN_BYTES = 20 * 1024 * 1024
+
+# Download de planilhas por URL: respostas guardadas em disco (dentro do CACHE_DIR) e revalidadas com ETag/Last-Modified
+FETCH_CACHE_DIR = os.path.join(CACHE_DIR, 'downloads')
+FETCH_TIMEOUT = (5, 60)  # (conexão, leitura) em segundos
+FETCH_RETRIES = 3
+FETCH_CHUNK_SIZE = 1024 * 1024
+# Downloads simultâneos quando várias URLs são informadas
+FETCH_CONCURRENCY = int(os.environ.get('JOBTRACK_FETCH_CONCURRENCY', 8))
+
+# Histórico local (SQLite) com todas as semanas já importadas
+HISTORY_DB_PATH = os.environ.get('JOBTRACK_HISTORY_DB', os.path.join(os.path.expanduser('~'), '.jobtrack_history.sqlite3'))
+
+# Processos usados para gerar os recibos em lote (1 = no processo do app)
+PDF_WORKERS = int(os.environ.get('JOBTRACK_PDF_WORKERS', os.cpu_count() or 1))
+
+# Memória máxima dos arquivos de exportação (CSV, PDFs, ZIPs) guardados para novos downloads
+EXPORT_CACHE_MAX_BYTES = 128 * 1024 * 1024
+
+# Exportações são escritas em blocos de linhas num arquivo temporário (em memória até EXPORT_SPOOL_BYTES)
+EXPORT_CHUNK_ROWS = 50000
+EXPORT_SPOOL_BYTES = 16 * 1024 * 1024
+
+# Instrumentação por etapa (tempo, linhas e pico de memória). Também pode ser ligada pelo painel "Performance".
+PROFILE_ENABLED = os.environ.get('JOBTRACK_PROFILE', '') == '1'
+PROFILE_MEMORY = os.environ.get('JOBTRACK_PROFILE_MEMORY', '') == '1'
+# Arquivo com uma linha JSON por etapa medida (vazio = stderr)
+PROFILE_LOG_PATH = os.environ.get('JOBTRACK_PROFILE_LOG', '')
+
+# Gráficos: employees exibidos por série (o restante vira "Others"), pontos a partir dos quais
+# as linhas usam WebGL e as barras perdem os rótulos de texto, e figuras guardadas por fingerprint
+CHART_TOP_N = 15
+CHART_WEBGL_MIN_POINTS = 1000
+CHART_CACHE_SIZE = 32
+
+# Simulação de cenários: células (cenários x linhas de weekly_totals) calculadas por bloco
+SIMULATION_CHUNK_CELLS = 2_000_000
+# Máximo de cenários por simulação (produto dos valores de cada eixo)
+SIMULATION_MAX_SCENARIOS = int(os.environ.get('JOBTRACK_SIMULATION_MAX_SCENARIOS', 10_000))
+
+# Trabalho em segundo plano (leitura das planilhas e exportações) e intervalo de atualização da tela
+JOB_WORKERS = int(os.environ.get('JOBTRACK_JOB_WORKERS', 2))
+JOB_HISTORY = 50
+JOB_POLL_SECONDS = 0.5
+
+# Releitura incremental: quantas planilhas (envio da sessão, caminho ou URL) guardam a última versão por bloco,
+# e a memória máxima desses blocos
+INCREMENTAL_MAX_SOURCES = 20
+INCREMENTAL_MAX_BYTES = int(os.environ.get('JOBTRACK_INCREMENTAL_MB', 64)) * 1024 * 1024
+
+# Conciliação de pagamentos com extratos (CSV do banco ou da processadora de cartões): nomes aceitos
+# para cada coluna do extrato, comparados sem diferenciar maiúsculas
+STATEMENT_COLUMNS = {
+    'id': ['id', 'transaction id', 'payment id', 'charge id', 'reference', 'reference id', 'id pagamento'],
+    'date': ['date', 'transaction date', 'posted date', 'posting date', 'created', 'created date', 'data'],
+    'amount': ['amount', 'gross', 'gross amount', 'total', 'credit', 'deposit', 'valor'],
+    'method': ['method', 'payment method', 'card brand', 'card type', 'type', 'pagamento']
+}
+# Formas de pagamento que não aparecem nos extratos e ficam fora da conciliação
+RECONCILIATION_SKIP_METHODS = ['Cash']
+# Diferença aceita entre o valor do atendimento (serviço + gorjeta) e o do extrato, e dias que o
+# lançamento pode levar para aparecer no extrato depois do atendimento
+RECONCILIATION_AMOUNT_TOLERANCE = 0.01
+RECONCILIATION_DATE_WINDOW_DAYS = 3
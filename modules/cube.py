@@ -0,0 +1,100 @@
+import pandas as pd
+
+from .calculations import calcular_pagamentos_semanais, calcular_pagamentos_individuais
+from .config import FORMAS_PAGAMENTO_VALIDAS
+from .profiling import profiled
+
+# Granularidade do cubo. Data entra para que Dias Trabalhados (datas distintas) continue exato.
+DIMENSOES = ['Nome', 'Semana', 'Categoria', 'Dia', 'Data', 'Pagamento', 'Realizado']
+
+
+@profiled('cube')
+def build_cube(data):
+    """Agrega os atendimentos uma única vez em DIMENSOES, só com medidas aditivas"""
+    return data.groupby(DIMENSOES, observed=True, dropna=False, sort=False).agg(
+        Services=('Services', 'sum'),
+        Gorjeta=('Gorjeta', 'sum'),
+        Products=('Products', 'sum'),
+        Atendimentos=('Realizado', 'size'),
+        Clientes=('Cliente', 'count')
+    ).reset_index()
+
+
+def filter_cube(cube, weeks=None, employees=None, categories=None):
+    mask = pd.Series(True, index=cube.index)
+    if weeks:
+        mask &= cube['Semana'].isin(weeks)
+    if employees:
+        mask &= cube['Nome'].isin(employees)
+    if categories:
+        mask &= cube['Categoria'].isin(categories)
+    return cube[mask]
+
+
+def weekly_totals_from_cube(cube):
+    """weekly_totals (uma linha por Nome/Semana/Categoria) já com o pagamento semanal calculado"""
+    completed = cube[cube['Realizado']]
+
+    dias_trabalhados = completed.groupby(['Nome', 'Semana'], observed=True)['Data'].nunique()
+    dias_trabalhados = dias_trabalhados.reset_index(name='Dias Trabalhados')
+
+    weekly_totals = completed.groupby(['Nome', 'Semana', 'Categoria'], observed=True).agg(
+        Services=('Services', 'sum'),
+        Gorjeta=('Gorjeta', 'sum'),
+        Dia=('Atendimentos', 'sum')
+    ).reset_index()
+
+    weekly_totals = pd.merge(weekly_totals, dias_trabalhados, on=['Nome', 'Semana'], how='left')
+    weekly_totals[['Pagamento Employee', 'Lucro Empresa']] = calcular_pagamentos_semanais(weekly_totals)
+    return weekly_totals
+
+
+def allocate_cube(cube, weekly_totals):
+    """Células concluídas do cubo com a parte de Pagamento Employee / Lucro Empresa de cada uma"""
+    completed = cube[cube['Realizado']].copy()
+    completed[['Pagamento Employee', 'Lucro Empresa']] = calcular_pagamentos_individuais(completed, weekly_totals)
+    return completed
+
+
+def kpis(cube, allocated):
+    not_completed = cube[~cube['Realizado']]
+    return {
+        'Completed': int(allocated['Atendimentos'].sum()),
+        'Not Completed': int(not_completed['Clientes'].sum()),
+        'Total Services': allocated['Services'].sum(),
+        'Total Tips': allocated['Gorjeta'].sum(),
+        'Company Profit': allocated['Lucro Empresa'].sum()
+    }
+
+
+def employee_summary(weekly_totals):
+    emp_summary = weekly_totals.groupby(['Nome', 'Categoria'], observed=True).agg({
+        'Services': 'sum',
+        'Gorjeta': 'sum',
+        'Pagamento Employee': 'sum',
+        'Lucro Empresa': 'sum',
+        'Dia': 'sum',
+        'Dias Trabalhados': 'sum'
+    }).reset_index()
+
+    emp_summary.columns = ['Employee', 'Category', 'Total Services', 'Total Tips', 'Total Payment', 'Company Profit', 'Appointments', 'Worked Days']
+
+    emp_summary['Average Service'] = emp_summary['Total Services'] / emp_summary['Appointments']
+    emp_summary['Average Tip'] = emp_summary['Total Tips'] / emp_summary['Appointments']
+    return emp_summary
+
+
+def payment_method_summary(allocated):
+    valid_payments = allocated[allocated['Pagamento'].isin(FORMAS_PAGAMENTO_VALIDAS)]
+    if valid_payments.empty:
+        return pd.DataFrame()
+
+    payment_summary = valid_payments.groupby('Pagamento', observed=True).agg(
+        Services=('Services', 'sum'),
+        Gorjeta=('Gorjeta', 'sum'),
+        **{'Usage Count': ('Clientes', 'sum')}
+    ).reset_index()
+
+    payment_summary['Total'] = payment_summary['Services'] + payment_summary['Gorjeta']
+    payment_summary['Usage Percentage'] = (payment_summary['Usage Count'] / payment_summary['Usage Count'].sum() * 100).round(2)
+    return payment_summary
@@ -1,129 +1,539 @@
+import os
+import tempfile
 import pandas as pd
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import suppress
 from io import BytesIO
-import requests
-from .config import INVALID_CLIENTS, FORMAS_PAGAMENTO_VALIDAS
+from .config import INVALID_CLIENTS, FORMAS_PAGAMENTO_VALIDAS, STREAMING_MIN_BYTES, FETCH_CONCURRENCY
+from .cache import workbook_key
+from .fetcher import get_fetcher
+from .schema import DIAS_SEMANA, apply_schema, concat_appointments
+from .profiling import profiled
 
+# Aumentar sempre que a saída do parser mudar, para invalidar o cache em disco
+PARSER_VERSION = 2
 
-def process_spreadsheet(file):
-    all_weeks_data = {}
+# Cada dia ocupa 9 colunas a partir da coluna 1: (1, 9), (10, 18), ..., (55, 63)
+PRIMEIRA_COLUNA_DIA = 1
+COLUNAS_POR_DIA = 9
+LARGURA_MINIMA = PRIMEIRA_COLUNA_DIA + COLUNAS_POR_DIA * len(DIAS_SEMANA)
+
+COLUNAS_SAIDA = [
+    'Semana', 'Nome', 'Categoria', 'Origem', 'Dia', 'Data', 'Cliente', 'Services', 'Gorjeta',
+    'Products', 'Pagamento', 'ID Pagamento', 'Verificado', 'Realizado'
+]
+
+_INVALID_CLIENTS_UPPER = frozenset(c.upper() for c in INVALID_CLIENTS)
+_FORMAS_PAGAMENTO = frozenset(FORMAS_PAGAMENTO_VALIDAS)
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _sheet_values(df):
+    """Matriz de objetos da planilha, com pelo menos LARGURA_MINIMA colunas"""
+    values = df.to_numpy(dtype=object)
+    if values.shape[1] < LARGURA_MINIMA:
+        padding = np.full((values.shape[0], LARGURA_MINIMA - values.shape[1]), np.nan, dtype=object)
+        values = np.hstack([values, padding])
+    return values
+
+
+def _marker_rows(values):
+    """
+    Máscaras por linha: linhas com NAME: e linhas de cabeçalho (Schedule, DATE e SERVICE). Só células
+    de texto podem ter as marcas, e elas são buscadas como objetos: uma matriz de texto de largura fixa
+    daria a todas as células a largura da maior (uma nota longa multiplicaria a memória da aba).
+    """
+    flat = values.ravel()
+    positions = np.flatnonzero(np.fromiter((isinstance(cell, str) for cell in flat), dtype=bool, count=len(flat)))
+    cells = pd.Series(flat[positions], dtype=object)
+    rows = positions // max(values.shape[1], 1)
+
+    def rows_with(keyword):
+        mask = np.zeros(len(values), dtype=bool)
+        mask[rows[cells.str.contains(keyword, regex=False).to_numpy(dtype=bool)]] = True
+        return mask
+
+    header_rows = rows_with('Schedule') & rows_with('DATE') & rows_with('SERVICE')
+    return rows_with('NAME:'), header_rows
+
+
+def _find_blocks(name_rows):
+    """Intervalos [início, fim) de cada bloco de employee, do NAME: até o próximo NAME:"""
+    starts = np.flatnonzero(name_rows)
+    ends = np.append(starts[1:], len(name_rows))
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def _employee_info(name_row, sheet_name):
+    is_name = np.array([isinstance(cell, str) and 'NAME:' in cell for cell in name_row])
+    if not is_name.any():
+        return None
+    name_col = int(np.argmax(is_name))
+
+    def cell(offset):
+        col = name_col + offset
+        return name_row[col] if col < len(name_row) else np.nan
+
+    return {
+        'Semana': sheet_name,
+        'Nome': cell(1),
+        'Categoria': cell(3),
+        'Origem': cell(5) if 'From:' in str(cell(4)) else None
+    }
+
+
+def _parse_block(block, sheet_name, header_rows=None):
+    """Extrai as colunas dos atendimentos de um bloco de employee (matriz com a linha NAME: primeiro)"""
+    if header_rows is None:
+        _, header_rows = _marker_rows(block)
+
+    employee_info = _employee_info(block[0], sheet_name)
+    if employee_info is None:
+        return None
+
+    header = np.flatnonzero(header_rows)
+    if not len(header) or header[0] + 1 >= len(block):
+        return None
+    first_row = header[0] + 1
+
+    # (linhas, 7 dias, 9 colunas) -> uma linha por linha/dia, na mesma ordem da leitura linha a linha
+    n_rows = len(block) - first_row
+    shape = (n_rows * len(DIAS_SEMANA), COLUNAS_POR_DIA)
+    days = block[first_row:, PRIMEIRA_COLUNA_DIA:LARGURA_MINIMA].reshape(shape)
+    # Texto só das colunas comparadas (cliente, serviço e pagamento), cada uma com a sua largura
+    days_text = {idx: days[:, idx].astype(str) for idx in (0, 2, 5)}
+    day_index = np.tile(np.arange(len(DIAS_SEMANA)), n_rows)
+
+    present = pd.notna(days)
+    clients = np.where(present[:, 0], np.char.strip(days_text[0]), '')
+    keep = (clients != '') & ~np.isin(np.char.upper(clients), list(_INVALID_CLIENTS_UPPER))
+    if not keep.any():
+        return None
+    days, present = days[keep], present[keep]
+    days_text = {idx: text[keep] for idx, text in days_text.items()}
+    clients, day_index = clients[keep], day_index[keep]
+
+    service_text = np.char.strip(days_text[2])
+    has_service = present[:, 2] & (service_text != '') & (service_text != 'nan')
+    service_value = np.full(len(days), np.nan)
+    service_value[has_service] = [_to_float(v) for v in days[has_service, 2]]
+    done = has_service & ~np.isnan(service_value)
+
+    # Serviço preenchido mas não numérico: a célula é ignorada
+    emit = done | ~has_service
+    days, present = days[emit], present[emit]
+    days_text = {idx: text[emit] for idx, text in days_text.items()}
+    clients, day_index, done, service_value = clients[emit], day_index[emit], done[emit], service_value[emit]
+
+    n = len(days)
+    valid_payment = done & present[:, 5] & np.isin(np.char.strip(days_text[5]), list(_FORMAS_PAGAMENTO))
+    tips = np.zeros(n, dtype=object)
+    has_tip = done & present[:, 3]
+    tips[has_tip] = [_to_float(v) for v in days[has_tip, 3]]
+
+    def column(idx, default):
+        return np.where(done & present[:, idx], days[:, idx], default)
+
+    return {
+        'Semana': np.full(n, employee_info['Semana'], dtype=object),
+        'Nome': np.full(n, employee_info['Nome'], dtype=object),
+        'Categoria': np.full(n, employee_info['Categoria'], dtype=object),
+        'Origem': np.full(n, employee_info['Origem'], dtype=object),
+        'Dia': np.array(DIAS_SEMANA, dtype=object)[day_index],
+        'Data': days[:, 1],
+        'Cliente': clients.astype(object),
+        'Services': np.where(done, service_value, 0).astype(object),
+        'Gorjeta': tips,
+        'Products': column(4, 0),
+        'Pagamento': np.where(valid_payment, days[:, 5], None),
+        'ID Pagamento': column(6, None),
+        'Verificado': column(7, False),
+        'Realizado': done
+    }
+
+
+def _blocks_to_frame(blocks):
+    """Junta as colunas de vários blocos em um único DataFrame (None se não houver atendimentos)"""
+    blocks = [block for block in blocks if block is not None]
+    if not blocks:
+        return None
+    columns = {col: np.concatenate([block[col] for block in blocks]) for col in COLUNAS_SAIDA}
+    return pd.DataFrame(columns, columns=COLUNAS_SAIDA).infer_objects()
+
+
+def _parse_sheet(df, sheet_name):
+    values = _sheet_values(df)
+    name_rows, header_rows = _marker_rows(values)
+
+    return _blocks_to_frame(
+        _parse_block(values[start:end], sheet_name, header_rows[start:end])
+        for start, end in _find_blocks(name_rows)
+    )
+
+
+def _stream_cell(value):
+    # Mesmas conversões que o pd.read_excel faz: vazio vira NaN e float inteiro vira int
+    if value is None:
+        return np.nan
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _rows_to_block(rows):
+    width = max(LARGURA_MINIMA, max(len(row) for row in rows))
+    block = np.full((len(rows), width), np.nan, dtype=object)
+    for i, row in enumerate(rows):
+        block[i, :len(row)] = [_stream_cell(value) for value in row]
+    return block
+
+
+def _iter_sheet_blocks(worksheet):
+    """Lê a aba linha a linha e devolve um bloco de employee por vez (só um bloco fica em memória)"""
+    rows = []
+    for row in worksheet.iter_rows(values_only=True):
+        if any(value is not None and 'NAME:' in str(value) for value in row):
+            if rows:
+                yield _rows_to_block(rows)
+            rows = [row]
+        elif rows:
+            rows.append(row)
+    if rows:
+        yield _rows_to_block(rows)
+
+
+def _open_workbook(file):
+    """Planilha em modo read-only; o openpyxl só é carregado na primeira leitura, não na abertura do app"""
+    from openpyxl import load_workbook
+
+    return load_workbook(file, read_only=True, data_only=True)
+
+
+def _parse_sheet_streaming(worksheet, sheet_name):
+    return _blocks_to_frame(_parse_block(block, sheet_name) for block in _iter_sheet_blocks(worksheet))
+
+
+def iter_appointment_blocks(file):
+    """Percorre as abas WEEK em modo streaming, devolvendo (aba, DataFrame de atendimentos) por bloco de employee"""
+    workbook = _open_workbook(file)
+    try:
+        for worksheet in workbook.worksheets:
+            if worksheet.title.startswith('WEEK'):
+                for block in _iter_sheet_blocks(worksheet):
+                    frame = _blocks_to_frame([_parse_block(block, worksheet.title)])
+                    if frame is not None:
+                        yield worksheet.title, frame
+    finally:
+        workbook.close()
+
+
+def _combine_weeks(week_frames):
+    if not week_frames:
+        return pd.DataFrame()
+    return _clean_weeks(pd.concat(week_frames, ignore_index=True))
+
+
+def _clean_weeks(combined_data):
+    """Tipos, datas e clientes válidos dos atendimentos extraídos de uma ou mais abas, já no APPOINTMENT_SCHEMA"""
+    combined_data['Data'] = pd.to_datetime(combined_data['Data'], errors='coerce')
+    combined_data['Services'] = pd.to_numeric(combined_data['Services'], errors='coerce')
+    combined_data['Gorjeta'] = pd.to_numeric(combined_data['Gorjeta'], errors='coerce').fillna(0)
+    combined_data['Products'] = pd.to_numeric(combined_data['Products'], errors='coerce').fillna(0)
+    combined_data = combined_data.dropna(subset=['Data'])
+    combined_data = combined_data[
+        ~combined_data['Cliente'].astype(str).str.strip().str.upper().isin(_INVALID_CLIENTS_UPPER)
+    ]
+    return apply_schema(combined_data)
+
+
+def process_spreadsheet_streaming(file):
+    """Mesmo resultado de process_spreadsheet, sem carregar a aba inteira em memória"""
+    if isinstance(file, str) and file.startswith('http'):
+        file = BytesIO(read_workbook_bytes(file))
+    elif isinstance(file, BytesIO):
+        file.seek(0)
+
+    workbook = _open_workbook(file)
+    try:
+        week_frames = [
+            _parse_sheet_streaming(worksheet, worksheet.title)
+            for worksheet in workbook.worksheets if worksheet.title.startswith('WEEK')
+        ]
+    finally:
+        workbook.close()
+    return _combine_weeks([frame for frame in week_frames if frame is not None])
+
+
+def _parse_content(content):
+    if len(content) >= STREAMING_MIN_BYTES:
+        return process_spreadsheet_streaming(BytesIO(content))
+    return process_spreadsheet(BytesIO(content))
 
+
+def read_workbook_bytes(file):
+    """Conteúdo bruto da planilha a partir de URL, caminho, bytes ou arquivo enviado"""
+    if isinstance(file, (bytes, bytearray)):
+        return bytes(file)
+    if isinstance(file, str) and file.startswith('http'):
+        return get_fetcher().fetch(file)
+    if hasattr(file, 'getvalue'):
+        return file.getvalue()
+    if hasattr(file, 'read'):
+        file.seek(0)
+        return file.read()
+    with open(file, 'rb') as f:
+        return f.read()
+
+
+def process_spreadsheet(file):
     if isinstance(file, str) and file.startswith('http'):
-        response = requests.get(file)
-        file = BytesIO(response.content)
+        file = BytesIO(read_workbook_bytes(file))
     elif isinstance(file, BytesIO):
         file.seek(0)
 
     xls = pd.ExcelFile(file)
+    week_frames = []
     for sheet_name in xls.sheet_names:
         if sheet_name.startswith('WEEK'):
             df = pd.read_excel(xls, sheet_name=sheet_name, header=None)
-            employee_blocks = []
-            current_block = []
-            collecting = False
-
-            for idx, row in df.iterrows():
-                if any('NAME:' in str(cell) for cell in row.values):
-                    if current_block:
-                        employee_blocks.append(current_block)
-                        current_block = []
-                    collecting = True
-                if collecting:
-                    current_block.append(row)
-            if current_block:
-                employee_blocks.append(current_block)
-
-            week_data = []
-            for block in employee_blocks:
-                name_row = next((row for row in block if any('NAME:' in str(cell) for cell in row.values)), None)
-
-                if name_row is None:
-                    continue
+            week_frame = _parse_sheet(df, sheet_name)
+            if week_frame is not None:
+                week_frames.append(week_frame)
+
+    return _combine_weeks(week_frames)
+
+
+def _spool_workbook(content):
+    """
+    Grava a planilha num arquivo temporário para as tarefas de aba do pool: cada uma recebe só o caminho,
+    em vez de uma cópia dos bytes da planilha inteira. Quem chamou apaga o arquivo com _discard_spooled.
+    """
+    fd, path = tempfile.mkstemp(prefix='jobtrack-', suffix='.xlsx')
+    with os.fdopen(fd, 'wb') as file:
+        file.write(content)
+    return path
+
+
+def _discard_spooled(path):
+    with suppress(FileNotFoundError):
+        os.remove(path)
+
+
+def _workbook_file(workbook):
+    """Bytes da planilha ou caminho do arquivo temporário: (arquivo para o leitor, tamanho em bytes)"""
+    if isinstance(workbook, (bytes, bytearray)):
+        return BytesIO(workbook), len(workbook)
+    return workbook, os.path.getsize(workbook)
+
+
+def _parse_sheet_task(workbook, sheet_name):
+    """
+    Tarefa executada em um processo do pool: lê e processa uma única aba WEEK e devolve o DataFrame já
+    compacto (APPOINTMENT_SCHEMA), que é bem menor para voltar ao processo principal
+    """
+    week_frame = _read_sheet(workbook, sheet_name)
+    return _clean_weeks(week_frame) if week_frame is not None else None
+
+
+def _read_sheet(workbook, sheet_name):
+    file, size = _workbook_file(workbook)
+    if size >= STREAMING_MIN_BYTES:
+        book = _open_workbook(file)
+        try:
+            return _parse_sheet_streaming(book[sheet_name], sheet_name)
+        finally:
+            book.close()
+
+    df = pd.read_excel(file, sheet_name=sheet_name, header=None)
+    return _parse_sheet(df, sheet_name)
 
-                name_col = next(
-                    (i for i, cell in enumerate(name_row.values) if isinstance(cell, str) and 'NAME:' in cell), None
-                )
 
-                employee_info = {
-                    'Semana': sheet_name,
-                    'Nome': name_row[name_col + 1] if name_col is not None else None,
-                    'Categoria': name_row[name_col + 3] if name_col is not None else None,
-                    'Origem': name_row[name_col + 5] if name_col is not None and 'From:' in str(name_row[name_col + 4]) else None
-                }
+def _week_sheets(content):
+    return [name for name in pd.ExcelFile(BytesIO(content)).sheet_names if name.startswith('WEEK')]
 
-                header_row = next((i for i, row in enumerate(block) if all(
-                    keyword in str(row.values) for keyword in ['Schedule', 'DATE', 'SERVICE']
-                )), None)
 
-                if header_row is None:
+def load_spreadsheet(file, cache=None):
+    """process_spreadsheet com cache: planilhas já vistas são lidas do disco em vez de reprocessadas"""
+    content = read_workbook_bytes(file)
+    if cache is None:
+        return _parse_content(content)
+
+    key = workbook_key(content, PARSER_VERSION)
+    data = cache.get(key)
+    if data is None:
+        data = cache.put(key, _parse_content(content))
+    return data
+
+
+def _submit_sheets(content, executor):
+    """Uma tarefa por aba WEEK da planilha, todas lendo o mesmo arquivo temporário: (caminho, futures)"""
+    path = _spool_workbook(content)
+    try:
+        return path, [executor.submit(_parse_sheet_task, path, sheet) for sheet in _week_sheets(content)]
+    except Exception:
+        _discard_spooled(path)
+        raise
+
+
+def _concat_clean_weeks(week_frames):
+    """Junta as abas já limpas pelos workers, unindo as categorias de cada uma"""
+    if not week_frames:
+        return pd.DataFrame()
+    data = concat_appointments(week_frames)
+    # Nenhuma aba com atendimento válido: mantém as colunas tipadas, como _combine_weeks
+    return data if not data.empty else week_frames[0]
+
+
+def _finish_sheets(key, path, sheet_futures, cache):
+    try:
+        week_frames = [future.result() for future in sheet_futures]
+    finally:
+        _discard_spooled(path)
+    data = _concat_clean_weeks([frame for frame in week_frames if frame is not None])
+    return cache.put(key, data) if cache is not None else data
+
+
+def _load_incremental(sources, contents, cache, executor, parser):
+    """
+    Fontes já vistas pelo parser são relidas só nas abas e blocos alterados, mesmo com o conteúdo no cache.
+    Uma fonte nova que vem do cache é registrada no parser em segundo plano.
+    """
+    parsed = [None] * len(contents)
+    pending = []
+    for i, (source, content) in enumerate(zip(sources, contents)):
+        key = workbook_key(content, PARSER_VERSION)
+        cached = cache.get(key) if cache is not None and not parser.knows(source) else None
+        if cached is not None:
+            parsed[i] = cached
+            parser.remember(source, content, executor)
+        else:
+            pending.append((i, key, parser.submit(source, content, executor)))
+
+    for i, key, job in pending:
+        data = parser.finish(job)
+        parsed[i] = cache.put(key, data) if cache is not None else data
+    return parsed
+
+
+@profiled('parse')
+def load_spreadsheets(files, cache=None, executor=None, sources=None, parser=None):
+    """
+    Processa várias planilhas de uma vez. Com um executor (ex.: ProcessPoolExecutor), cada aba WEEK
+    de cada arquivo vira uma tarefa independente; o resultado sai na mesma ordem do processamento
+    em série, um DataFrame por arquivo. Arquivos repetidos são processados uma única vez.
+    Com um IncrementalParser e o nome de cada fonte (sources), uma nova versão de uma planilha já
+    vista só relê o que mudou; parser.changes(fonte) traz o resumo das mudanças.
+    """
+    contents = [read_workbook_bytes(file) for file in files]
+    if parser is not None and sources is not None:
+        return _load_incremental(sources, contents, cache, executor, parser)
+    if executor is None:
+        return [load_spreadsheet(content, cache) for content in contents]
+
+    keys = [workbook_key(content, PARSER_VERSION) for content in contents]
+    parsed = {}
+    futures = {}
+    for key, content in zip(keys, contents):
+        if key in parsed or key in futures:
+            continue
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            parsed[key] = cached
+        else:
+            futures[key] = _submit_sheets(content, executor)
+
+    try:
+        for key, (path, sheet_futures) in futures.items():
+            parsed[key] = _finish_sheets(key, path, sheet_futures, cache)
+    finally:
+        for path, _ in futures.values():
+            _discard_spooled(path)
+
+    return [parsed[key] for key in keys]
+
+
+@profiled('ingest_urls')
+def load_spreadsheet_urls(urls, cache=None, executor=None, progress=None, fetcher=None,
+                          max_downloads=FETCH_CONCURRENCY, parser=None):
+    """
+    Baixa várias planilhas ao mesmo tempo (no máximo max_downloads) e processa cada uma assim que o
+    download termina; uma fonte lenta ou com erro não segura as outras. Retorna um resultado por URL
+    (na ordem informada) com status 'done' ou 'failed', o DataFrame e o erro. progress(resultado) é
+    chamado a cada mudança de status. Com um IncrementalParser, a URL é a fonte da releitura incremental.
+    """
+    fetcher = fetcher or get_fetcher()
+    urls = list(dict.fromkeys(urls))
+    results = {url: {'source': url, 'status': 'downloading', 'bytes': 0, 'data': None, 'error': None} for url in urls}
+    if not urls:
+        return []
+
+    def update(url, **changes):
+        results[url].update(changes)
+        if progress is not None:
+            progress(results[url])
+
+    # Qualquer erro de download ou de leitura fica só no resultado da própria fonte
+    def parse(url, content):
+        update(url, status='parsing', bytes=len(content))
+        key = workbook_key(content, PARSER_VERSION)
+        incremental = parser is not None and parser.knows(url)
+        cached = cache.get(key) if cache is not None and not incremental else None
+        if cached is not None:
+            if parser is not None:
+                parser.remember(url, content, executor)
+            update(url, status='done', data=cached)
+            return
+
+        def store(data):
+            return cache.put(key, data) if cache is not None else data
+
+        if parser is not None:
+            job = parser.submit(url, content, executor)
+            futures, finish = list(job['futures'].values()), lambda: store(parser.finish(job))
+        elif executor is None:
+            futures, finish = [], lambda: store(_parse_content(content))
+        else:
+            path, futures = _submit_sheets(content, executor)
+            finish = lambda: _finish_sheets(key, path, futures, cache)
+
+        if futures:
+            parsing[url] = (futures, finish)
+        else:
+            update(url, status='done', data=finish())
+
+    for url in urls:
+        update(url)
+
+    parsing = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_downloads, len(urls)))) as downloads:
+        downloading = {downloads.submit(fetcher.fetch, url): url for url in urls}
+        while downloading or parsing:
+            waiting = list(downloading) + [f for futures, _ in parsing.values() for f in futures]
+            done, _ = wait(waiting, return_when=FIRST_COMPLETED)
+
+            for future in done & downloading.keys():
+                url = downloading.pop(future)
+                if future.exception() is not None:
+                    update(url, status='failed', error=str(future.exception()))
                     continue
+                try:
+                    parse(url, future.result())
+                except Exception as error:
+                    update(url, status='failed', error=f"Could not read workbook: {error}")
 
-                days_data = []
-                for i in range(header_row + 1, len(block)):
-                    day_row = block[i]
-                    for day_idx, day_col in enumerate(
-                        [(1, 9), (10, 18), (19, 27), (28, 36), (37, 45), (46, 54), (55, 63)]
-                    ):
-                        start_col, end_col = day_col
-                        day_data = day_row[start_col:end_col + 1].values
-                        client_name = str(day_data[0]).strip() if pd.notna(day_data[0]) else ''
-
-                        if not client_name or client_name.upper() in [c.upper() for c in INVALID_CLIENTS]:
-                            continue
-
-                        if pd.notna(day_data[2]) and str(day_data[2]).strip() and str(day_data[2]).strip() != 'nan':
-                            try:
-                                service_value = float(day_data[2])
-                            except:
-                                service_value = np.nan
-                            if not np.isnan(service_value):
-                                pagamento = day_data[5] if pd.notna(day_data[5]) and str(day_data[5]).strip() in FORMAS_PAGAMENTO_VALIDAS else None
-                                tip_value = float(day_data[3]) if pd.notna(day_data[3]) else 0
-                                day_info = {
-                                    'Dia': ['Domingo', 'Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado'][day_idx],
-                                    'Data': day_data[1],
-                                    'Cliente': client_name,
-                                    'Services': service_value,
-                                    'Gorjeta': tip_value,
-                                    'Products': day_data[4] if pd.notna(day_data[4]) else 0,
-                                    'Pagamento': pagamento,
-                                    'ID Pagamento': day_data[6] if pd.notna(day_data[6]) else None,
-                                    'Verificado': day_data[7] if pd.notna(day_data[7]) else False,
-                                    'Realizado': True
-                                }
-                                days_data.append({**employee_info, **day_info})
-                        elif pd.notna(day_data[0]):
-                            if client_name.upper() in [c.upper() for c in INVALID_CLIENTS]:
-                                continue
-                            day_info = {
-                                'Dia': ['Domingo', 'Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado'][day_idx],
-                                'Data': day_data[1],
-                                'Cliente': client_name,
-                                'Services': 0,
-                                'Gorjeta': 0,
-                                'Products': 0,
-                                'Pagamento': None,
-                                'ID Pagamento': None,
-                                'Verificado': False,
-                                'Realizado': False
-                            }
-                            days_data.append({**employee_info, **day_info})
-
-                week_data.extend(days_data)
-
-            if week_data:
-                all_weeks_data[sheet_name] = pd.DataFrame(week_data)
-
-    if all_weeks_data:
-        combined_data = pd.concat(all_weeks_data.values(), ignore_index=True)
-        combined_data['Data'] = pd.to_datetime(combined_data['Data'], errors='coerce')
-        combined_data['Services'] = pd.to_numeric(combined_data['Services'], errors='coerce')
-        combined_data['Gorjeta'] = pd.to_numeric(combined_data['Gorjeta'], errors='coerce').fillna(0)
-        combined_data['Products'] = pd.to_numeric(combined_data['Products'], errors='coerce').fillna(0)
-        combined_data = combined_data.dropna(subset=['Data'])
-        combined_data = combined_data[
-            ~combined_data['Cliente'].astype(str).str.strip().str.upper().isin([c.upper() for c in INVALID_CLIENTS])
-        ]
-        return combined_data
+            for url, (futures, finish) in list(parsing.items()):
+                if all(future.done() for future in futures):
+                    del parsing[url]
+                    try:
+                        update(url, status='done', data=finish())
+                    except Exception as error:
+                        update(url, status='failed', error=f"Could not read workbook: {error}")
 
-    return pd.DataFrame()
+    return [results[url] for url in urls]
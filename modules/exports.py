@@ -0,0 +1,139 @@
+import hashlib
+import io
+import json
+import tempfile
+import threading
+from collections import OrderedDict
+
+from .config import EXPORT_CACHE_MAX_BYTES, EXPORT_CHUNK_ROWS, EXPORT_SPOOL_BYTES
+from .profiling import profiled
+
+# Colunas da planilha de folha de pagamento (coluna de weekly_totals -> título)
+COLUNAS_FOLHA = {
+    'Nome': 'Employee',
+    'Semana': 'Week',
+    'Categoria': 'Category',
+    'Dia': 'Appointments',
+    'Dias Trabalhados': 'Worked Days',
+    'Services': 'Total Services',
+    'Gorjeta': 'Total Tips',
+    'Pagamento Employee': 'Total Payment',
+    'Lucro Empresa': 'Company Profit'
+}
+
+
+def artifact_key(kind, dataset_key, filter_state):
+    """Identifica um arquivo exportado: tipo + dataset + estado dos filtros"""
+    payload = json.dumps({'kind': kind, 'dataset': dataset_key, 'filters': filter_state}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ArtifactCache:
+    """Arquivos de exportação gerados sob demanda e reaproveitados, com limite de memória e descarte LRU"""
+
+    def __init__(self, max_bytes=EXPORT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return self._items[key]
+
+    def get_or_build(self, key, builder):
+        """Devolve o arquivo da chave, chamando builder() só se ele ainda não existir"""
+        content = self.get(key)
+        if content is not None:
+            return content
+
+        content = builder()
+        with self._lock:
+            self.misses += 1
+            if key not in self._items:
+                self._items[key] = content
+                self._bytes += len(content)
+                self._evict()
+        return content
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and len(self._items) > 1:
+            _, content = self._items.popitem(last=False)
+            self._bytes -= len(content)
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'items': len(self._items),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+
+def _chunks(df, chunk_rows):
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def _spooled_file():
+    return tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_BYTES)
+
+
+@profiled('export_csv')
+def write_csv(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    """CSV (mesmo conteúdo de df.to_csv(index=False)) escrito em blocos; retorna o arquivo no início"""
+    out = _spooled_file()
+    text = io.TextIOWrapper(out, encoding='utf-8', newline='')
+    if df.empty:
+        df.to_csv(text, index=False)
+    for i, chunk in enumerate(_chunks(df, chunk_rows)):
+        chunk.to_csv(text, index=False, header=i == 0)
+    text.flush()
+    text.detach()
+    out.seek(0)
+    return out
+
+
+@profiled('export_parquet')
+def write_parquet(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Parquet com um row group por bloco de linhas"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    out = _spooled_file()
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(out, schema) as writer:
+        for chunk in _chunks(df, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    out.seek(0)
+    return out
+
+
+@profiled('export_xlsx')
+def write_payroll_xlsx(weekly_totals, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Planilha 'Payroll' (uma linha por employee/semana) gravada com o openpyxl em modo write-only"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Payroll')
+    sheet.append(list(COLUNAS_FOLHA.values()))
+
+    payroll = weekly_totals[list(COLUNAS_FOLHA)]
+    for chunk in _chunks(payroll, chunk_rows):
+        for row in chunk.astype(object).itertuples(index=False, name=None):
+            sheet.append([value.item() if hasattr(value, 'item') else value for value in row])
+
+    out = _spooled_file()
+    workbook.save(out)
+    out.seek(0)
+    return out
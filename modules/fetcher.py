@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+
+from .config import FETCH_CACHE_DIR, FETCH_TIMEOUT, FETCH_RETRIES, FETCH_CHUNK_SIZE, FETCH_CONCURRENCY
+from .profiling import profiled
+
+
+def _build_session(retries):
+    # requests/urllib3 só são carregados quando a primeira URL é baixada
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=retries,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['GET', 'HEAD'])
+    )
+    pool_size = max(10, FETCH_CONCURRENCY)
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class SpreadsheetFetcher:
+    """Baixa planilhas por URL reaproveitando conexões; uma planilha sem alterações custa só um 304"""
+
+    def __init__(self, directory=FETCH_CACHE_DIR, timeout=FETCH_TIMEOUT, retries=FETCH_RETRIES, session=None):
+        self.directory = directory
+        self.timeout = timeout
+        self.session = session or _build_session(retries)
+        self.downloads = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode()).hexdigest()
+        base = os.path.join(self.directory, key)
+        return f'{base}.xlsx', f'{base}.json'
+
+    def _load_meta(self, body_path, meta_path):
+        if not os.path.exists(body_path):
+            return {}
+        try:
+            with open(meta_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    @profiled('fetch')
+    def fetch(self, url):
+        """Conteúdo da planilha em bytes, revalidando a cópia local quando houver uma"""
+        body_path, meta_path = self._paths(url)
+        content = self._fetch(url, body_path, meta_path, self._load_meta(body_path, meta_path))
+        if content is None:
+            # Cópia local apagada pelo limite do WorkbookCache entre a revalidação e a leitura
+            content = self._fetch(url, body_path, meta_path, {})
+        if content is None:
+            raise ValueError(f"{url} answered 304 Not Modified to a request without validators")
+        return content
+
+    def _fetch(self, url, body_path, meta_path, meta):
+        """Conteúdo baixado ou revalidado; None se o servidor respondeu 304 sem uma cópia local para usar"""
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+        with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+            if response.status_code == 304:
+                if not meta:
+                    return None
+                try:
+                    # Marca o uso recente para o descarte LRU do WorkbookCache
+                    os.utime(body_path)
+                    with open(body_path, 'rb') as f:
+                        content = f.read()
+                except FileNotFoundError:
+                    return None
+                with self._lock:
+                    self.not_modified += 1
+                return content
+
+            response.raise_for_status()
+            tmp_path = f'{body_path}.{uuid.uuid4().hex}.tmp'
+            try:
+                # Os blocos vão direto para o disco; o conteúdo é lido de volta do arquivo já completo,
+                # sem guardar os pedaços e a cópia juntada ao mesmo tempo
+                with open(tmp_path, 'w+b') as f:
+                    for chunk in response.iter_content(chunk_size=FETCH_CHUNK_SIZE):
+                        f.write(chunk)
+                    f.seek(0)
+                    content = f.read()
+                os.replace(tmp_path, body_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+            with open(meta_path, 'w') as f:
+                json.dump({
+                    'url': url,
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified')
+                }, f)
+            with self._lock:
+                self.downloads += 1
+        return content
+
+    def stats(self):
+        return {'downloads': self.downloads, 'not_modified': self.not_modified}
+
+
+_default_fetcher = None
+_default_lock = threading.Lock()
+
+
+def get_fetcher():
+    """Instância compartilhada usada por read_workbook_bytes (criada uma única vez, mesmo com várias threads)"""
+    global _default_fetcher
+    if _default_fetcher is None:
+        with _default_lock:
+            if _default_fetcher is None:
+                _default_fetcher = SpreadsheetFetcher()
+    return _default_fetcher
@@ -0,0 +1,188 @@
+import hashlib
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+from .config import HISTORY_DB_PATH
+from .profiling import profiled
+from .schema import APPOINTMENT_SCHEMA, apply_schema
+
+# Coluna do DataFrame -> coluna da tabela appointments
+COLUNAS = {
+    'Semana': 'semana',
+    'Nome': 'nome',
+    'Data': 'data',
+    'Categoria': 'categoria',
+    'Origem': 'origem',
+    'Dia': 'dia',
+    'Cliente': 'cliente',
+    'Services': 'services',
+    'Gorjeta': 'gorjeta',
+    'Products': 'products',
+    'Pagamento': 'pagamento',
+    'ID Pagamento': 'id_pagamento',
+    'Verificado': 'verificado',
+    'Realizado': 'realizado'
+}
+CHAVE = ['Semana', 'Nome', 'Data']
+
+_SCHEMA_SQL = '''
+CREATE TABLE IF NOT EXISTS employee_days (
+    semana TEXT NOT NULL,
+    nome TEXT NOT NULL,
+    data TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    PRIMARY KEY (semana, nome, data)
+);
+CREATE TABLE IF NOT EXISTS appointments (
+    semana TEXT NOT NULL,
+    nome TEXT NOT NULL,
+    data TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    categoria TEXT,
+    origem TEXT,
+    dia TEXT,
+    cliente TEXT,
+    services REAL,
+    gorjeta REAL,
+    products REAL,
+    pagamento TEXT,
+    id_pagamento TEXT,
+    verificado INTEGER,
+    realizado INTEGER,
+    PRIMARY KEY (semana, nome, data, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_appointments_nome ON appointments (nome);
+CREATE INDEX IF NOT EXISTS idx_appointments_categoria ON appointments (categoria);
+'''
+
+
+def _in_clause(column, values):
+    return f"{column} IN ({', '.join('?' * len(values))})", [str(v) for v in values]
+
+
+class HistoryStore:
+    """Histórico de atendimentos em SQLite, atualizado por (Semana, Nome, Data): só grava o que mudou"""
+
+    def __init__(self, path=HISTORY_DB_PATH):
+        self.path = path
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(_SCHEMA_SQL)
+
+    def _connect(self):
+        return sqlite3.connect(self.path)
+
+    def _prepare(self, data):
+        rows = data[list(COLUNAS)].copy()
+        rows['Data'] = rows['Data'].dt.strftime('%Y-%m-%d %H:%M:%S')
+        for col in ['Semana', 'Nome', 'Categoria', 'Origem', 'Dia', 'Cliente', 'Pagamento', 'ID Pagamento']:
+            rows[col] = rows[col].astype(object).where(rows[col].notna(), None)
+            rows[col] = rows[col].map(lambda value: None if value is None else str(value))
+        rows['Verificado'] = rows['Verificado'].astype(bool).astype(int)
+        rows['Realizado'] = rows['Realizado'].astype(bool).astype(int)
+        rows['seq'] = rows.groupby(CHAVE, sort=False).cumcount()
+        return rows
+
+    @profiled('history_ingest')
+    def ingest(self, data):
+        """Upsert dos dias de cada employee; dias idênticos ao que já está gravado não são reescritos"""
+        summary = {'new_days': 0, 'changed_days': 0, 'unchanged_days': 0, 'rows_written': 0}
+        if data.empty:
+            return summary
+
+        rows = self._prepare(data)
+        row_hashes = pd.util.hash_pandas_object(rows.drop(columns='seq'), index=False)
+        day_hashes = row_hashes.groupby([rows[col] for col in CHAVE], sort=False).agg(
+            lambda hashes: hashlib.sha1(hashes.to_numpy().tobytes()).hexdigest()
+        )
+
+        with closing(self._connect()) as conn, conn:
+            weeks = rows['Semana'].unique().tolist()
+            where, params = _in_clause('semana', weeks)
+            stored = dict(
+                ((semana, nome, data), content_hash)
+                for semana, nome, data, content_hash
+                in conn.execute(f'SELECT semana, nome, data, content_hash FROM employee_days WHERE {where}', params)
+            )
+
+            changed = []
+            for key, content_hash in day_hashes.items():
+                previous = stored.get(key)
+                if previous == content_hash:
+                    summary['unchanged_days'] += 1
+                    continue
+                summary['new_days' if previous is None else 'changed_days'] += 1
+                changed.append((key, content_hash))
+
+            if not changed:
+                return summary
+
+            changed_keys = pd.MultiIndex.from_tuples([key for key, _ in changed], names=CHAVE)
+            to_write = rows.set_index(CHAVE)
+            to_write = to_write[to_write.index.isin(changed_keys)].reset_index()
+
+            conn.executemany(
+                'DELETE FROM appointments WHERE semana = ? AND nome = ? AND data = ?',
+                [key for key, _ in changed]
+            )
+            columns = list(COLUNAS.values()) + ['seq']
+            conn.executemany(
+                f"INSERT INTO appointments ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                to_write[list(COLUNAS) + ['seq']].itertuples(index=False, name=None)
+            )
+            conn.executemany(
+                'INSERT OR REPLACE INTO employee_days (semana, nome, data, content_hash) VALUES (?, ?, ?, ?)',
+                [(*key, content_hash) for key, content_hash in changed]
+            )
+            summary['rows_written'] = len(to_write)
+
+        return summary
+
+    def weeks(self):
+        """Semanas gravadas, da mais antiga para a mais recente"""
+        with closing(self._connect()) as conn:
+            return [
+                semana for semana, _ in
+                conn.execute('SELECT semana, MIN(data) FROM employee_days GROUP BY semana ORDER BY MIN(data), semana')
+            ]
+
+    def fingerprint(self, weeks=None):
+        """
+        Hash do conteúdo gravado nas semanas, tirado só dos hashes de cada employee-dia: muda a cada
+        gravação que altera essas semanas, sem ler os atendimentos
+        """
+        sql = 'SELECT semana, nome, data, content_hash FROM employee_days'
+        params = []
+        if weeks:
+            clause, params = _in_clause('semana', weeks)
+            sql += f' WHERE {clause}'
+        digest = hashlib.sha1()
+        with closing(self._connect()) as conn:
+            for row in conn.execute(sql + ' ORDER BY semana, nome, data', params):
+                digest.update(repr(row).encode())
+        return digest.hexdigest()
+
+    @profiled('history_query')
+    def query(self, weeks=None, employees=None, categories=None):
+        """Atendimentos do histórico, com os filtros aplicados no próprio SQLite"""
+        conditions, params = [], []
+        for column, values in [('semana', weeks), ('nome', employees), ('categoria', categories)]:
+            if values:
+                clause, clause_params = _in_clause(column, values)
+                conditions.append(clause)
+                params.extend(clause_params)
+
+        sql = f"SELECT {', '.join(COLUNAS.values())} FROM appointments"
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY semana, nome, data, seq'
+
+        with closing(self._connect()) as conn:
+            data = pd.read_sql_query(sql, conn, params=params)
+
+        if data.empty:
+            return pd.DataFrame()
+        data.columns = list(COLUNAS)
+        data['Data'] = pd.to_datetime(data['Data'])
+        return apply_schema(data[list(APPOINTMENT_SCHEMA)])
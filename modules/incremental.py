@@ -0,0 +1,337 @@
+import hashlib
+import threading
+import zipfile
+from collections import OrderedDict
+from io import BytesIO
+from xml.etree import ElementTree
+
+import pandas as pd
+
+from .cache import _nbytes
+from .config import INCREMENTAL_MAX_BYTES, INCREMENTAL_MAX_SOURCES, STREAMING_MIN_BYTES
+from .data_processor import (
+    PARSER_VERSION,
+    _blocks_to_frame,
+    _combine_weeks,
+    _discard_spooled,
+    _find_blocks,
+    _iter_sheet_blocks,
+    _marker_rows,
+    _open_workbook,
+    _parse_block,
+    _sheet_values,
+    _spool_workbook,
+    _week_sheets,
+    _workbook_file
+)
+
+_MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+# Partes do .xlsx usadas por todas as abas: uma mudança nelas invalida o atalho por aba
+_SHARED_PARTS = ['xl/sharedStrings.xml', 'xl/styles.xml']
+
+# Um atendimento é identificado pelo employee/semana, dia, data e cliente (e a ordem, se repetido)
+CHAVE_ATENDIMENTO = ['Semana', 'Nome', 'Dia', 'Data', 'Cliente']
+CAMPOS_COMPARADOS = [
+    'Categoria', 'Origem', 'Services', 'Gorjeta', 'Products', 'Pagamento', 'ID Pagamento', 'Verificado', 'Realizado'
+]
+
+
+def sheet_fingerprints(content):
+    """
+    Fingerprint de cada aba WEEK tirado só do diretório do .xlsx (CRC32 e tamanho da parte da aba e das
+    partes compartilhadas), sem ler o XML das abas. None se o conteúdo não for um .xlsx reconhecível.
+    """
+    try:
+        with zipfile.ZipFile(BytesIO(content)) as archive:
+            infos = {info.filename: info for info in archive.infolist()}
+            workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+            rels = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    except (zipfile.BadZipFile, KeyError, ElementTree.ParseError):
+        return None
+
+    properties = workbook.find(f'{_MAIN_NS}workbookPr')
+    date1904 = properties.get('date1904') if properties is not None else None
+    shared = [f"{name}:{infos[name].CRC}:{infos[name].file_size}" for name in _SHARED_PARTS if name in infos]
+    streaming = len(content) >= STREAMING_MIN_BYTES
+    targets = {rel.get('Id'): rel.get('Target', '') for rel in rels}
+
+    keys = {}
+    for sheet in workbook.iter(f'{_MAIN_NS}sheet'):
+        name = sheet.get('name', '')
+        if not name.startswith('WEEK'):
+            continue
+        target = targets.get(sheet.get(f'{_REL_NS}id'), '')
+        info = infos.get(target.lstrip('/') if target.startswith('/') else f'xl/{target}')
+        if info is None:
+            return None
+        payload = [PARSER_VERSION, name, info.CRC, info.file_size, date1904, streaming, *shared]
+        keys[name] = hashlib.sha256(repr(payload).encode()).hexdigest()
+    return keys
+
+
+def _block_fingerprint(sheet_name, block):
+    digest = hashlib.sha256(f"{sheet_name}|{block.shape}".encode())
+    digest.update('\x1f'.join(map(str, block.ravel().tolist())).encode())
+    return digest.hexdigest()
+
+
+def _sheet_blocks(workbook, sheet_name):
+    """
+    (valores, linhas de cabeçalho) de cada bloco NAME: da aba, a partir dos bytes ou do caminho da planilha;
+    planilhas grandes são lidas em streaming
+    """
+    file, size = _workbook_file(workbook)
+    if size >= STREAMING_MIN_BYTES:
+        book = _open_workbook(file)
+        try:
+            for block in _iter_sheet_blocks(book[sheet_name]):
+                yield block, _marker_rows(block)[1]
+        finally:
+            book.close()
+        return
+
+    values = _sheet_values(pd.read_excel(file, sheet_name=sheet_name, header=None))
+    name_rows, header_rows = _marker_rows(values)
+    for start, end in _find_blocks(name_rows):
+        yield values[start:end], header_rows[start:end]
+
+
+def _parse_sheet_blocks_task(workbook, sheet_name, known=frozenset()):
+    """
+    Tarefa (thread ou processo do pool) de uma aba: fingerprints dos blocos na ordem da aba e as colunas
+    só dos blocos que não estão em known
+    """
+    order, parsed = [], {}
+    for block, header_rows in _sheet_blocks(workbook, sheet_name):
+        fingerprint = _block_fingerprint(sheet_name, block)
+        order.append(fingerprint)
+        if fingerprint not in known and fingerprint not in parsed:
+            parsed[fingerprint] = _parse_block(block, sheet_name, header_rows)
+    return order, parsed
+
+
+def _numbered(frame):
+    """Chave de cada atendimento (com a ocorrência, para atendimentos repetidos) e os campos comparados em texto"""
+    # Campos vazios viram '' antes da conversão para texto (NaN != NaN contaria como alteração)
+    frame = frame[CHAVE_ATENDIMENTO + CAMPOS_COMPARADOS]
+    frame = frame.astype(object).where(frame.notna(), '').astype(str)
+    frame['Ocorrencia'] = frame.groupby(CHAVE_ATENDIMENTO).cumcount()
+    return frame
+
+
+def appointment_changes(old, new):
+    """Atendimentos incluídos, alterados e removidos por employee/semana entre duas versões dos mesmos blocos"""
+    columns = ['Semana', 'Nome', 'Added', 'Changed', 'Removed']
+    vazio = pd.DataFrame(columns=CHAVE_ATENDIMENTO + CAMPOS_COMPARADOS)
+    old = _numbered(old if old is not None else vazio)
+    new = _numbered(new if new is not None else vazio)
+    if old.empty and new.empty:
+        return pd.DataFrame(columns=columns)
+
+    merged = old.merge(new, on=CHAVE_ATENDIMENTO + ['Ocorrencia'], how='outer', suffixes=('_old', '_new'), indicator=True)
+    changed = pd.Series(False, index=merged.index)
+    for campo in CAMPOS_COMPARADOS:
+        changed |= merged[f'{campo}_old'] != merged[f'{campo}_new']
+    merged['Added'] = merged['_merge'] == 'right_only'
+    merged['Removed'] = merged['_merge'] == 'left_only'
+    merged['Changed'] = (merged['_merge'] == 'both') & changed
+
+    summary = merged.groupby(['Semana', 'Nome'])[['Added', 'Changed', 'Removed']].sum().reset_index()
+    summary = summary[summary[['Added', 'Changed', 'Removed']].sum(axis=1) > 0]
+    return summary[columns].reset_index(drop=True)
+
+
+class IncrementalParser:
+    """
+    Releitura incremental de planilhas que voltam editadas. Para cada fonte (qualquer chave hashable: o
+    envio de uma sessão, um caminho ou uma URL) guarda o fingerprint de cada aba WEEK e de cada bloco
+    NAME: da última versão. Numa nova versão, abas iguais não são lidas, e nas abas alteradas só os
+    blocos novos são processados; o resultado é montado juntando as colunas dos blocos na ordem da
+    planilha, igual ao process_spreadsheet. changes(fonte) resume a última releitura. Guarda até
+    max_sources fontes e max_bytes de blocos (LRU); uma fonte descartada volta a ser lida por inteiro.
+    """
+
+    def __init__(self, max_sources=INCREMENTAL_MAX_SOURCES, max_bytes=INCREMENTAL_MAX_BYTES):
+        self.max_sources = max_sources
+        self.max_bytes = max_bytes
+        self._sources = OrderedDict()   # fonte -> {aba: (chave da aba, [fingerprints])}
+        self._sheets = {}               # chave da aba -> [fingerprints]
+        self._blocks = {}               # fingerprint -> colunas do bloco (None se não tiver atendimentos)
+        self._block_sizes = {}          # fingerprint -> bytes das colunas do bloco
+        self._changes = {}
+        self._remembering = set()
+        self._lock = threading.Lock()
+
+    def knows(self, source):
+        with self._lock:
+            return source in self._sources
+
+    def changes(self, source):
+        with self._lock:
+            return self._changes.get(source)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sources': len(self._sources),
+                'blocks': len(self._blocks),
+                'bytes': sum(self._block_sizes.values()),
+                'max_bytes': self.max_bytes
+            }
+
+    def _keep_blocks(self, parsed):
+        for fingerprint, block in parsed.items():
+            if fingerprint not in self._blocks:
+                self._blocks[fingerprint] = block
+                self._block_sizes[fingerprint] = _nbytes(pd.DataFrame(block)) if block is not None else 0
+
+    def submit(self, source, content, executor=None):
+        """Agenda a leitura das abas alteradas; o resultado sai em finish(pending)"""
+        keys = sheet_fingerprints(content)
+        if keys is None:
+            keys = dict.fromkeys(_week_sheets(content))
+
+        pending = {'source': source, 'content': content, 'keys': keys, 'reused': {}, 'futures': {}, 'results': {}}
+        with self._lock:
+            previous = self._sources.get(source, {})
+            for sheet, key in keys.items():
+                if key is not None and key in self._sheets:
+                    pending['reused'][sheet] = self._sheets[key]
+            known = {
+                sheet: frozenset(fingerprint for fingerprint in previous[sheet][1] if fingerprint in self._blocks)
+                for sheet in keys if sheet in previous and sheet not in pending['reused']
+            }
+
+        sheets = [sheet for sheet in keys if sheet not in pending['reused']]
+        if executor is None:
+            for sheet in sheets:
+                pending['results'][sheet] = _parse_sheet_blocks_task(content, sheet, known.get(sheet, frozenset()))
+        elif sheets:
+            # As tarefas do pool leem o mesmo arquivo temporário, apagado no finish
+            pending['spooled'] = _spool_workbook(content)
+            try:
+                for sheet in sheets:
+                    pending['futures'][sheet] = executor.submit(
+                        _parse_sheet_blocks_task, pending['spooled'], sheet, known.get(sheet, frozenset())
+                    )
+            except Exception:
+                _discard_spooled(pending['spooled'])
+                raise
+        return pending
+
+    def remember(self, source, content, executor=None):
+        """
+        Registra numa thread os blocos de uma fonte cujo DataFrame veio do cache em disco, para que a
+        próxima versão dela já seja relida de forma incremental. Devolve a thread, ou None se a mesma
+        fonte já estiver sendo registrada.
+        """
+        with self._lock:
+            if source in self._remembering:
+                return None
+            self._remembering.add(source)
+
+        def run():
+            try:
+                self.finish(self.submit(source, content, executor))
+            finally:
+                with self._lock:
+                    self._remembering.discard(source)
+
+        thread = threading.Thread(target=run, name='jobtrack-remember', daemon=True)
+        thread.start()
+        return thread
+
+    def finish(self, pending):
+        """DataFrame da nova versão (mesmo formato do process_spreadsheet); registra o resumo das mudanças"""
+        results = dict(pending['results'])
+        try:
+            results.update((sheet, future.result()) for sheet, future in pending['futures'].items())
+        finally:
+            if 'spooled' in pending:
+                _discard_spooled(pending['spooled'])
+        reused = dict(pending['reused'])
+        source, keys = pending['source'], pending['keys']
+
+        while True:
+            with self._lock:
+                for _, parsed in results.values():
+                    self._keep_blocks(parsed)
+                orders = {sheet: reused[sheet] if sheet in reused else results[sheet][0] for sheet in keys}
+                # Bloco conhecido (de aba alterada ou reaproveitada) descartado por outra leitura entre submit e
+                # finish: essas abas são processadas de novo por inteiro, fora do lock
+                missing = [
+                    sheet for sheet in keys if any(fingerprint not in self._blocks for fingerprint in orders[sheet])
+                ]
+                if not missing:
+                    previous = self._sources.pop(source, None)
+                    self._sources[source] = {sheet: (keys[sheet], orders[sheet]) for sheet in keys}
+                    for sheet, key in keys.items():
+                        if key is not None:
+                            self._sheets[key] = orders[sheet]
+
+                    week_frames = [
+                        _blocks_to_frame(self._blocks[fingerprint] for fingerprint in orders[sheet]) for sheet in keys
+                    ]
+                    self._changes[source] = self._summarize(previous, orders, results)
+                    self._prune(keep_changes=source)
+                    break
+            for sheet in missing:
+                reused.pop(sheet, None)
+                results[sheet] = _parse_sheet_blocks_task(pending['content'], sheet)
+
+        return _combine_weeks([frame for frame in week_frames if frame is not None])
+
+    def _summarize(self, previous, orders, results):
+        total_blocks = sum(len(order) for order in orders.values())
+        parsed_blocks = sum(len(parsed) for _, parsed in results.values())
+        summary = {
+            'first_load': previous is None,
+            'sheets_read': len(results),
+            'sheets_reused': len(orders) - len(results),
+            'blocks_parsed': parsed_blocks,
+            'blocks_reused': total_blocks - parsed_blocks,
+            'added': 0,
+            'changed': 0,
+            'removed': 0,
+            'details': pd.DataFrame(columns=['Semana', 'Nome', 'Added', 'Changed', 'Removed'])
+        }
+        if previous is None:
+            return summary
+
+        # Só os blocos que entraram ou saíram podem ter atendimentos diferentes
+        old = [fingerprint for _, order in previous.values() for fingerprint in order]
+        new = [fingerprint for order in orders.values() for fingerprint in order]
+        old_set, new_set = set(old), set(new)
+        removed = _blocks_to_frame(self._blocks[fingerprint] for fingerprint in old if fingerprint not in new_set)
+        added = _blocks_to_frame(self._blocks[fingerprint] for fingerprint in new if fingerprint not in old_set)
+        details = appointment_changes(removed, added)
+        summary.update(
+            added=int(details['Added'].sum()),
+            changed=int(details['Changed'].sum()),
+            removed=int(details['Removed'].sum()),
+            details=details
+        )
+        return summary
+
+    def _prune(self, keep_changes=None):
+        """
+        Descarta as fontes menos usadas até caber em max_sources e max_bytes, com os blocos e abas só delas.
+        O resumo de keep_changes (a fonte que acabou de ser lida) fica mesmo se ela for descartada.
+        """
+        while True:
+            used = {
+                fingerprint for state in self._sources.values() for _, order in state.values() for fingerprint in order
+            }
+            self._blocks = {fingerprint: block for fingerprint, block in self._blocks.items() if fingerprint in used}
+            self._block_sizes = {fingerprint: size for fingerprint, size in self._block_sizes.items() if fingerprint in used}
+            if len(self._sources) <= self.max_sources and sum(self._block_sizes.values()) <= self.max_bytes:
+                break
+            self._sources.popitem(last=False)
+
+        self._changes = {
+            source: summary for source, summary in self._changes.items()
+            if source in self._sources or source == keep_changes
+        }
+        referenced = {key for state in self._sources.values() for key, _ in state.values()}
+        self._sheets = {key: order for key, order in self._sheets.items() if key in referenced}
@@ -0,0 +1,184 @@
+import contextvars
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import JOB_WORKERS, JOB_HISTORY
+
+
+class JobCancelled(Exception):
+    """Levantada pela própria tarefa (Job.raise_if_cancelled) para parar assim que o job é cancelado"""
+
+
+class Job:
+    """
+    Uma tarefa em segundo plano: estado (queued, running, done, failed ou cancelled), resultado ou erro,
+    e um dicionário de andamento que a própria tarefa atualiza
+    """
+
+    def __init__(self, group, name):
+        self.group = group
+        self.name = name
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.progress = {}
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.future = None
+        self._cancel = threading.Event()
+        self._finished = threading.Event()
+
+    @property
+    def cancelled(self):
+        """Verificado pela própria tarefa entre etapas para parar mais cedo"""
+        return self._cancel.is_set()
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled(self.name)
+
+    def done(self):
+        return self.status in ('done', 'failed', 'cancelled')
+
+    def wait(self, timeout=None):
+        """Espera o fim do job (no máximo timeout segundos); True se terminou"""
+        return self._finished.wait(timeout)
+
+    def cancel(self):
+        """
+        Job na fila não chega a rodar; job em execução para no próximo raise_if_cancelled da tarefa
+        (ou termina, se ela não verificar) e o resultado é descartado
+        """
+        self._cancel.set()
+        if self.future is not None:
+            self.future.cancel()
+        if not self.done():
+            self.status = 'cancelled'
+            self.finished = time.time()
+            self._finished.set()
+
+    def seconds(self):
+        if self.started is None:
+            return None
+        return (self.finished or time.time()) - self.started
+
+    def info(self):
+        seconds = self.seconds()
+        return {
+            'Job': self.name,
+            'Status': self.status,
+            'Seconds': round(seconds, 2) if seconds is not None else None,
+            'Error': self.error
+        }
+
+
+class JobRunner:
+    """
+    Executa tarefas em threads, agrupadas por chave (ex.: fingerprint do dataset + filtros). Um job
+    já enviado com o mesmo (grupo, nome) é reaproveitado em vez de repetido, inclusive entre sessões;
+    jobs que falharam ou foram cancelados são enviados de novo. Guarda no máximo history jobs terminados.
+
+    Como um grupo pode ser usado por várias sessões ao mesmo tempo, cada uma o registra com hold e o
+    libera com release: os jobs do grupo só são cancelados quando a última sessão sai dele.
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS, history=JOB_HISTORY):
+        self.history = history
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='jobtrack-job')
+        self._jobs = OrderedDict()
+        self._holders = {}
+        self._lock = threading.Lock()
+
+    def submit(self, group, name, func, *args, **kwargs):
+        """
+        Agenda func(job, *args, **kwargs) e devolve o Job (o existente, se ainda for válido). A tarefa roda
+        numa cópia do contexto de quem submeteu, para herdar o profiler ativo da execução.
+        """
+        with self._lock:
+            job = self._jobs.get((group, name))
+            if job is not None and job.status not in ('failed', 'cancelled'):
+                return job
+            job = Job(group, name)
+            self._jobs[(group, name)] = job
+            self._jobs.move_to_end((group, name))
+            self._prune()
+            context = contextvars.copy_context()
+            job.future = self._executor.submit(context.run, self._run, job, func, args, kwargs)
+        return job
+
+    def _run(self, job, func, args, kwargs):
+        if job.cancelled:
+            return
+        job.status = 'running'
+        job.started = time.time()
+        try:
+            result = func(job, *args, **kwargs)
+        except JobCancelled:
+            pass
+        except Exception as error:
+            if not job.cancelled:
+                job.error = str(error)
+                job.status = 'failed'
+        else:
+            if not job.cancelled:
+                job.result = result
+                job.status = 'done'
+        finally:
+            if job.cancelled:
+                job.status = 'cancelled'
+            if job.finished is None:
+                job.finished = time.time()
+            job._finished.set()
+
+    def _prune(self):
+        finished = [key for key, job in self._jobs.items() if job.done()]
+        for key in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[key]
+
+    def get(self, group, name):
+        with self._lock:
+            return self._jobs.get((group, name))
+
+    def forget(self, group, name, owner=None):
+        """
+        Descarta o job para que o próximo submit rode a tarefa de novo. Um job ainda em andamento que outra
+        sessão (além de owner) também usa fica como está: ele já é uma execução nova da tarefa.
+        """
+        with self._lock:
+            job = self._jobs.get((group, name))
+            if job is None or (not job.done() and self._holders.get(group, set()) - {owner}):
+                return
+            del self._jobs[(group, name)]
+        job.cancel()
+
+    def hold(self, group, owner):
+        """Registra que a sessão owner está usando o grupo"""
+        with self._lock:
+            self._holders.setdefault(group, set()).add(owner)
+
+    def release(self, group, owner):
+        """
+        A sessão owner deixou o grupo; se nenhuma outra o usa, os jobs dele ainda não terminados são
+        cancelados. Devolve quantos foram cancelados.
+        """
+        with self._lock:
+            holders = self._holders.get(group, set())
+            holders.discard(owner)
+            if holders:
+                return 0
+            self._holders.pop(group, None)
+        return self.cancel_group(group)
+
+    def jobs(self, group):
+        with self._lock:
+            return [job for (job_group, _), job in self._jobs.items() if job_group == group]
+
+    def cancel_group(self, group):
+        """Cancela os jobs ainda não terminados do grupo; devolve quantos foram cancelados"""
+        pending = [job for job in self.jobs(group) if not job.done()]
+        for job in pending:
+            job.cancel()
+        return len(pending)
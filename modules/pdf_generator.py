@@ -1,11 +1,20 @@
-from fpdf import FPDF
 from datetime import datetime
+from itertools import repeat
+import tempfile
+import time
+import zipfile
 import pandas as pd
 from .utils import format_currency
-from .config import FORMAS_PAGAMENTO_VALIDAS
+from .config import EXPORT_SPOOL_BYTES, FORMAS_PAGAMENTO_VALIDAS
+from .profiling import profiled
 
+# fpdf é importado nas funções que geram PDF: o app abre sem carregá-lo
 
+
+@profiled('pdf_report')
 def create_pdf(data):
+    from fpdf import FPDF
+
     pdf = FPDF(orientation='P', unit='mm', format='A4')
     pdf.add_page()
     pdf.set_auto_page_break(auto=True, margin=15)
@@ -45,7 +54,7 @@ def create_pdf(data):
     pdf.set_font("Arial", 'B', 14)
     pdf.cell(page_width, 10, txt="Summary per Employee", ln=1)
 
-    summary = completed_services.groupby(['Nome', 'Categoria']).agg({
+    summary = completed_services.groupby(['Nome', 'Categoria'], observed=True).agg({
         'Services': 'sum',
         'Gorjeta': 'sum',
         'Pagamento Employee': 'sum',
@@ -78,7 +87,9 @@ def create_pdf(data):
     return pdf
 
 
-def create_employee_payment_receipt(emp_data, emp_name, week):
+def create_employee_payment_receipt(emp_data, emp_name, week, issue_date=None):
+    from fpdf import FPDF
+
     pdf = FPDF(orientation='P', unit='mm', format='A4')
     pdf.add_page()
 
@@ -99,7 +110,7 @@ def create_employee_payment_receipt(emp_data, emp_name, week):
     pdf.set_font("Arial", size=10)
     pdf.cell(page_width, 8, txt=f"Employee: {emp_name}", ln=1)
     pdf.cell(page_width, 8, txt=f"Reference: {date_range}", ln=1)
-    pdf.cell(page_width, 8, txt=f"Issue Date: {datetime.now().strftime('%m/%d/%Y')}", ln=1)
+    pdf.cell(page_width, 8, txt=f"Issue Date: {issue_date or datetime.now().strftime('%m/%d/%Y')}", ln=1)
     pdf.ln(10)
 
     pdf.set_font("Arial", 'B', 14)
@@ -132,7 +143,9 @@ def create_employee_payment_receipt(emp_data, emp_name, week):
     return pdf
 
 
-def create_employee_of_the_week_receipt(emp_data, emp_name, week):
+def create_employee_of_the_week_receipt(emp_data, emp_name, week, issue_date=None):
+    from fpdf import FPDF
+
     pdf = FPDF(orientation='P', unit='mm', format='A4')
     pdf.add_page()
 
@@ -162,10 +175,74 @@ def create_employee_of_the_week_receipt(emp_data, emp_name, week):
     pdf.set_font("Arial", '', 11)
     pdf.cell(page_width, 8, txt=f"Employee: {emp_name}", ln=1)
     pdf.cell(page_width, 8, txt=f"Reference: {date_range}", ln=1)
-    pdf.cell(page_width, 8, txt=f"Issue Date: {datetime.now().strftime('%m/%d/%Y')}", ln=1)
+    pdf.cell(page_width, 8, txt=f"Issue Date: {issue_date or datetime.now().strftime('%m/%d/%Y')}", ln=1)
 
     pdf.ln(20)
     pdf.set_font("Arial", 'I', 10)
     pdf.cell(page_width, 5, txt="This certificate was generated automatically.", ln=1, align='C')
 
     return pdf
+
+
+RECEIPT_BUILDERS = {
+    'payment': (create_employee_payment_receipt, 'receipt'),
+    'employee_of_the_week': (create_employee_of_the_week_receipt, 'employee_of_the_week')
+}
+
+
+def _render_receipt(job, issue_date):
+    kind, emp_data, emp_name, week = job
+    builder, _ = RECEIPT_BUILDERS[kind]
+    pdf = builder(emp_data, emp_name, week, issue_date=issue_date)
+    return pdf.output(dest='S').encode('latin-1')
+
+
+def receipt_jobs(completed_services, kind='payment', pairs=None):
+    """
+    Uma tarefa por employee/semana de completed_services (ou só pelos pares (employee, semana) informados).
+    Cada tarefa leva apenas as colunas usadas no recibo.
+    """
+    columns = ['Nome', 'Semana', 'Data', 'Services', 'Gorjeta', 'Pagamento Employee']
+    data = completed_services[columns]
+    jobs = []
+    for (emp_name, week), emp_data in data.groupby(['Nome', 'Semana'], observed=True, sort=True):
+        if pairs is not None and (emp_name, week) not in pairs:
+            continue
+        jobs.append((kind, emp_data.drop(columns=['Nome', 'Semana']), str(emp_name), str(week)))
+    return jobs
+
+
+@profiled('pdf_receipts')
+def create_receipts_zip(jobs, executor=None, cancelled=None):
+    """
+    Gera os PDFs das tarefas (em paralelo quando há executor) e grava cada um no ZIP assim que fica pronto.
+    Retorna o arquivo ZIP (posicionado no início) e as estatísticas de throughput. Se cancelled() ficar
+    verdadeiro, para no recibo seguinte (os que ainda estão na fila do executor são cancelados) e o ZIP
+    sai incompleto; quem cancelou deve descartá-lo.
+    """
+    start = time.perf_counter()
+    issue_date = datetime.now().strftime('%m/%d/%Y')
+    if executor is None:
+        rendered = map(_render_receipt, jobs, repeat(issue_date))
+    else:
+        rendered = executor.map(_render_receipt, jobs, repeat(issue_date))
+
+    archive = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_BYTES)
+    with zipfile.ZipFile(archive, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for (kind, _, emp_name, week), pdf_bytes in zip(jobs, rendered):
+            if cancelled is not None and cancelled():
+                if executor is not None:
+                    rendered.close()
+                break
+            prefix = RECEIPT_BUILDERS[kind][1]
+            zf.writestr(f"{prefix}_{emp_name}_{week}.pdf", pdf_bytes)
+
+    elapsed = time.perf_counter() - start
+    size = archive.tell()
+    archive.seek(0)
+    return archive, {
+        'receipts': len(jobs),
+        'seconds': elapsed,
+        'receipts_per_second': len(jobs) / elapsed if elapsed else 0.0,
+        'bytes': size
+    }
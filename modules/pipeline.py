@@ -0,0 +1,67 @@
+from .calculations import calcular_pagamentos_individuais
+from .config import INVALID_CLIENTS
+from .profiling import profiled
+from .cube import (
+    build_cube,
+    filter_cube,
+    weekly_totals_from_cube,
+    allocate_cube,
+    kpis,
+    employee_summary,
+    payment_method_summary
+)
+
+_INVALID_CLIENTS_UPPER = [c.upper() for c in INVALID_CLIENTS]
+
+
+@profiled('clean')
+def clean_appointments(data):
+    """Remove linhas sem employee e linhas de totais (SERVICES IN:, TOTAL:, ...)"""
+    data = data[data['Nome'].notna() & (data['Nome'].astype(str).str.strip() != '')]
+    return data[~data['Cliente'].astype(str).str.strip().str.upper().isin(_INVALID_CLIENTS_UPPER)]
+
+
+def filter_appointments(data, weeks=None, employees=None, categories=None):
+    if weeks:
+        data = data[data['Semana'].isin(weeks)]
+    if employees:
+        data = data[data['Nome'].isin(employees)]
+    if categories:
+        data = data[data['Categoria'].isin(categories)]
+    return data
+
+
+@profiled('payroll')
+def compute_payroll(cube, weeks=None, employees=None, categories=None):
+    """Folha de pagamento e métricas a partir do cubo (o mesmo caminho usado pelo dashboard e pela CLI)"""
+    cube = filter_cube(cube, weeks, employees, categories)
+    weekly_totals = weekly_totals_from_cube(cube)
+    allocated = allocate_cube(cube, weekly_totals)
+    return {
+        'cube': cube,
+        'weekly_totals': weekly_totals,
+        'allocated': allocated,
+        'metrics': kpis(cube, allocated),
+        'employee_summary': employee_summary(weekly_totals),
+        'payment_summary': payment_method_summary(allocated)
+    }
+
+
+@profiled('allocation')
+def allocate_appointments(data, weekly_totals):
+    """Atendimentos concluídos, cada um com sua parte de Pagamento Employee / Lucro Empresa"""
+    completed_services = data[data['Realizado']].copy()
+    completed_services[['Pagamento Employee', 'Lucro Empresa']] = calcular_pagamentos_individuais(
+        completed_services, weekly_totals
+    )
+    return completed_services
+
+
+def run_pipeline(data, weeks=None, employees=None, categories=None):
+    """Pipeline completo sobre os atendimentos já carregados: limpeza, filtros, cubo e folha"""
+    data = clean_appointments(data)
+    result = compute_payroll(build_cube(data), weeks, employees, categories)
+    data = filter_appointments(data, weeks, employees, categories)
+    result['data'] = data
+    result['completed_services'] = allocate_appointments(data, result['weekly_totals'])
+    return result
@@ -0,0 +1,194 @@
+import json
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import wraps
+
+import pandas as pd
+
+from .config import PROFILE_LOG_PATH
+
+_ACTIVE = ContextVar('jobtrack_profiler', default=None)
+_logger = logging.getLogger('jobtrack.performance')
+
+# O tracemalloc é do processo inteiro: ligado enquanto algum profiler com memória estiver ativo, e as
+# etapas medidas em andamento (por thread) marcam umas às outras quando rodam ao mesmo tempo
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_started = False
+_open_stages = {}
+
+
+def _configure_logger():
+    if _logger.handlers:
+        return
+    handler = logging.FileHandler(PROFILE_LOG_PATH) if PROFILE_LOG_PATH else logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    _logger.addHandler(handler)
+    _logger.setLevel(logging.INFO)
+    _logger.propagate = False
+
+
+def _start_tracing():
+    global _tracing_users, _tracing_started
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_started = True
+        _tracing_users += 1
+
+
+def _stop_tracing():
+    global _tracing_users, _tracing_started
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_started:
+            tracemalloc.stop()
+            _tracing_started = False
+
+
+def _count_rows(result):
+    """Linhas do resultado de uma etapa: DataFrame, lista de DataFrames ou o dicionário da folha/conciliação"""
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        return len(result)
+    if isinstance(result, dict) and 'weekly_totals' in result:
+        return len(result['weekly_totals'])
+    if isinstance(result, dict) and 'exceptions' in result:
+        return len(result['exceptions'])
+    if isinstance(result, (list, tuple)) and result and all(isinstance(r, pd.DataFrame) for r in result):
+        return sum(len(r) for r in result)
+    return None
+
+
+class Profiler:
+    """
+    Mede as etapas de uma execução (tempo, linhas e pico de memória) e registra cada uma como log JSON.
+    O pico é o da memória do processo inteiro durante a etapa; quando outra etapa medida roda ao mesmo
+    tempo em outra thread (outra sessão ou um job em segundo plano), o pico das duas fica sem valor.
+    """
+
+    def __init__(self, memory=False, log=True):
+        self.memory = memory
+        self.log = log
+        self.run_id = uuid.uuid4().hex[:12]
+        self.records = []
+        self._local = threading.local()
+        if log:
+            _configure_logger()
+
+    @contextmanager
+    def activate(self):
+        """Torna este profiler o ativo para @profiled (nos módulos) durante o bloco"""
+        if self.memory:
+            _start_tracing()
+        token = _ACTIVE.set(self)
+        try:
+            yield self
+        finally:
+            _ACTIVE.reset(token)
+            if self.memory:
+                _stop_tracing()
+
+    @property
+    def _stack(self):
+        """Etapas abertas da thread atual; jobs em segundo plano (JobRunner) medem em paralelo à página"""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """Mede o bloco; o registro é devolvido para que a etapa possa informar 'rows' no final"""
+        record = {'stage': name, 'depth': len(self._stack), 'seconds': None, 'rows': rows, 'peak_mb': None}
+        thread = threading.get_ident()
+        with _tracing_lock:
+            tracing = self.memory and tracemalloc.is_tracing()
+            if tracing:
+                others = [other for ident, stages in _open_stages.items() if ident != thread for other in stages]
+                for other in others:
+                    other['_shared'] = True
+                record['_shared'] = bool(others)
+                record['_peak_seen'] = 0
+                _open_stages.setdefault(thread, []).append(record)
+                # O pico é global: guarda o já visto antes de zerá-lo, para devolver à etapa de fora na saída
+                start_memory, peak_before = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+        self._stack.append(record)
+        self.records.append(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            self._stack.pop()
+            if tracing:
+                with _tracing_lock:
+                    _open_stages[thread] = [other for other in _open_stages[thread] if other is not record]
+                    if not _open_stages[thread]:
+                        del _open_stages[thread]
+                    # Desligado no meio da etapa (o último profiler com memória saiu): sem pico confiável
+                    shared = record.pop('_shared') or not tracemalloc.is_tracing()
+                    _, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, record.pop('_peak_seen'))
+                if not shared:
+                    record['peak_mb'] = max(peak - start_memory, 0) / 1024 ** 2
+                if self._stack:
+                    parent = self._stack[-1]
+                    parent['_peak_seen'] = max(parent.get('_peak_seen', 0), peak_before, peak)
+            if self.log:
+                _logger.info(json.dumps({'event': 'stage', 'run': self.run_id, **record}, default=str))
+
+    def _snapshot(self):
+        """Cópia dos registros: jobs em segundo plano continuam acrescentando etapas enquanto a página lê"""
+        return [dict(record) for record in list(self.records)]
+
+    def report(self):
+        """Uma linha por etapa, na ordem em que começaram (etapas ainda em andamento ficam sem tempo)"""
+        records = self._snapshot()
+        if not records:
+            return pd.DataFrame(columns=['Stage', 'Seconds', 'Rows', 'Process Peak MB'])
+        report = pd.DataFrame(records)
+        report['Stage'] = ['  ' * depth + stage for depth, stage in zip(report['depth'], report['stage'])]
+        report = report.rename(columns={'seconds': 'Seconds', 'rows': 'Rows', 'peak_mb': 'Process Peak MB'})
+        report['Rows'] = report['Rows'].astype('Int64')
+        return report[['Stage', 'Seconds', 'Rows', 'Process Peak MB']].round(4)
+
+    def timings(self):
+        return {
+            record['stage']: round(record['seconds'], 4)
+            for record in self._snapshot() if record['depth'] == 0 and record['seconds'] is not None
+        }
+
+
+def current_profiler():
+    return _ACTIVE.get()
+
+
+def stage(name, rows=None):
+    """Profiler.stage do profiler ativo, ou um bloco vazio quando a instrumentação está desligada"""
+    profiler = _ACTIVE.get()
+    if profiler is None:
+        return nullcontext({})
+    return profiler.stage(name, rows)
+
+
+def profiled(name):
+    """Decorator para pontos de entrada dos módulos; sem profiler ativo chama a função direto"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = _ACTIVE.get()
+            if profiler is None:
+                return func(*args, **kwargs)
+            with profiler.stage(name) as record:
+                result = func(*args, **kwargs)
+                record['rows'] = _count_rows(result)
+            return result
+        return wrapper
+    return decorator
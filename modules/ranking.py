@@ -0,0 +1,40 @@
+def weekly_ranking(allocated):
+    """
+    Ranking de todas as semanas de uma vez: atendimentos concluídos por employee/semana, média da semana,
+    produtividade em relação à média e posição (1 = mais atendimentos). Best/Lowest marcam um único employee
+    por semana (empates ficam com o primeiro employee da semana).
+    """
+    ranking = allocated.groupby(['Semana', 'Nome'], observed=True).agg(
+        Appointments=('Clientes', 'sum'),
+        Services=('Services', 'sum')
+    ).reset_index()
+    if ranking.empty:
+        return ranking.assign(**{'Week Average': [], 'Productivity': [], 'Rank': [], 'Best': [], 'Lowest': []})
+
+    by_week = ranking.groupby('Semana', observed=True)['Appointments']
+    ranking['Week Average'] = by_week.transform('mean')
+    ranking['Productivity'] = (ranking['Appointments'] / ranking['Week Average'] - 1) * 100
+    ranking['Rank'] = by_week.rank(method='min', ascending=False).astype(int)
+    ranking['Best'] = by_week.rank(method='first', ascending=False) == 1
+    ranking['Lowest'] = by_week.rank(method='first', ascending=True) == 1
+    return ranking
+
+
+def week_winners(ranking):
+    """Employee of the Week de cada semana"""
+    return ranking[ranking['Best']].reset_index(drop=True)
+
+
+def leaderboard(ranking):
+    """Uma linha por employee com o desempenho em todas as semanas do ranking"""
+    board = ranking.groupby('Nome', observed=True).agg(**{
+        'Weeks': ('Semana', 'count'),
+        'Wins': ('Best', 'sum'),
+        'Average Rank': ('Rank', 'mean'),
+        'Best Rank': ('Rank', 'min'),
+        'Appointments': ('Appointments', 'sum'),
+        'Average Productivity': ('Productivity', 'mean')
+    }).reset_index()
+    board = board.sort_values(['Wins', 'Average Rank', 'Appointments'], ascending=[False, True, False])
+    board.insert(0, 'Position', range(1, len(board) + 1))
+    return board.rename(columns={'Nome': 'Employee'}).reset_index(drop=True)
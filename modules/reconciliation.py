@@ -0,0 +1,347 @@
+import io
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from .config import (
+    STATEMENT_COLUMNS,
+    RECONCILIATION_SKIP_METHODS,
+    RECONCILIATION_AMOUNT_TOLERANCE,
+    RECONCILIATION_DATE_WINDOW_DAYS
+)
+from .profiling import profiled
+
+COLUNAS_EXTRATO = ['Statement', 'Line', 'ID', 'Date', 'Amount', 'Method']
+COLUNAS_EXCECOES = [
+    'Issue', 'Semana', 'Nome', 'Data', 'Cliente', 'Pagamento', 'ID Pagamento', 'Verificado', 'Appointments',
+    'Expected', 'Received', 'Difference', 'Transactions', 'Statement', 'Statement Lines', 'Statement Date',
+    'Statement ID', 'Statement Method'
+]
+# Ordem das exceções no relatório
+PROBLEMAS = ['Duplicate transaction', 'Amount mismatch', 'Missing payment', 'Unknown method', 'Unmatched transaction']
+_IDS_VAZIOS = ['', 'NAN', 'NONE', '<NA>']
+
+
+def _normalize_id(series):
+    """IDs comparáveis entre planilha e extrato: texto sem espaços, em maiúsculas, e 1234.0 vira 1234"""
+    text = series.astype('string').str.strip().str.upper().str.replace(r'\.0+$', '', regex=True)
+    return text.mask(text.isin(_IDS_VAZIOS))
+
+
+def _parse_amount(series):
+    """Valores do extrato ('$1,234.50', '(12.00)', '-12.00') em float; o que não for número vira NaN"""
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float)
+    text = series.astype('string').str.strip()
+    negative = text.str.startswith('(') & text.str.endswith(')')
+    numbers = pd.to_numeric(text.str.replace(r'[^0-9.\-]', '', regex=True), errors='coerce')
+    return numbers.where(~negative.fillna(False), -numbers.abs()).astype(float)
+
+
+def _parse_dates(series):
+    """Datas do extrato sem horário; formatos diferentes no mesmo arquivo são lidos um a um"""
+    dates = pd.to_datetime(series, errors='coerce')
+    missing = dates.isna() & series.notna()
+    if missing.any():
+        dates[missing] = pd.to_datetime(series[missing], errors='coerce', format='mixed')
+    if getattr(dates.dt, 'tz', None) is not None:
+        dates = dates.dt.tz_localize(None)
+    return dates.dt.normalize()
+
+
+def _find_column(columns, field):
+    # 'Created (UTC)' e 'Amount (USD)' valem como 'created' e 'amount'
+    names = {re.sub(r'\s*\(.*\)$', '', str(col).strip().lower()): col for col in columns}
+    for alias in STATEMENT_COLUMNS[field]:
+        if alias in names:
+            return names[alias]
+    return None
+
+
+def load_statement(file, name=None):
+    """
+    Lê um extrato em CSV (caminho, bytes ou arquivo aberto) e devolve as colunas de COLUNAS_EXTRATO.
+    As colunas são achadas pelos nomes de STATEMENT_COLUMNS; ID e forma de pagamento são opcionais.
+    Linhas sem data ou valor (saldos, totais) ficam de fora.
+    """
+    if isinstance(file, bytes):
+        file = io.BytesIO(file)
+    name = name or os.path.basename(str(getattr(file, 'name', None) or (file if isinstance(file, str) else 'statement')))
+
+    raw = pd.read_csv(file, dtype=str, encoding='utf-8-sig', skipinitialspace=True)
+    if len(raw.columns) == 1 and ';' in str(raw.columns[0]):
+        # Extratos exportados com ponto e vírgula
+        if hasattr(file, 'seek'):
+            file.seek(0)
+        raw = pd.read_csv(file, dtype=str, encoding='utf-8-sig', skipinitialspace=True, sep=';')
+
+    columns = {field: _find_column(raw.columns, field) for field in STATEMENT_COLUMNS}
+    for field in ('date', 'amount'):
+        if columns[field] is None:
+            raise ValueError(
+                f"Statement {name} has no {field} column (expected one of: {', '.join(STATEMENT_COLUMNS[field])})"
+            )
+
+    def column(field):
+        if columns[field] is None:
+            return pd.Series(pd.NA, index=raw.index, dtype='string')
+        return raw[columns[field]].astype('string').str.strip()
+
+    statement = pd.DataFrame({
+        'Statement': name,
+        'Line': raw.index + 2,  # linha 1 é o cabeçalho
+        'ID': column('id'),
+        'Date': _parse_dates(raw[columns['date']]),
+        'Amount': _parse_amount(raw[columns['amount']]),
+        'Method': column('method')
+    }, columns=COLUNAS_EXTRATO)
+    return statement[statement['Date'].notna() & statement['Amount'].notna()].reset_index(drop=True)
+
+
+def load_statements(files, names=None):
+    """Vários extratos num único DataFrame (um banco e uma processadora, vários meses, ...)"""
+    names = names or [None] * len(files)
+    frames = [load_statement(file, name) for file, name in zip(files, names)]
+    if not frames:
+        return pd.DataFrame(columns=COLUNAS_EXTRATO)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _cents(values):
+    return np.round(np.asarray(values, dtype=float) * 100).astype(np.int64)
+
+
+def _pair_by_amount_and_date(due, transactions, window):
+    """
+    Pareamento um a um por (data, valor em centavos): índices de hash dos dois lados, com a ordem de
+    ocorrência na chave para que N atendimentos iguais no mesmo dia casem com no máximo N lançamentos.
+    O lançamento pode cair até window dias depois do atendimento; cada deslocamento é uma junção à parte.
+    """
+    pairs = []
+    for offset in range(window + 1):
+        if due.empty or transactions.empty:
+            break
+        left = pd.DataFrame({'_row': due['_row'], '_date': due['_date'] + pd.Timedelta(days=offset), '_cents': due['_cents']})
+        right = transactions[['_txn', '_date', '_cents']]
+        left['_n'] = left.groupby(['_date', '_cents'], sort=False).cumcount()
+        right = right.assign(_n=right.groupby(['_date', '_cents'], sort=False).cumcount())
+        matched = left.merge(right, on=['_date', '_cents', '_n'])[['_row', '_txn']]
+        pairs.append(matched)
+        due = due[~due['_row'].isin(matched['_row'])]
+        transactions = transactions[~transactions['_txn'].isin(matched['_txn'])]
+    pairs = pd.concat(pairs, ignore_index=True) if pairs else pd.DataFrame(columns=['_row', '_txn'])
+    return pairs, due, transactions
+
+
+def _pair_by_id(due, transactions):
+    """
+    Pareamento um a um dentro de cada ID: primeiro mesmo ID e mesmo valor (com a ordem de ocorrência),
+    depois o que sobrou na ordem da planilha e do extrato. Lançamentos a mais no ID ficam sem par (são os
+    duplicados); atendimentos a mais (um pagamento para vários serviços) também.
+    """
+    left = due[['_row', '_id', '_cents']]
+    right = transactions[['_txn', '_id', '_cents']]
+    left = left.assign(_n=left.groupby(['_id', '_cents'], sort=False).cumcount())
+    right = right.assign(_n=right.groupby(['_id', '_cents'], sort=False).cumcount())
+    exact = left.merge(right, on=['_id', '_cents', '_n'])[['_row', '_txn']]
+
+    left = left[~left['_row'].isin(exact['_row'])]
+    right = right[~right['_txn'].isin(exact['_txn'])]
+    left = left.assign(_n=left.groupby('_id', sort=False).cumcount())
+    right = right.assign(_n=right.groupby('_id', sort=False).cumcount())
+    rest = left.merge(right, on=['_id', '_n'])[['_row', '_txn']]
+    return pd.concat([exact, rest], ignore_index=True)
+
+
+def _appointment_fields(rows):
+    return {
+        'Semana': rows['Semana'].astype(object).to_numpy(),
+        'Nome': rows['Nome'].astype(object).to_numpy(),
+        'Data': rows['_date'].to_numpy(),
+        'Cliente': rows['Cliente'].astype(object).to_numpy(),
+        'Pagamento': rows['Pagamento'].astype(object).to_numpy(),
+        'ID Pagamento': rows['ID Pagamento'].astype(object).to_numpy(),
+        'Verificado': rows['Verificado'].to_numpy()
+    }
+
+
+@profiled('reconciliation')
+def reconcile_payments(appointments, statement, amount_tolerance=RECONCILIATION_AMOUNT_TOLERANCE,
+                       window=RECONCILIATION_DATE_WINDOW_DAYS, skip_methods=RECONCILIATION_SKIP_METHODS):
+    """
+    Concilia os atendimentos concluídos (valor = serviço + gorjeta) com os lançamentos do extrato.
+
+    1. Atendimentos e lançamentos com ID são agrupados por ID (índice de hash dos dois lados) e juntados:
+       um ID com mais lançamentos do que atendimentos é 'Duplicate transaction'; totais diferentes (além
+       de amount_tolerance) são 'Amount mismatch'. Um ID em vários atendimentos (um pagamento para vários
+       serviços) é comparado com a soma deles. Nos pares (matches), cada lançamento vai para um único
+       atendimento do mesmo ID, de preferência o de mesmo valor; atendimentos que dividem um pagamento
+       saem como 'Payment ID (shared)', sem valor recebido próprio.
+    2. O que sobrou dos dois lados (formas sem ID, IDs que não aparecem no extrato, extratos de banco sem
+       ID) é pareado um a um por data e valor.
+    3. Atendimentos sem lançamento são 'Missing payment'; lançamentos do período sem atendimento são
+       'Unmatched transaction'. Lançamentos fora do período dos atendimentos são ignorados.
+
+    Atendimentos concluídos com a forma de pagamento em branco ou desconhecida (Pagamento vazio) também
+    são conciliados; os que acharem lançamento saem como 'Unknown method', com a forma do extrato.
+
+    Devolve {'exceptions': relatório com COLUNAS_EXCECOES, 'matches': pares atendimento/lançamento,
+    'summary': contagens}.
+    """
+    skip = set(skip_methods)
+    completed = appointments[appointments['Realizado']]
+    skipped = completed['Pagamento'].astype(object).isin(skip)
+    due = completed[~skipped].reset_index(drop=True)
+    due = due.assign(
+        _row=np.arange(len(due)),
+        _id=_normalize_id(due['ID Pagamento']),
+        _date=pd.to_datetime(due['Data'], errors='coerce').dt.normalize().astype('datetime64[ns]'),
+        _cents=_cents(due['Services'].fillna(0) + due['Gorjeta'].fillna(0))
+    )
+
+    transactions = statement.reset_index(drop=True)
+    transactions = transactions.assign(
+        _txn=np.arange(len(transactions)),
+        _id=_normalize_id(transactions['ID']),
+        _date=pd.to_datetime(transactions['Date']).astype('datetime64[ns]'),
+        _cents=_cents(transactions['Amount'])
+    )
+    if due['_date'].notna().any():
+        first, last = due['_date'].min(), due['_date'].max() + pd.Timedelta(days=window)
+        in_period = transactions['_date'].between(first, last) | transactions['_id'].isin(due['_id'].dropna())
+    else:
+        in_period = transactions['_id'].isin(due['_id'].dropna())
+    outside_period = int((~in_period).sum())
+    transactions = transactions[in_period]
+
+    # 1. Junção por ID, com os dois lados agregados por ID
+    by_id_due = due[due['_id'].notna()].groupby('_id', sort=False).agg(
+        _first=('_row', 'first'), Appointments=('_row', 'size'), _expected=('_cents', 'sum')
+    )
+    by_id_txn = transactions[transactions['_id'].notna()].groupby('_id', sort=False).agg(
+        _first_txn=('_txn', 'first'), Transactions=('_txn', 'size'), _received=('_cents', 'sum')
+    )
+    joined = by_id_due.join(by_id_txn, how='inner')
+    id_matched_rows = due['_id'].isin(joined.index)
+    id_matched_txns = transactions['_id'].isin(joined.index)
+
+    tolerance = int(round(amount_tolerance * 100))
+    duplicate = joined['Transactions'] > joined['Appointments']
+    mismatch = (joined['_received'] - joined['_expected']).abs() > tolerance
+    joined['Issue'] = np.select([duplicate, mismatch], ['Duplicate transaction', 'Amount mismatch'], None)
+    id_issues = joined[joined['Issue'].notna()]
+
+    # 2. Pareamento por data e valor do que não casou pelo ID
+    date_pairs, missing, unmatched = _pair_by_amount_and_date(
+        due[~id_matched_rows & due['_date'].notna()], transactions[~id_matched_txns], window
+    )
+    missing = pd.concat([missing, due[~id_matched_rows & due['_date'].isna()]])
+
+    id_due = due[id_matched_rows]
+    id_pairs = _pair_by_id(id_due, transactions[id_matched_txns])
+    shared = id_due.loc[~id_due['_row'].isin(id_pairs['_row']), ['_row', '_id']]
+    shared_pairs = pd.DataFrame({
+        '_row': shared['_row'].to_numpy(),
+        '_txn': joined['_first_txn'].reindex(shared['_id']).to_numpy()
+    })
+    pairs = pd.concat([
+        id_pairs.assign(Match='Payment ID'),
+        shared_pairs.assign(Match='Payment ID (shared)'),
+        date_pairs.assign(Match='Amount and date')
+    ], ignore_index=True)
+    rows, txns = pairs['_row'].to_numpy(dtype=np.int64), pairs['_txn'].to_numpy(dtype=np.int64)
+    matched_txns = transactions.set_index('_txn').loc[txns]
+    received = matched_txns['_cents'].to_numpy() / 100
+    received[pairs['Match'].to_numpy() == 'Payment ID (shared)'] = np.nan
+    matches = pd.DataFrame({
+        'Match': pairs['Match'].to_numpy(),
+        **_appointment_fields(due.iloc[rows]),
+        'Expected': due['_cents'].to_numpy()[rows] / 100,
+        'Received': received,
+        'Statement': matched_txns['Statement'].to_numpy(),
+        'Statement Line': matched_txns['Line'].to_numpy(),
+        'Statement Date': matched_txns['Date'].to_numpy()
+    })
+
+    # 3. Relatório de exceções
+    lines = transactions[transactions['_id'].isin(id_issues.index)].groupby('_id', sort=False)['Line'].agg(
+        lambda values: ', '.join(map(str, values))
+    )
+    first_rows = due.iloc[id_issues['_first'].to_numpy()]
+    first_txns = transactions.set_index('_txn').loc[id_issues['_first_txn'].to_numpy()]
+    id_report = pd.DataFrame({
+        'Issue': id_issues['Issue'].to_numpy(),
+        **_appointment_fields(first_rows),
+        'Appointments': id_issues['Appointments'].to_numpy(),
+        'Expected': id_issues['_expected'].to_numpy() / 100,
+        'Received': id_issues['_received'].to_numpy() / 100,
+        'Transactions': id_issues['Transactions'].to_numpy(),
+        'Statement': first_txns['Statement'].to_numpy(),
+        'Statement Lines': lines.reindex(id_issues.index).to_numpy(),
+        'Statement Date': first_txns['Date'].to_numpy(),
+        'Statement ID': first_txns['ID'].astype(object).to_numpy(),
+        'Statement Method': first_txns['Method'].astype(object).to_numpy()
+    })
+    missing_report = pd.DataFrame({
+        'Issue': 'Missing payment',
+        **_appointment_fields(missing),
+        'Appointments': 1,
+        'Expected': missing['_cents'].to_numpy() / 100,
+        'Received': 0.0,
+        'Transactions': 0
+    })
+    unmatched_report = pd.DataFrame({
+        'Issue': 'Unmatched transaction',
+        'Appointments': 0,
+        'Expected': 0.0,
+        'Received': unmatched['_cents'].to_numpy() / 100,
+        'Transactions': 1,
+        'Statement': unmatched['Statement'].to_numpy(),
+        'Statement Lines': unmatched['Line'].astype(str).to_numpy(),
+        'Statement Date': unmatched['Date'].to_numpy(),
+        'Statement ID': unmatched['ID'].astype(object).to_numpy(),
+        'Statement Method': unmatched['Method'].astype(object).to_numpy()
+    })
+    no_method = due['Pagamento'].isna().to_numpy()
+    unknown = no_method[rows]
+    unknown_txns = matched_txns[unknown]
+    unknown_report = pd.DataFrame({
+        'Issue': 'Unknown method',
+        **_appointment_fields(due.iloc[rows[unknown]]),
+        'Appointments': 1,
+        'Expected': due['_cents'].to_numpy()[rows[unknown]] / 100,
+        'Received': received[unknown],
+        'Transactions': 1,
+        'Statement': unknown_txns['Statement'].to_numpy(),
+        'Statement Lines': unknown_txns['Line'].astype(str).to_numpy(),
+        'Statement Date': unknown_txns['Date'].to_numpy(),
+        'Statement ID': unknown_txns['ID'].astype(object).to_numpy(),
+        'Statement Method': unknown_txns['Method'].astype(object).to_numpy()
+    })
+    reports = [
+        report for report in (id_report, missing_report, unknown_report, unmatched_report) if not report.empty
+    ]
+    exceptions = pd.concat(reports, ignore_index=True) if reports else pd.DataFrame()
+    exceptions = exceptions.reindex(columns=COLUNAS_EXCECOES)
+    exceptions['Difference'] = (exceptions['Received'] - exceptions['Expected']).round(2)
+    exceptions['Issue'] = pd.Categorical(exceptions['Issue'], categories=PROBLEMAS, ordered=True)
+    exceptions = exceptions.sort_values(['Issue', 'Data', 'Statement Date'], kind='stable').reset_index(drop=True)
+
+    summary = {
+        'appointments': len(due),
+        'skipped_appointments': int(skipped.sum()),
+        'transactions': len(transactions),
+        'outside_period': outside_period,
+        'matched_by_id': int(id_matched_rows.sum()),
+        'matched_by_amount_date': int((matches['Match'] == 'Amount and date').sum()),
+        'duplicate_transactions': int(duplicate.sum()),
+        'amount_mismatches': int((mismatch & ~duplicate).sum()),
+        'missing_payments': len(missing),
+        'missing_verified': int(missing['Verificado'].sum()),
+        'unknown_methods': int(no_method.sum()),
+        'unknown_methods_missing': int(missing['Pagamento'].isna().sum()),
+        'unmatched_transactions': len(unmatched)
+    }
+    return {'exceptions': exceptions, 'matches': matches, 'summary': summary}
@@ -0,0 +1,120 @@
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+DIAS_SEMANA = ['Domingo', 'Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado']
+
+# Tipos do DataFrame de atendimentos, aplicados uma única vez na leitura das planilhas.
+# Textos repetidos em todas as linhas viram categorias (códigos inteiros + dicionário).
+APPOINTMENT_SCHEMA = {
+    'Semana': 'category',
+    'Nome': 'category',
+    'Categoria': 'category',
+    'Origem': 'category',
+    'Dia': pd.CategoricalDtype(DIAS_SEMANA, ordered=True),
+    'Data': 'datetime64[ns]',
+    'Cliente': 'category',
+    'Services': 'float64',
+    'Gorjeta': 'float64',
+    'Products': 'float64',
+    'Pagamento': 'category',
+    'ID Pagamento': 'string',
+    'Verificado': 'bool',
+    'Realizado': 'bool'
+}
+
+# Colunas que eram guardadas como objetos Python (str/misturados) antes do schema
+COLUNAS_OBJECT_ANTIGAS = [
+    'Semana', 'Nome', 'Categoria', 'Origem', 'Dia', 'Cliente', 'Pagamento', 'ID Pagamento', 'Verificado'
+]
+
+# Valores da coluna de verificação que significam "não verificado"
+VERIFICADO_FALSOS = {'', 'FALSE', 'NO', 'N', 'NAO', 'NÃO', '0', 'NAN', 'NONE'}
+
+
+def _as_text(series):
+    return series.where(series.isna(), series.astype(str).str.strip())
+
+
+def _as_verified(series):
+    def verified(value):
+        if pd.isna(value):
+            return False
+        if isinstance(value, (bool, int, float)):
+            return bool(value)
+        return str(value).strip().upper() not in VERIFICADO_FALSOS
+
+    return series.map(verified).astype(bool)
+
+
+def _as_payment_id(series):
+    # IDs numéricos lidos como float (1234.0) ficam como "1234"
+    def payment_id(value):
+        if pd.isna(value):
+            return pd.NA
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return str(value).strip()
+
+    return series.map(payment_id).astype('string')
+
+
+def apply_schema(df):
+    """Converte o DataFrame de atendimentos para os tipos de APPOINTMENT_SCHEMA"""
+    if df.empty and not len(df.columns):
+        return df
+
+    df = df.copy()
+    for col, dtype in APPOINTMENT_SCHEMA.items():
+        if col not in df.columns:
+            continue
+        if col == 'Verificado':
+            df[col] = _as_verified(df[col])
+        elif col == 'ID Pagamento':
+            df[col] = _as_payment_id(df[col])
+        elif isinstance(dtype, pd.CategoricalDtype) or dtype == 'category':
+            if not isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = _as_text(df[col])
+            df[col] = df[col].astype(dtype)
+        else:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def concat_appointments(frames):
+    """pd.concat que preserva as colunas categóricas (unindo os dicionários de cada arquivo)"""
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True)
+
+    categorical = [
+        col for col in frames[0].columns
+        if all(col in frame.columns and isinstance(frame[col].dtype, pd.CategoricalDtype) for frame in frames)
+    ]
+    data = pd.concat(frames, ignore_index=True)
+    for col in categorical:
+        if not all(frame[col].dtype == frames[0][col].dtype for frame in frames):
+            data[col] = union_categoricals([frame[col] for frame in frames], sort_categories=True)
+    return data
+
+
+def memory_report(df):
+    """Memória por coluna no formato antigo (colunas de texto como object) e no formato tipado atual"""
+    rows = []
+    for col in df.columns:
+        legacy = df[col].astype(object) if col in COLUNAS_OBJECT_ANTIGAS else df[col]
+        before = legacy.memory_usage(index=False, deep=True)
+        after = df[col].memory_usage(index=False, deep=True)
+        rows.append({'Column': col, 'Dtype': str(df[col].dtype), 'Before (bytes)': before, 'After (bytes)': after})
+
+    report = pd.DataFrame(rows)
+    total = {
+        'Column': 'TOTAL',
+        'Dtype': '',
+        'Before (bytes)': report['Before (bytes)'].sum(),
+        'After (bytes)': report['After (bytes)'].sum()
+    }
+    report = pd.concat([report, pd.DataFrame([total])], ignore_index=True)
+    report['Reduction'] = (report['Before (bytes)'] / report['After (bytes)']).round(1)
+    return report
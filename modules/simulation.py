@@ -0,0 +1,108 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from .calculations import _calcular_pagamento, _regras_por_categoria
+from .config import SIMULATION_CHUNK_CELLS, SIMULATION_MAX_SCENARIOS
+from .profiling import profiled
+
+# Campos de REGRAS_PAGAMENTO que podem variar na simulação
+CAMPOS_SIMULAVEIS = ['comissao', 'minimo_diario', 'diaria']
+
+
+def parameter_count(start, stop, step):
+    """Quantos valores parameter_range(start, stop, step) teria, sem gerá-los"""
+    if step <= 0 or stop < start:
+        return 1
+    return int(np.floor((stop - start) / step + 1e-9)) + 1
+
+
+def parameter_range(start, stop, step):
+    """Valores de start a stop (inclusive) de step em step, sem erro de arredondamento acumulado"""
+    if step <= 0 or stop < start:
+        return [start]
+    return [round(start + i * step, 6) for i in range(parameter_count(start, stop, step))]
+
+
+def build_scenarios(grid, max_scenarios=SIMULATION_MAX_SCENARIOS):
+    """
+    Produto cartesiano dos valores: grid = {(categoria, campo): [valores]} -> um cenário por linha, na
+    ordem do itertools.product. Mais de max_scenarios cenários é ValueError.
+    """
+    for categoria, campo in grid:
+        if campo not in CAMPOS_SIMULAVEIS:
+            raise ValueError(f"'{campo}' cannot be simulated; use one of {CAMPOS_SIMULAVEIS}")
+    total = math.prod(len(valores) for valores in grid.values())
+    if total > max_scenarios:
+        raise ValueError(
+            f"{total:,} scenarios exceed the limit of {max_scenarios:,}; use larger steps or narrower ranges"
+        )
+
+    keys = list(grid)
+    eixos = np.meshgrid(*[np.asarray(valores, dtype=float) for valores in grid.values()], indexing='ij')
+    valores = np.column_stack([eixo.ravel() for eixo in eixos]) if eixos else np.empty((1, 0))
+    scenarios = pd.DataFrame(valores, columns=pd.MultiIndex.from_tuples(keys) if keys else None)
+    scenarios.index.name = 'Scenario'
+    return scenarios
+
+
+def _scenario_parameters(weekly_totals, scenarios):
+    """Uma matriz (cenários x linhas) por campo da regra: regra atual com as substituições de cada cenário"""
+    base = _regras_por_categoria(weekly_totals['Categoria'])
+    categorias = weekly_totals['Categoria'].astype(object).to_numpy()
+    params = {campo: np.broadcast_to(valores, (len(scenarios), len(valores))) for campo, valores in base.items()}
+    for categoria, campo in scenarios.columns:
+        linhas = categorias == categoria
+        if not linhas.any():
+            continue
+        matriz = np.array(params[campo], dtype=float)
+        matriz[:, linhas] = scenarios[(categoria, campo)].to_numpy(dtype=float)[:, None]
+        params[campo] = matriz
+    return params
+
+
+@profiled('simulation')
+def simulate_payroll(weekly_totals, scenarios, chunk_cells=SIMULATION_CHUNK_CELLS):
+    """Pagamento Employee e Lucro Empresa por cenário e employee, calculados em bloco (cenários x semanas)
+
+    Cada bloco de cenários é avaliado de uma vez com broadcasting; a soma por employee é um produto
+    matricial com a matriz indicadora employee x linha.
+    """
+    if weekly_totals.empty or scenarios.empty:
+        return pd.DataFrame(columns=['Scenario', 'Nome', 'Pagamento Employee', 'Lucro Empresa'])
+
+    servico = weekly_totals['Services'].to_numpy(dtype=float)
+    gorjeta = weekly_totals['Gorjeta'].to_numpy(dtype=float)
+    dias = weekly_totals['Dias Trabalhados'].to_numpy(dtype=float)
+    codes, nomes = pd.factorize(weekly_totals['Nome'].astype(object))
+    indicador = np.zeros((len(weekly_totals), len(nomes)))
+    indicador[np.arange(len(weekly_totals)), codes] = 1.0
+
+    chunk = max(1, chunk_cells // len(weekly_totals))
+    pagamentos, lucros = [], []
+    for start in range(0, len(scenarios), chunk):
+        bloco = scenarios.iloc[start:start + chunk]
+        pagamento, lucro = _calcular_pagamento(servico, gorjeta, dias, **_scenario_parameters(weekly_totals, bloco))
+        pagamentos.append(pagamento @ indicador)
+        lucros.append(lucro @ indicador)
+
+    pagamento = np.vstack(pagamentos)
+    lucro = np.vstack(lucros)
+    return pd.DataFrame({
+        'Scenario': np.repeat(scenarios.index.to_numpy(), len(nomes)),
+        'Nome': np.tile(np.asarray(nomes, dtype=object), len(scenarios)),
+        'Pagamento Employee': pagamento.ravel(),
+        'Lucro Empresa': lucro.ravel()
+    })
+
+
+def scenario_summary(scenarios, results, weekly_totals):
+    """Totais por cenário, com a diferença para a folha atual (weekly_totals)"""
+    totals = results.groupby('Scenario')[['Pagamento Employee', 'Lucro Empresa']].sum()
+    summary = scenarios.copy()
+    summary.columns = [f"{categoria} {campo}" for categoria, campo in scenarios.columns]
+    summary = summary.join(totals)
+    summary['Payment Change'] = summary['Pagamento Employee'] - weekly_totals['Pagamento Employee'].sum()
+    summary['Profit Change'] = summary['Lucro Empresa'] - weekly_totals['Lucro Empresa'].sum()
+    return summary.reset_index()
@@ -1,7 +1,16 @@
+import hashlib
+
 import pandas as pd
 
 def format_currency(value):
     """Formata valores como moeda USD com 2 casas decimais"""
     if pd.isna(value):
         return None
-    return f"${value:,.2f}"
\ No newline at end of file
+    return f"${value:,.2f}"
+
+def frame_fingerprint(df):
+    """Hash estável do conteúdo de um DataFrame (valores e índice), usado como chave de cache"""
+    digest = hashlib.sha256(','.join(map(str, df.columns)).encode())
+    if len(df):
+        digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
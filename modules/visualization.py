@@ -1,16 +1,64 @@
-import plotly.express as px
+import threading
+from collections import OrderedDict
+from functools import wraps
+
 import pandas as pd
-from .utils import format_currency
+from .utils import format_currency, frame_fingerprint
+from .config import CHART_TOP_N, CHART_WEBGL_MIN_POINTS, CHART_CACHE_SIZE
+
+# plotly.express é importado dentro de cada gráfico: só carrega quando o primeiro gráfico é desenhado
+_figure_cache = OrderedDict()
+_figure_lock = threading.Lock()
+
+
+def memoized_figure(func):
+    """Guarda a figura pelo fingerprint do DataFrame de entrada (LRU de CHART_CACHE_SIZE figuras).
+    A figura devolvida é compartilhada: quem precisar alterá-la deve copiar antes."""
+    @wraps(func)
+    def wrapper(data, *args, **kwargs):
+        key = (func.__name__, frame_fingerprint(data), args, tuple(sorted(kwargs.items())))
+        with _figure_lock:
+            if key in _figure_cache:
+                _figure_cache.move_to_end(key)
+                return _figure_cache[key]
+        fig = func(data, *args, **kwargs)
+        with _figure_lock:
+            _figure_cache[key] = fig
+            while len(_figure_cache) > CHART_CACHE_SIZE:
+                _figure_cache.popitem(last=False)
+        return fig
+    return wrapper
+
+
+def clear_figure_cache():
+    with _figure_lock:
+        _figure_cache.clear()
+
+
+def top_employees(data, value, top_n=CHART_TOP_N):
+    """Soma value por Nome/Semana mantendo os top_n employees (pelo total) e juntando o resto em "Others" """
+    data = data.assign(Nome=data['Nome'].astype(str), Semana=data['Semana'].astype(str))
+    totals = data.groupby('Nome')[value].sum().sort_values(ascending=False)
+    if len(totals) > top_n + 1:
+        others = totals.index[top_n:]
+        data['Nome'] = data['Nome'].where(~data['Nome'].isin(others), f"Others ({len(others)})")
+    # sort=False mantém as semanas na ordem em que aparecem (WEEK 2 antes de WEEK 10)
+    return data.groupby(['Nome', 'Semana'], sort=False)[value].sum().reset_index()
 
 
 # 📈 Gráfico de evolução semanal por employee
-def plot_weekly_evolution(data):
+@memoized_figure
+def plot_weekly_evolution(data, top_n=CHART_TOP_N):
+    import plotly.express as px
+
+    data = top_employees(data, 'Services', top_n)
     fig = px.line(
         data,
         x='Semana',
         y='Services',
         color='Nome',
         markers=True,
+        render_mode='webgl' if len(data) >= CHART_WEBGL_MIN_POINTS else 'svg',
         title='Weekly Service Evolution by Employee',
         labels={'Services': 'Service Value ($)', 'Semana': 'Week'}
     )
@@ -19,26 +67,59 @@ def plot_weekly_evolution(data):
 
 
 # 💰 Gráfico de pagamento semanal por employee
-def plot_weekly_payments(data):
+@memoized_figure
+def plot_weekly_payments(data, top_n=CHART_TOP_N):
+    import plotly.express as px
+
+    data = top_employees(data, 'Pagamento Employee', top_n)
+    large = len(data) >= CHART_WEBGL_MIN_POINTS
     fig = px.bar(
         data.sort_values('Pagamento Employee'),
         x='Pagamento Employee',
         y='Nome',
         color='Semana',
-        barmode='group',
+        # Muitas barras: empilha as semanas e deixa os valores só no hover
+        barmode='stack' if large else 'group',
         title='Weekly Payment per Employee',
         labels={'Pagamento Employee': 'Payment ($)', 'Nome': 'Employee'}
     )
-    fig.update_traces(
-        texttemplate='$%{x:,.2f}',
-        textposition='outside'
-    )
+    if not large:
+        fig.update_traces(
+            texttemplate='$%{x:,.2f}',
+            textposition='outside'
+        )
     fig.update_layout(hovermode="x unified")
     return fig
 
 
+# 🏅 Gráfico da posição semanal no ranking (1 = mais atendimentos)
+@memoized_figure
+def plot_rank_trend(ranking, top_n=CHART_TOP_N):
+    import plotly.express as px
+
+    leaders = ranking.groupby('Nome', observed=True)['Rank'].mean().nsmallest(top_n).index
+    data = ranking[ranking['Nome'].isin(leaders)].assign(
+        Nome=lambda df: df['Nome'].astype(str), Semana=lambda df: df['Semana'].astype(str)
+    )
+    fig = px.line(
+        data,
+        x='Semana',
+        y='Rank',
+        color='Nome',
+        markers=True,
+        render_mode='webgl' if len(data) >= CHART_WEBGL_MIN_POINTS else 'svg',
+        title='Weekly Ranking by Employee',
+        labels={'Rank': 'Position', 'Semana': 'Week', 'Nome': 'Employee'}
+    )
+    fig.update_yaxes(autorange='reversed', dtick=1)
+    fig.update_traces(hovertemplate="<b>%{x}</b><br>Position: %{y}")
+    return fig
+
+
 # 👥 Gráfico de atendimentos por employee
 def plot_services_by_employee(data):
+    import plotly.express as px
+
     fig = px.bar(
         data.sort_values('Atendimentos'),
         x='Atendimentos',
@@ -55,6 +136,8 @@ def plot_services_by_employee(data):
 
 # 💵 Gráfico de gorjetas por employee
 def plot_tips_by_employee(data):
+    import plotly.express as px
+
     fig = px.bar(
         data.sort_values('Gorjeta'),
         x='Gorjeta',
@@ -71,6 +154,8 @@ def plot_tips_by_employee(data):
 
 # 📆 Gráfico de atendimentos por dia da semana
 def plot_services_by_day(data):
+    import plotly.express as px
+
     fig = px.bar(
         data,
         x='Dia',
@@ -85,7 +170,10 @@ def plot_services_by_day(data):
 
 
 # 💳 Gráfico de valor total por método de pagamento
+@memoized_figure
 def plot_payment_methods_total(data):
+    import plotly.express as px
+
     fig = px.bar(
         data.sort_values('Total'),
         x='Total',
@@ -102,19 +190,21 @@ def plot_payment_methods_total(data):
 
 
 # 📊 Gráfico de quantidade de usos por método de pagamento
+@memoized_figure
 def plot_payment_methods_usage(data):
-    if 'Percentual Uso' not in data.columns:
-        data['Percentual Uso'] = (data['Qtd Usos'] / data['Qtd Usos'].sum() * 100).round(2)
+    import plotly.express as px
+
+    if 'Usage Percentage' not in data.columns:
+        data = data.assign(**{'Usage Percentage': (data['Usage Count'] / data['Usage Count'].sum() * 100).round(2)})
 
     fig = px.bar(
-        data.sort_values('Qtd Usos'),
-        x='Qtd Usos',
+        data.sort_values('Usage Count'),
+        x='Usage Count',
         y='Pagamento',
         title='Usage Count by Payment Method',
-        color='Qtd Usos',
+        color='Usage Count',
         color_continuous_scale='Peach',
-        labels={'Qtd Usos': 'Usage Count'},
-        text='Percentual Uso'
+        text='Usage Percentage'
     )
     fig.update_traces(
         texttemplate='%{text}%',
@@ -122,4 +212,3 @@ def plot_payment_methods_usage(data):
         hovertemplate="<b>%{y}</b><br>Usage: %{x}<br>% of Total: %{text}%"
     )
     return fig
-
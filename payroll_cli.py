@@ -0,0 +1,131 @@
+import argparse
+import glob
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from modules.cache import WorkbookCache
+from modules.config import INGEST_WORKERS, PDF_WORKERS
+from modules.cube import build_cube
+from modules.data_processor import load_spreadsheets
+from modules.exports import write_csv, write_payroll_xlsx
+from modules.pdf_generator import create_pdf, receipt_jobs, create_receipts_zip
+from modules.pipeline import clean_appointments, filter_appointments, compute_payroll, allocate_appointments
+from modules.profiling import Profiler, stage
+from modules.reconciliation import load_statements, reconcile_payments
+from modules.schema import concat_appointments
+
+
+def find_workbooks(paths):
+    """Arquivos .xlsx informados diretamente ou encontrados dentro das pastas"""
+    workbooks = []
+    for path in paths:
+        if os.path.isdir(path):
+            workbooks.extend(sorted(glob.glob(os.path.join(path, '*.xlsx'))))
+        else:
+            workbooks.append(path)
+    return [path for path in workbooks if not os.path.basename(path).startswith('~$')]
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Weekly payroll close without the Streamlit dashboard.")
+    parser.add_argument('paths', nargs='+', help="Workbook files (.xlsx) or directories containing them")
+    parser.add_argument('-o', '--output', default='payroll_output', help="Output directory")
+    parser.add_argument('--weeks', nargs='*', help="Only these WEEK sheets")
+    parser.add_argument('--employees', nargs='*', help="Only these employees")
+    parser.add_argument('--categories', nargs='*', help="Only these categories")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes for parsing and receipts")
+    parser.add_argument('--no-cache', action='store_true', help="Do not use the parsed workbook cache")
+    parser.add_argument('--no-receipts', action='store_true', help="Skip the per-employee receipts ZIP")
+    parser.add_argument('--statements', nargs='*', help="Bank or processor statement CSVs to reconcile payments against")
+    parser.add_argument('--profile-memory', action='store_true', help="Also record peak memory per stage (slower)")
+    parser.add_argument('--log-stages', action='store_true', help="Write one JSON log line per stage to stderr")
+    return parser.parse_args(argv)
+
+
+def run(args):
+    workbooks = find_workbooks(args.paths)
+    if not workbooks:
+        print("No workbooks found.", file=sys.stderr)
+        return None
+
+    ingest_workers = args.workers or INGEST_WORKERS
+    pdf_workers = args.workers or PDF_WORKERS
+    cache = None if args.no_cache else WorkbookCache()
+    os.makedirs(args.output, exist_ok=True)
+
+    ingest_pool = ProcessPoolExecutor(ingest_workers) if ingest_workers > 1 else None
+    try:
+        frames = load_spreadsheets(workbooks, cache, ingest_pool)
+    finally:
+        if ingest_pool is not None:
+            ingest_pool.shutdown()
+
+    data = clean_appointments(concat_appointments(frames))
+    if data.empty:
+        print("No appointments found in the workbooks.", file=sys.stderr)
+        return None
+
+    payroll = compute_payroll(build_cube(data), args.weeks, args.employees, args.categories)
+    data = filter_appointments(data, args.weeks, args.employees, args.categories)
+    completed_services = allocate_appointments(data, payroll['weekly_totals'])
+
+    with stage('write_outputs'):
+        payroll['weekly_totals'].to_csv(os.path.join(args.output, 'weekly_totals.csv'), index=False)
+        payroll['employee_summary'].to_csv(os.path.join(args.output, 'employee_summary.csv'), index=False)
+        payroll['payment_summary'].to_csv(os.path.join(args.output, 'payment_methods.csv'), index=False)
+        with open(os.path.join(args.output, 'employee_services.csv'), 'wb') as f:
+            f.write(write_csv(data).read())
+        with open(os.path.join(args.output, 'payroll.xlsx'), 'wb') as f:
+            f.write(write_payroll_xlsx(payroll['weekly_totals']).read())
+        with open(os.path.join(args.output, 'metrics.json'), 'w') as f:
+            json.dump({key: float(value) for key, value in payroll['metrics'].items()}, f, indent=2)
+        create_pdf(completed_services).output(os.path.join(args.output, 'general_report.pdf'), 'F')
+
+    if args.statements:
+        reconciliation = reconcile_payments(data, load_statements(args.statements))
+        with open(os.path.join(args.output, 'reconciliation_exceptions.csv'), 'wb') as f:
+            f.write(write_csv(reconciliation['exceptions']).read())
+        with open(os.path.join(args.output, 'reconciliation_summary.json'), 'w') as f:
+            json.dump(reconciliation['summary'], f, indent=2)
+        summary = reconciliation['summary']
+        print(
+            f"Reconciliation: {summary['matched_by_id'] + summary['matched_by_amount_date']} of "
+            f"{summary['appointments']} payments matched, {len(reconciliation['exceptions'])} exceptions",
+            file=sys.stderr
+        )
+
+    if not args.no_receipts:
+        receipt_pool = ProcessPoolExecutor(pdf_workers) if pdf_workers > 1 else None
+        try:
+            archive, receipt_stats = create_receipts_zip(receipt_jobs(completed_services), receipt_pool)
+        finally:
+            if receipt_pool is not None:
+                receipt_pool.shutdown()
+        with open(os.path.join(args.output, 'payroll_receipts.zip'), 'wb') as f:
+            f.write(archive.read())
+        print(f"{receipt_stats['receipts']} receipts ({receipt_stats['receipts_per_second']:.1f}/s)", file=sys.stderr)
+
+    return payroll['metrics']
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    profiler = Profiler(memory=args.profile_memory, log=args.log_stages)
+    with profiler.activate():
+        metrics = run(args)
+    if metrics is None:
+        return 1
+
+    print(profiler.report().to_string(index=False), file=sys.stderr)
+    with open(os.path.join(args.output, 'timings.json'), 'w') as f:
+        json.dump(profiler.records, f, indent=2)
+
+    for key, value in metrics.items():
+        print(f"{key}: {value:,.2f}" if isinstance(value, float) else f"{key}: {value}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
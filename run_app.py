@@ -1,7 +1,11 @@
 import os
 import sys
+import multiprocessing
 import streamlit.web.cli as stcli
 
 if __name__ == '__main__':
-    sys.argv = ["streamlit", "run", "app.py"]
+    # Necessário no executável do PyInstaller para os processos de leitura das planilhas
+    multiprocessing.freeze_support()
+    # O executável não tem código para recarregar: sem o observador de arquivos a abertura é mais rápida
+    sys.argv = ["streamlit", "run", "app.py", "--server.fileWatcherType", "none"]
     sys.exit(stcli.main())
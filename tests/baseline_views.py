@@ -0,0 +1,72 @@
+"""
+Agregações por visão feitas direto sobre os atendimentos, como o app calculava antes do cubo, guardadas
+só como referência para os testes de paridade. Recebe os atendimentos já limpos e filtrados.
+"""
+import pandas as pd
+
+from modules.calculations import calcular_pagamentos_semanais, calcular_pagamentos_individuais
+from modules.config import FORMAS_PAGAMENTO_VALIDAS
+
+
+def views(data):
+    completed_services = data[data['Realizado']].copy()
+    not_completed = data[(data['Realizado'] == False) & (data['Cliente'].notna())]
+
+    dias_trabalhados = completed_services.groupby(['Nome', 'Semana', 'Data'], observed=True).size().reset_index()
+    dias_trabalhados = dias_trabalhados.groupby(['Nome', 'Semana'], observed=True).size().reset_index(name='Dias Trabalhados')
+
+    weekly_totals = completed_services.groupby(['Nome', 'Semana', 'Categoria'], observed=True).agg({
+        'Services': 'sum',
+        'Gorjeta': 'sum',
+        'Dia': 'count'
+    }).reset_index()
+
+    weekly_totals = pd.merge(weekly_totals, dias_trabalhados, on=['Nome', 'Semana'], how='left')
+
+    weekly_totals[['Pagamento Employee', 'Lucro Empresa']] = calcular_pagamentos_semanais(weekly_totals)
+
+    completed_services[['Pagamento Employee', 'Lucro Empresa']] = calcular_pagamentos_individuais(
+        completed_services, weekly_totals
+    )
+
+    metrics = {
+        'Completed': len(completed_services),
+        'Not Completed': len(not_completed),
+        'Total Services': completed_services['Services'].sum(),
+        'Total Tips': completed_services['Gorjeta'].sum(),
+        'Company Profit': completed_services['Lucro Empresa'].sum()
+    }
+
+    emp_summary = weekly_totals.groupby(['Nome', 'Categoria'], observed=True).agg({
+        'Services': 'sum',
+        'Gorjeta': 'sum',
+        'Pagamento Employee': 'sum',
+        'Lucro Empresa': 'sum',
+        'Dia': 'sum',
+        'Dias Trabalhados': 'sum'
+    }).reset_index()
+
+    emp_summary.columns = ['Employee', 'Category', 'Total Services', 'Total Tips', 'Total Payment', 'Company Profit', 'Appointments', 'Worked Days']
+
+    emp_summary['Average Service'] = emp_summary['Total Services'] / emp_summary['Appointments']
+    emp_summary['Average Tip'] = emp_summary['Total Tips'] / emp_summary['Appointments']
+
+    valid_payments = completed_services[completed_services['Pagamento'].isin(FORMAS_PAGAMENTO_VALIDAS)]
+    payment_summary = pd.DataFrame()
+    if not valid_payments.empty:
+        payment_summary = valid_payments.groupby('Pagamento', observed=True).agg({
+            'Services': 'sum',
+            'Gorjeta': 'sum',
+            'Cliente': 'count'
+        }).reset_index().rename(columns={'Cliente': 'Usage Count'})
+
+        payment_summary['Total'] = payment_summary['Services'] + payment_summary['Gorjeta']
+        payment_summary['Usage Percentage'] = (payment_summary['Usage Count'] / payment_summary['Usage Count'].sum() * 100).round(2)
+
+    return {
+        'weekly_totals': weekly_totals,
+        'metrics': metrics,
+        'employee_summary': emp_summary,
+        'payment_summary': payment_summary,
+        'completed_services': completed_services
+    }
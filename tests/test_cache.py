@@ -0,0 +1,89 @@
+import os
+from io import BytesIO
+
+import pandas as pd
+import pytest
+
+from benchmarks.generate_workbook import workbook_bytes
+from modules.cache import SharedDatasetStore, WorkbookCache, workbook_key
+from modules.data_processor import PARSER_VERSION, load_spreadsheet, process_spreadsheet
+
+
+def _frame(linhas):
+    return pd.DataFrame({'Nome': [f'Emp {i}' for i in range(linhas)], 'Services': [float(i) for i in range(linhas)]})
+
+
+def _envelhecer(cache, key, segundos):
+    """Último uso da chave segundos atrás (o descarte LRU usa o mtime dos arquivos)"""
+    path = cache._path(key)
+    os.utime(path, (os.path.getatime(path), os.path.getmtime(path) - segundos))
+
+
+def test_hit_e_miss(tmp_path):
+    cache = WorkbookCache(str(tmp_path))
+    assert cache.get('a') is None
+
+    df = _frame(3)
+    assert cache.put('a', df) is df
+    pd.testing.assert_frame_equal(cache.get('a'), df)
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'evictions': 0}
+
+
+def test_load_spreadsheet_le_do_cache_na_segunda_vez(tmp_path):
+    content = workbook_bytes(employees=2, weeks=1, appointments_per_day=2, seed=1)
+    cache = WorkbookCache(str(tmp_path))
+
+    primeira = load_spreadsheet(content, cache)
+    segunda = load_spreadsheet(content, cache)
+
+    assert os.path.exists(cache._path(workbook_key(content, PARSER_VERSION)))
+    pd.testing.assert_frame_equal(segunda, primeira)
+    pd.testing.assert_frame_equal(segunda, process_spreadsheet(BytesIO(content)))
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_descarta_a_chave_usada_ha_mais_tempo(tmp_path):
+    cache = WorkbookCache(str(tmp_path))
+    cache.put('a', _frame(200))
+    cache.put('b', _frame(200))
+    _envelhecer(cache, 'a', 60)
+    _envelhecer(cache, 'b', 30)
+    # Um get marca o uso: 'a' passa a ser a mais recente
+    cache.get('a')
+
+    cache.max_bytes = os.path.getsize(cache._path('a')) + os.path.getsize(cache._path('b'))
+    cache.put('c', _frame(200))
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    assert cache.evictions == 1
+
+
+def test_downloads_entram_no_limite_e_saem_com_os_metadados(tmp_path):
+    cache = WorkbookCache(str(tmp_path))
+    downloads = tmp_path / 'downloads'
+    downloads.mkdir()
+    (downloads / 'url1.xlsx').write_bytes(b'x' * 50_000)
+    (downloads / 'url1.json').write_text('{}')
+    for path in downloads.iterdir():
+        os.utime(path, (0, 0))
+
+    cache.max_bytes = 20_000
+    cache.put('a', _frame(10))
+
+    assert list(downloads.iterdir()) == []
+    assert cache.get('a') is not None
+    assert cache.evictions == 1
+
+
+def test_get_or_build_tenta_de_novo_depois_de_falha():
+    store = SharedDatasetStore()
+
+    def falha():
+        raise RuntimeError('builder falhou')
+
+    with pytest.raises(RuntimeError):
+        store.get_or_build('cubo', falha)
+
+    assert store._building == {}
+    assert store.get_or_build('cubo', lambda: [1]) == [1]
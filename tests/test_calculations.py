@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.calculations import (
+    calcular_pagamento_individual,
+    calcular_pagamento_semanal,
+    calcular_pagamentos_individuais,
+    calcular_pagamentos_semanais
+)
+
+
+def _linha_a_linha(services, weekly_data):
+    resultado = services.apply(lambda row: calcular_pagamento_individual(row, weekly_data), axis=1)
+    resultado.columns = ['Pagamento Employee', 'Lucro Empresa']
+    return resultado.astype(float)
+
+
+@pytest.fixture
+def dados():
+    rnd = np.random.default_rng(0)
+    nomes = [f'Employee {i}' for i in range(8)]
+    semanas = ['WEEK 1', 'WEEK 2', 'WEEK 3']
+    services = pd.DataFrame({
+        'Nome': rnd.choice(nomes, 400),
+        'Semana': rnd.choice(semanas, 400),
+        'Services': rnd.uniform(50, 400, 400).round(2),
+        'Gorjeta': rnd.choice([0.0, 10.0, 15.0, 20.5], 400)
+    })
+    weekly = services.groupby(['Nome', 'Semana'], as_index=False)[['Services']].sum()
+    weekly['Pagamento Employee'] = (weekly['Services'] * 0.2).round(2)
+    return services, weekly
+
+
+def test_rateio_igual_ao_linha_a_linha(dados):
+    services, weekly = dados
+    pd.testing.assert_frame_equal(calcular_pagamentos_individuais(services, weekly), _linha_a_linha(services, weekly))
+
+
+def test_employee_semana_fora_do_weekly_totals(dados):
+    services, weekly = dados
+    ausente = (weekly['Nome'] == 'Employee 0') & (weekly['Semana'] == 'WEEK 1')
+    weekly = weekly[~ausente]
+    resultado = calcular_pagamentos_individuais(services, weekly)
+    pd.testing.assert_frame_equal(resultado, _linha_a_linha(services, weekly))
+
+    linhas = (services['Nome'] == 'Employee 0') & (services['Semana'] == 'WEEK 1')
+    assert linhas.any()
+    assert (resultado.loc[linhas, 'Pagamento Employee'] == 0).all()
+    np.testing.assert_allclose(
+        resultado.loc[linhas, 'Lucro Empresa'], services.loc[linhas, 'Services'] + services.loc[linhas, 'Gorjeta']
+    )
+
+
+def test_total_semanal_zero(dados):
+    services, weekly = dados
+    weekly.loc[weekly['Nome'] == 'Employee 1', 'Services'] = 0.0
+    resultado = calcular_pagamentos_individuais(services, weekly)
+    pd.testing.assert_frame_equal(resultado, _linha_a_linha(services, weekly))
+    assert (resultado.loc[services['Nome'] == 'Employee 1', 'Pagamento Employee'] == 0).all()
+
+
+def test_nome_semana_duplicado(dados):
+    services, weekly = dados
+    # Duas linhas do mesmo Nome/Semana: o total de serviços soma as duas e o pagamento é o da primeira
+    extra = weekly[weekly['Nome'] == 'Employee 2'].assign(Services=100.0, **{'Pagamento Employee': 999.0})
+    weekly = pd.concat([weekly, extra], ignore_index=True)
+    pd.testing.assert_frame_equal(calcular_pagamentos_individuais(services, weekly), _linha_a_linha(services, weekly))
+
+
+def test_sem_coluna_pagamento(dados):
+    services, weekly = dados
+    weekly = weekly.drop(columns='Pagamento Employee')
+    pd.testing.assert_frame_equal(calcular_pagamentos_individuais(services, weekly), _linha_a_linha(services, weekly))
+
+
+def _cadeia_antiga(categoria, servico, gorjeta, dias_trabalhados):
+    """calcular_pagamento_semanal anterior à tabela REGRAS_PAGAMENTO (cadeia de if/elif), só para comparação"""
+    if categoria == 'Registering':
+        pagamento = 0.00
+        lucro = servico + gorjeta
+    elif categoria == 'Employee':
+        pagamento = servico * 0.20 + gorjeta
+        lucro = servico * 0.80
+    elif categoria == 'Training':
+        pagamento = 80 * dias_trabalhados
+        lucro = servico + gorjeta - pagamento
+    elif categoria == 'Coordinator':
+        pagamento = servico * 0.25 + gorjeta
+        lucro = servico * 0.75
+    elif categoria == 'Started':
+        valor_comissao = servico * 0.20 + gorjeta
+        valor_minimo = 150 * dias_trabalhados
+        pagamento = max(valor_minimo, valor_comissao)
+        lucro = servico + gorjeta - pagamento
+    else:
+        pagamento = 0
+        lucro = servico + gorjeta
+    return pagamento, lucro
+
+
+# (categoria, serviços, gorjetas, dias trabalhados, pagamento esperado)
+CASOS_REGRAS = [
+    ('Registering', 1000.0, 50.0, 5, 0.0),
+    ('Registering', 0.0, 0.0, 0, 0.0),
+    ('Employee', 1000.0, 50.0, 5, 250.0),
+    ('Employee', 0.0, 30.0, 1, 30.0),
+    ('Training', 1000.0, 50.0, 5, 400.0),
+    ('Training', 0.0, 0.0, 0, 0.0),
+    ('Training', 500.0, 20.0, 7, 560.0),
+    ('Coordinator', 1000.0, 50.0, 5, 300.0),
+    ('Coordinator', 0.0, 0.0, 3, 0.0),
+    # Started: o maior entre 20% + gorjeta e 150 por dia trabalhado, dos dois lados do limite
+    ('Started', 3500.0, 50.0, 5, 750.0),
+    ('Started', 3499.0, 50.0, 5, 750.0),
+    ('Started', 3501.0, 50.0, 5, 750.2),
+    ('Started', 3750.0, 0.0, 5, 750.0),
+    ('Started', 0.0, 0.0, 2, 300.0),
+    ('Started', 100.0, 10.0, 0, 30.0),
+    ('Desconhecida', 1000.0, 50.0, 5, 0.0),
+]
+
+
+@pytest.mark.parametrize('categoria, servico, gorjeta, dias, pagamento', CASOS_REGRAS)
+def test_regras_iguais_a_cadeia_antiga(categoria, servico, gorjeta, dias, pagamento):
+    esperado = _cadeia_antiga(categoria, servico, gorjeta, dias)
+    assert esperado[0] == pytest.approx(pagamento)
+
+    linha = pd.Series({'Categoria': categoria, 'Services': servico, 'Gorjeta': gorjeta, 'Dias Trabalhados': dias})
+    assert tuple(calcular_pagamento_semanal(linha)) == pytest.approx(esperado)
+
+
+def test_regras_em_lote_iguais_a_cadeia_antiga():
+    weekly = pd.DataFrame(
+        [caso[:4] for caso in CASOS_REGRAS], columns=['Categoria', 'Services', 'Gorjeta', 'Dias Trabalhados']
+    )
+    esperado = pd.DataFrame(
+        [_cadeia_antiga(*caso[:4]) for caso in CASOS_REGRAS], columns=['Pagamento Employee', 'Lucro Empresa']
+    )
+    pd.testing.assert_frame_equal(calcular_pagamentos_semanais(weekly), esperado, check_dtype=False)
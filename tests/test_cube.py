@@ -0,0 +1,68 @@
+from io import BytesIO
+
+import pandas as pd
+import pytest
+
+import baseline_views
+from benchmarks.generate_workbook import workbook_bytes
+from modules.cube import build_cube
+from modules.data_processor import process_spreadsheet
+from modules.pipeline import clean_appointments, compute_payroll, filter_appointments
+
+
+@pytest.fixture(scope='module')
+def atendimentos():
+    content = workbook_bytes(employees=8, weeks=3, appointments_per_day=4, seed=21)
+    return clean_appointments(process_spreadsheet(BytesIO(content)))
+
+
+def _ordenado(frame, chaves):
+    frame = frame.copy()
+    for chave in chaves:
+        frame[chave] = frame[chave].astype(str)
+    return frame.sort_values(chaves).reset_index(drop=True)
+
+
+FILTROS = [
+    {},
+    {'weeks': ['WEEK 2']},
+    {'weeks': ['WEEK 1', 'WEEK 3'], 'employees': ['Employee 001', 'Employee 004', 'Employee 007']},
+    {'categories': ['Employee', 'Started']}
+]
+
+
+@pytest.mark.parametrize('filtros', FILTROS)
+def test_cubo_igual_as_agregacoes_por_visao(atendimentos, filtros):
+    esperado = baseline_views.views(filter_appointments(atendimentos, **filtros))
+    resultado = compute_payroll(build_cube(atendimentos), **filtros)
+    assert not esperado['weekly_totals'].empty
+
+    chaves = ['Nome', 'Semana', 'Categoria']
+    colunas = chaves + ['Services', 'Gorjeta', 'Dia', 'Dias Trabalhados', 'Pagamento Employee', 'Lucro Empresa']
+    pd.testing.assert_frame_equal(
+        _ordenado(resultado['weekly_totals'][colunas], chaves),
+        _ordenado(esperado['weekly_totals'][colunas], chaves),
+        check_dtype=False
+    )
+
+    for nome, valor in esperado['metrics'].items():
+        assert resultado['metrics'][nome] == pytest.approx(valor), nome
+
+    pd.testing.assert_frame_equal(
+        _ordenado(resultado['employee_summary'], ['Employee', 'Category']),
+        _ordenado(esperado['employee_summary'], ['Employee', 'Category']),
+        check_dtype=False
+    )
+
+    pd.testing.assert_frame_equal(
+        _ordenado(resultado['payment_summary'], ['Pagamento']),
+        _ordenado(esperado['payment_summary'], ['Pagamento']),
+        check_dtype=False
+    )
+
+    # O rateio por célula do cubo soma o mesmo que o rateio por atendimento, por employee e semana
+    por_celula = resultado['allocated'].groupby(['Nome', 'Semana'], observed=True)[['Pagamento Employee', 'Lucro Empresa']].sum()
+    por_atendimento = esperado['completed_services'].groupby(['Nome', 'Semana'], observed=True)[
+        ['Pagamento Employee', 'Lucro Empresa']
+    ].sum()
+    pd.testing.assert_frame_equal(por_celula, por_atendimento, check_dtype=False)
@@ -0,0 +1,94 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from io import BytesIO
+
+import pandas as pd
+import pytest
+
+import baseline_parser
+from benchmarks.generate_workbook import COLUNAS_DIA, build_workbook
+from modules.data_processor import (
+    LARGURA_MINIMA,
+    _combine_weeks,
+    _parse_sheet,
+    load_spreadsheets,
+    process_spreadsheet,
+    process_spreadsheet_streaming
+)
+from modules.schema import apply_schema
+
+
+def _bytes(workbook):
+    buffer = BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def _assert_parity(content):
+    esperado = apply_schema(baseline_parser.process_spreadsheet(BytesIO(content)))
+    resultado = process_spreadsheet(BytesIO(content))
+    assert len(resultado) > 0
+    pd.testing.assert_frame_equal(resultado.reset_index(drop=True), esperado.reset_index(drop=True))
+    pd.testing.assert_frame_equal(
+        process_spreadsheet_streaming(BytesIO(content)).reset_index(drop=True), resultado.reset_index(drop=True)
+    )
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_paridade_planilha_gerada(seed):
+    _assert_parity(_bytes(build_workbook(employees=6, weeks=2, appointments_per_day=4, seed=seed)))
+
+
+def test_servico_nao_numerico_e_clientes_invalidos():
+    wb = build_workbook(employees=3, weeks=1, appointments_per_day=3, seed=5)
+    ws = wb['WEEK 1']
+    dia = datetime(2024, 1, 7)
+    # Linha extra no bloco do primeiro employee: serviço em texto, clientes de totais e um atendimento normal
+    ws.insert_rows(5)
+    linha = [9]
+    linha += ['Client X', dia, 'canceled', None, None, 'Visa', None, None, None]
+    linha += ['TOTAL:', dia, 100, None, None, 'Cash', None, None, None]
+    linha += ['  services in: ', dia, None, None, None, None, None, None, None]
+    linha += ['Summary:', dia, 50, 5, None, 'Zelle', 'ID9', True, None]
+    linha += ['Client Y', dia, ' ', None, None, None, None, None, None]
+    linha += ['Client Z', dia, '120.5', '10', 3, 'Zelle', 1234.0, 'x', 'note']
+    linha += ['Client W', dia + timedelta(days=6), 80, None, None, 'Venmo', None, None, None]
+    for col, value in enumerate(linha, start=1):
+        ws.cell(row=5, column=col, value=value)
+    _assert_parity(_bytes(wb))
+
+
+def test_bloco_sem_cabecalho():
+    wb = build_workbook(employees=4, weeks=1, appointments_per_day=2, seed=3)
+    ws = wb['WEEK 1']
+    # O cabeçalho Schedule do segundo employee vira uma linha comum: o bloco inteiro é ignorado
+    cabecalhos = [row for row in ws.iter_rows() if row[0].value == 'Schedule']
+    for cell in cabecalhos[1]:
+        cell.value = None
+    _assert_parity(_bytes(wb))
+    nomes = process_spreadsheet(BytesIO(_bytes(wb)))['Nome'].unique()
+    assert 'Employee 002' not in set(nomes)
+
+
+def test_aba_estreita():
+    # Só os três primeiros dias preenchidos: a aba lida tem menos que as 64 colunas dos 7 dias
+    wb = build_workbook(employees=3, weeks=1, appointments_per_day=3, seed=7)
+    ws = wb['WEEK 1']
+    ws.delete_cols(1 + 1 + 3 * len(COLUNAS_DIA), 64)
+    df = pd.read_excel(BytesIO(_bytes(wb)), sheet_name='WEEK 1', header=None)
+    assert df.shape[1] < LARGURA_MINIMA
+
+    resultado = _combine_weeks([_parse_sheet(df, 'WEEK 1')])
+    completa = df.reindex(columns=range(LARGURA_MINIMA))
+    esperado = apply_schema(baseline_parser.combine([baseline_parser.parse_sheet(completa, 'WEEK 1')]))
+    assert set(resultado['Dia']) <= {'Domingo', 'Segunda', 'Terça'}
+    pd.testing.assert_frame_equal(resultado.reset_index(drop=True), esperado.reset_index(drop=True))
+
+
+def test_paridade_abas_em_paralelo():
+    wb = build_workbook(employees=5, weeks=3, appointments_per_day=3, seed=7)
+    content = _bytes(wb)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        [resultado] = load_spreadsheets([content], executor=executor)
+    esperado = process_spreadsheet(BytesIO(content))
+    pd.testing.assert_frame_equal(resultado.reset_index(drop=True), esperado.reset_index(drop=True))
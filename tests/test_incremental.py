@@ -0,0 +1,74 @@
+import time
+from io import BytesIO
+
+import pandas as pd
+
+from benchmarks.generate_workbook import build_workbook
+from modules.cache import WorkbookCache
+from modules.data_processor import load_spreadsheets, process_spreadsheet
+from modules.incremental import IncrementalParser
+
+
+def _bytes(workbook):
+    buffer = BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def _versoes():
+    """Planilha original e a mesma com um serviço alterado no bloco do segundo employee da WEEK 1"""
+    wb = build_workbook(employees=4, weeks=3, appointments_per_day=3, seed=11)
+    original = _bytes(wb)
+    ws = wb['WEEK 1']
+    # Bloco do segundo employee: NAME: na linha 9, cabeçalho na 10 e atendimentos nas linhas 11 a 13
+    celula = next(
+        ws.cell(row=row, column=2 + 9 * dia + 2)
+        for row in range(11, 14) for dia in range(7)
+        if isinstance(ws.cell(row=row, column=2 + 9 * dia + 2).value, float)
+    )
+    celula.value += 1
+    return original, _bytes(wb)
+
+
+def _esperar_registro(parser, source, timeout=30):
+    limite = time.monotonic() + timeout
+    while not parser.knows(source):
+        assert time.monotonic() < limite
+        time.sleep(0.01)
+
+
+def test_edicao_depois_de_leitura_do_cache(tmp_path):
+    original, editada = _versoes()
+    cache = WorkbookCache(str(tmp_path))
+    load_spreadsheets([original], cache, sources=['escala.xlsx'], parser=IncrementalParser())
+
+    # Outro processo: só o cache em disco conhece a planilha
+    parser = IncrementalParser()
+    load_spreadsheets([original], cache, sources=['escala.xlsx'], parser=parser)
+    assert cache.hits == 1
+    _esperar_registro(parser, 'escala.xlsx')
+
+    data, = load_spreadsheets([editada], cache, sources=['escala.xlsx'], parser=parser)
+    pd.testing.assert_frame_equal(data, process_spreadsheet(BytesIO(editada)))
+
+    changes = parser.changes('escala.xlsx')
+    assert not changes['first_load']
+    assert (changes['sheets_read'], changes['sheets_reused']) == (1, 2)
+    assert (changes['blocks_parsed'], changes['blocks_reused']) == (1, 11)
+    assert (changes['added'], changes['changed'], changes['removed']) == (0, 1, 0)
+    assert changes['details'][['Semana', 'Nome']].values.tolist() == [['WEEK 1', 'Employee 002']]
+
+
+def test_blocos_descartados_entre_submit_e_finish():
+    original, editada = _versoes()
+    parser = IncrementalParser()
+    parser.finish(parser.submit('a.xlsx', original))
+
+    # WEEK 2 e 3 reaproveitadas da fonte a.xlsx; os blocos somem (outra leitura) antes do finish
+    pending = parser.submit('b.xlsx', editada)
+    assert set(pending['reused']) == {'WEEK 2', 'WEEK 3'}
+    parser._blocks.clear()
+
+    data = parser.finish(pending)
+    pd.testing.assert_frame_equal(data, process_spreadsheet(BytesIO(editada)))
+    assert parser.changes('b.xlsx')['sheets_read'] == 3
@@ -0,0 +1,95 @@
+import pandas as pd
+
+from modules.reconciliation import load_statement, reconcile_payments
+
+
+def _atendimentos(*linhas):
+    """(cliente, data, serviço, forma de pagamento, ID) -> atendimentos concluídos no formato do parser"""
+    return pd.DataFrame({
+        'Semana': 'WEEK 1',
+        'Nome': 'Emp 0',
+        'Data': pd.to_datetime([linha[1] for linha in linhas]),
+        'Cliente': [linha[0] for linha in linhas],
+        'Services': [linha[2] for linha in linhas],
+        'Gorjeta': 0.0,
+        'Pagamento': [linha[3] for linha in linhas],
+        'ID Pagamento': pd.array([linha[4] for linha in linhas], dtype='string'),
+        'Verificado': False,
+        'Realizado': True
+    })
+
+
+def _extrato(*linhas):
+    """(ID, data, valor, forma) -> extrato lido pelo load_statement"""
+    csv = 'Transaction ID,Date,Amount,Payment Method\n' + ''.join(
+        f"{id_ or ''},{data},{valor},{forma or ''}\n" for id_, data, valor, forma in linhas
+    )
+    return load_statement(csv.encode(), 'proc.csv')
+
+
+def _problemas(resultado):
+    return resultado['exceptions']['Issue'].astype(str).value_counts().to_dict()
+
+
+def test_id_compartilhado_pareia_um_a_um_pelo_valor():
+    atendimentos = _atendimentos(
+        ('Client A', '2024-01-08', 100.0, None, 'X1'),
+        ('Client B', '2024-01-08', 50.0, None, 'X1')
+    )
+    extrato = _extrato(('X1', '2024-01-08', 50.0, 'Visa'), ('X1', '2024-01-08', 100.0, 'Visa'))
+    resultado = reconcile_payments(atendimentos, extrato)
+
+    matches = resultado['matches']
+    assert len(matches) == 2
+    assert (matches['Match'] == 'Payment ID').all()
+    assert sorted(zip(matches['Expected'], matches['Received'])) == [(50.0, 50.0), (100.0, 100.0)]
+    assert _problemas(resultado) == {'Unknown method': 2}
+    assert resultado['summary']['unknown_methods'] == 2
+
+
+def test_um_pagamento_para_varios_servicos():
+    atendimentos = _atendimentos(
+        ('Client A', '2024-01-08', 60.0, 'Zelle', 'P7'),
+        ('Client A', '2024-01-08', 40.0, 'Zelle', 'P7')
+    )
+    resultado = reconcile_payments(atendimentos, _extrato(('P7', '2024-01-09', 100.0, 'Zelle')))
+
+    assert resultado['exceptions'].empty
+    assert sorted(resultado['matches']['Match']) == ['Payment ID', 'Payment ID (shared)']
+    assert resultado['summary']['matched_by_id'] == 2
+
+
+def test_lancamento_duplicado():
+    atendimentos = _atendimentos(('Client A', '2024-01-08', 80.0, 'Visa', 'D1'))
+    extrato = _extrato(('D1', '2024-01-08', 80.0, 'Visa'), ('D1', '2024-01-08', 80.0, 'Visa'))
+    resultado = reconcile_payments(atendimentos, extrato)
+
+    assert _problemas(resultado) == {'Duplicate transaction': 1}
+    assert len(resultado['matches']) == 1
+    linha = resultado['exceptions'].iloc[0]
+    assert (linha['Appointments'], linha['Transactions'], linha['Difference']) == (1, 2, 80.0)
+
+
+def test_valor_diferente():
+    atendimentos = _atendimentos(('Client A', '2024-01-08', 80.0, 'Visa', 'M1'))
+    resultado = reconcile_payments(atendimentos, _extrato(('M1', '2024-01-08', 75.5, 'Visa')))
+
+    assert _problemas(resultado) == {'Amount mismatch': 1}
+    assert resultado['exceptions'].loc[0, 'Difference'] == -4.5
+    assert resultado['summary']['amount_mismatches'] == 1
+
+
+def test_pagamento_faltando_e_lancamento_sem_atendimento():
+    atendimentos = _atendimentos(
+        ('Client A', '2024-01-08', 80.0, 'Zelle', None),
+        ('Client B', '2024-01-09', 45.0, 'Zelle', None),
+        ('Client C', '2024-01-09', 30.0, 'Cash', None)
+    )
+    extrato = _extrato((None, '2024-01-10', 80.0, 'Zelle'), (None, '2024-01-10', 12.0, 'Zelle'))
+    resultado = reconcile_payments(atendimentos, extrato, window=3)
+
+    assert _problemas(resultado) == {'Missing payment': 1, 'Unmatched transaction': 1}
+    faltando = resultado['exceptions'][resultado['exceptions']['Issue'] == 'Missing payment'].iloc[0]
+    assert faltando['Cliente'] == 'Client B'
+    summary = resultado['summary']
+    assert (summary['matched_by_amount_date'], summary['skipped_appointments']) == (1, 1)
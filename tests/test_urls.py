@@ -0,0 +1,122 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from benchmarks.generate_workbook import workbook_bytes
+from modules.data_processor import load_spreadsheet_urls, process_spreadsheet
+from modules.fetcher import SpreadsheetFetcher
+
+PLANILHA = workbook_bytes(employees=2, weeks=1, appointments_per_day=2, seed=3)
+
+
+@pytest.fixture
+def servidor():
+    """Servidor HTTP local numa thread; rotas[caminho](handler) responde cada pedido"""
+    rotas, pedidos = {}, []
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            pedidos.append((self.path, self.headers.get('If-None-Match')))
+            rotas[self.path](self)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield SimpleNamespace(
+        url=lambda caminho: f'http://127.0.0.1:{server.server_port}{caminho}', rotas=rotas, pedidos=pedidos
+    )
+    server.shutdown()
+    server.server_close()
+
+
+def _responder(handler, status, body=b'', etag=None):
+    handler.send_response(status)
+    if etag:
+        handler.send_header('ETag', etag)
+    handler.send_header('Content-Length', str(len(body)))
+    handler.end_headers()
+    handler.wfile.write(body)
+
+
+def test_download_e_revalidacao_304(servidor, tmp_path):
+    def planilha(handler):
+        if handler.headers.get('If-None-Match') == '"v1"':
+            _responder(handler, 304)
+        else:
+            _responder(handler, 200, PLANILHA, etag='"v1"')
+
+    servidor.rotas['/escala.xlsx'] = planilha
+    fetcher = SpreadsheetFetcher(directory=str(tmp_path))
+
+    assert fetcher.fetch(servidor.url('/escala.xlsx')) == PLANILHA
+    assert fetcher.fetch(servidor.url('/escala.xlsx')) == PLANILHA
+    assert fetcher.stats() == {'downloads': 1, 'not_modified': 1}
+    assert [etag for _, etag in servidor.pedidos] == [None, '"v1"']
+
+
+def test_repete_depois_de_erro_5xx(servidor, tmp_path):
+    def instavel(handler):
+        if len(servidor.pedidos) == 1:
+            _responder(handler, 503)
+        else:
+            _responder(handler, 200, PLANILHA)
+
+    servidor.rotas['/instavel.xlsx'] = instavel
+    fetcher = SpreadsheetFetcher(directory=str(tmp_path), retries=2)
+
+    assert fetcher.fetch(servidor.url('/instavel.xlsx')) == PLANILHA
+    assert len(servidor.pedidos) == 2
+
+
+def test_fonte_lenta_falha_sem_segurar_as_outras(servidor, tmp_path):
+    def lenta(handler):
+        time.sleep(1)
+        _responder(handler, 200, PLANILHA)
+
+    servidor.rotas['/lenta.xlsx'] = lenta
+    servidor.rotas['/rapida.xlsx'] = lambda handler: _responder(handler, 200, PLANILHA)
+    fetcher = SpreadsheetFetcher(directory=str(tmp_path), timeout=(1, 0.2), retries=0)
+
+    lenta_url, rapida_url = servidor.url('/lenta.xlsx'), servidor.url('/rapida.xlsx')
+    lenta, rapida = load_spreadsheet_urls([lenta_url, rapida_url], fetcher=fetcher)
+
+    assert (lenta['source'], lenta['status'], lenta['data']) == (lenta_url, 'failed', None)
+    assert 'timed out' in lenta['error']
+    assert rapida['status'] == 'done'
+    pd.testing.assert_frame_equal(rapida['data'], process_spreadsheet(BytesIO(PLANILHA)))
+
+
+def test_le_cada_planilha_assim_que_chega(servidor, tmp_path):
+    liberar = threading.Event()
+
+    def lenta(handler):
+        # Só responde depois que a planilha rápida foi lida (ou desiste em 5 s)
+        liberar.wait(5)
+        _responder(handler, 200, PLANILHA)
+
+    servidor.rotas['/lenta.xlsx'] = lenta
+    servidor.rotas['/rapida.xlsx'] = lambda handler: _responder(handler, 200, PLANILHA)
+    lenta_url, rapida_url = servidor.url('/lenta.xlsx'), servidor.url('/rapida.xlsx')
+
+    eventos = []
+
+    def progress(result):
+        eventos.append((result['source'], result['status']))
+        if (result['source'], result['status']) == (rapida_url, 'done'):
+            liberar.set()
+
+    results = load_spreadsheet_urls(
+        [lenta_url, rapida_url], fetcher=SpreadsheetFetcher(directory=str(tmp_path)), progress=progress
+    )
+
+    assert [result['source'] for result in results] == [lenta_url, rapida_url]
+    assert [result['status'] for result in results] == ['done', 'done']
+    assert eventos.index((rapida_url, 'done')) < eventos.index((lenta_url, 'parsing'))